@@ -0,0 +1,60 @@
+# account_locks.py
+# Economy / RPG commands ke read-check-write sections ke liye per-account
+# async locks. Users ek fixed number of shards mein hash hote hain (har user ke
+# liye alag Lock object nahi banta), aur ek se zyada accounts ke locks hamesha
+# sorted shard order mein liye jaate hain, isliye deadlock nahi ho sakta.
+
+import asyncio
+import functools
+from contextlib import asynccontextmanager
+
+from config import ACCOUNT_LOCK_SHARDS
+
+class AccountLocks:
+    """Sharded asyncio locks keyed by user_id."""
+
+    def __init__(self, shards):
+        self._locks = [asyncio.Lock() for _ in range(shards)]
+        self.contended = 0
+
+    def _shards(self, user_ids):
+        # Do users ek hi shard mein ho sakte hain; shard sirf ek baar lena hai
+        return sorted({hash(user_id) % len(self._locks) for user_id in user_ids})
+
+    @asynccontextmanager
+    async def hold(self, *user_ids):
+        """Holds the locks of every given account for the body of the block."""
+        acquired = []
+        try:
+            for shard in self._shards(user_ids):
+                lock = self._locks[shard]
+                if lock.locked():
+                    self.contended += 1
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    def stats(self):
+        return {'shards': len(self._locks), 'contended': self.contended}
+
+account_locks = AccountLocks(ACCOUNT_LOCK_SHARDS)
+
+def caller_and_replied(update):
+    """The command's sender plus the replied-to user, if any."""
+    user_ids = [update.effective_user.id]
+    if update.message and update.message.reply_to_message and update.message.reply_to_message.from_user:
+        user_ids.append(update.message.reply_to_message.from_user.id)
+    return user_ids
+
+def locks_accounts(get_user_ids=caller_and_replied):
+    """Runs the handler while holding the locks of get_user_ids(update)."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(update, context):
+            async with account_locks.hold(*get_user_ids(update)):
+                return await handler(update, context)
+        return wrapper
+    return decorator
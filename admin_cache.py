@@ -0,0 +1,71 @@
+# admin_cache.py
+# Har chat ke administrators (aur bot ke apne rights) ka in-memory cache.
+# Ek get_chat_administrators call se poori list aati hai; chat_member /
+# my_chat_member updates aane par us chat ki entry invalidate hoti hai.
+# TTL sirf safety net hai agar koi update miss ho jaaye.
+
+import asyncio
+import time
+
+from telegram.constants import ChatMemberStatus
+
+from config import ADMIN_CACHE_TTL
+
+ADMIN_STATUSES = (ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER)
+
+class AdminCache:
+    """Maps chat_id -> {user_id: ChatMember} for that chat's administrators."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._admins = {}
+        # Ek chat ke liye ek hi fetch chalta hai; baaki callers usi ka wait karte hain
+        self._pending = {}
+        # Har invalidation par badhta hai; usse pehle shuru hua fetch apna result cache nahi karta
+        self._generation = 0
+        self.hits = 0
+        self.fetches = 0
+
+    async def get_admins(self, bot, chat_id):
+        entry = self._admins.get(chat_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self.hits += 1
+            return entry[0]
+
+        pending = self._pending.get(chat_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(bot, chat_id))
+            self._pending[chat_id] = pending
+            pending.add_done_callback(lambda done: self._fetch_done(chat_id, done))
+        return await asyncio.shield(pending)
+
+    async def _fetch(self, bot, chat_id):
+        self.fetches += 1
+        generation = self._generation
+        members = await bot.get_chat_administrators(chat_id)
+        admins = {member.user.id: member for member in members}
+        if generation == self._generation:
+            self._admins[chat_id] = (admins, time.monotonic() + self.ttl)
+        return admins
+
+    def _fetch_done(self, chat_id, done):
+        if self._pending.get(chat_id) is done:
+            del self._pending[chat_id]
+
+    async def is_admin(self, bot, chat_id, user_id):
+        return user_id in await self.get_admins(bot, chat_id)
+
+    async def bot_can(self, bot, chat_id, permission):
+        """True if the bot is an admin in chat_id with the given can_* right."""
+        member = (await self.get_admins(bot, chat_id)).get(bot.id)
+        return member is not None and bool(getattr(member, permission, False))
+
+    def invalidate(self, chat_id):
+        self._generation += 1
+        self._admins.pop(chat_id, None)
+        self._pending.pop(chat_id, None)
+
+    def stats(self):
+        return {'chats': len(self._admins), 'hits': self.hits, 'fetches': self.fetches}
+
+admin_cache = AdminCache(ADMIN_CACHE_TTL)
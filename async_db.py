@@ -0,0 +1,67 @@
+# async_db.py
+# database.py ke helpers ka awaitable version. Har query ek dedicated thread
+# pool par chalti hai, taaki slow disk I/O event loop ko block na kare aur
+# baaki chats ke updates chalte rahein.
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+from config import DB_EXECUTOR_WORKERS
+
+# Pool ka size hi database par concurrent queries ki limit hai.
+_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+async def run_db(func, *args, **kwargs):
+    """Runs a synchronous database function on the DB executor and awaits it."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+def _awaitable(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_db(func, *args, **kwargs)
+    return wrapper
+
+# --- AWAITABLE DATABASE API ---
+
+init_db = _awaitable(database.init_db)
+reset_daily_counters = _awaitable(database.reset_daily_counters)
+get_bot_state = _awaitable(database.get_bot_state)
+set_bot_state = _awaitable(database.set_bot_state)
+get_user_data = _awaitable(database.get_user_data)
+set_user_data = _awaitable(database.set_user_data)
+update_balance = _awaitable(database.update_balance)
+get_top_users = _awaitable(database.get_top_users)
+apply_ledger = _awaitable(database.apply_ledger)
+claim_group = _awaitable(database.claim_group)
+resolve_combat = _awaitable(database.resolve_combat)
+add_group_to_db = _awaitable(database.add_group_to_db)
+log_name_change = _awaitable(database.log_name_change)
+get_user_history = _awaitable(database.get_user_history)
+get_latest_names = _awaitable(database.get_latest_names)
+get_balance_history = _awaitable(database.get_balance_history)
+get_group_claim_data = _awaitable(database.get_group_claim_data)
+set_group_claim_data = _awaitable(database.set_group_claim_data)
+create_broadcast = _awaitable(database.create_broadcast)
+get_broadcast = _awaitable(database.get_broadcast)
+get_broadcast_targets = _awaitable(database.get_broadcast_targets)
+record_broadcast_results = _awaitable(database.record_broadcast_results)
+finish_broadcast = _awaitable(database.finish_broadcast)
+enqueue_notification = _awaitable(database.enqueue_notification)
+get_due_notifications = _awaitable(database.get_due_notifications)
+get_next_notification_ts = _awaitable(database.get_next_notification_ts)
+delete_notifications = _awaitable(database.delete_notifications)
+reschedule_notifications = _awaitable(database.reschedule_notifications)
+
+# Pure helpers (no I/O) waise hi re-export kiye gaye hain
+is_protected = database.is_protected
+is_dead = database.is_dead
+day_start = database.day_start
+new_day_due = database.new_day_due
+
+def shutdown():
+    """Waits for queued queries to finish, then closes all DB connections."""
+    _executor.shutdown(wait=True)
+    database.close_connections()
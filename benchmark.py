@@ -0,0 +1,247 @@
+# benchmark.py
+# In-process handler benchmark. main.py ke saare registered handlers ko
+# synthetic updates se chalata hai -- ek temporary database par, aur ek fake
+# Bot ke saath jo Telegram API calls bhejta nahi, sirf record karta hai.
+# Har command ke liye throughput, p50/p99 latency, SQL statements aur
+# Telegram calls report hote hain.
+#
+# Usage: python benchmark.py [-n 200] [--warmup 5] [--seed 0] [--only bal give kill]
+#                            [--backend memory|file|sharded] [--shards 4]
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from telegram import Update
+from telegram.ext import Application, CommandHandler
+from telegram.request import BaseRequest
+
+import database
+from config import BOT_OWNER_ID
+from storage import FileBackend, MemoryBackend, ShardedBackend
+
+BOT_ID = 1000000
+CHAT_ID = -100123456789
+USER_POOL = 100
+# Commands jinhe arguments chahiye
+COMMAND_ARGS = {'give': '10', 'rob': '10', 'mute': '5', 'tr': 'hello world', 'warn': 'spam', 'broadcast': 'status'}
+# Owner-only commands owner ki taraf se bheje jaate hain
+OWNER_COMMANDS = {'broadcast'}
+PRIVATE_COMMANDS = {'start'}
+
+def user_dict(user_id):
+    return {'id': user_id, 'is_bot': user_id == BOT_ID, 'first_name': f"User{user_id}", 'username': f"user{user_id}"}
+
+def admin_dict(user_id):
+    rights = (
+        'can_be_edited', 'is_anonymous', 'can_manage_chat', 'can_delete_messages', 'can_manage_video_chats',
+        'can_restrict_members', 'can_promote_members', 'can_change_info', 'can_invite_users',
+        'can_post_stories', 'can_edit_stories', 'can_delete_stories', 'can_pin_messages',
+    )
+    member = {'status': 'administrator', 'user': user_dict(user_id)}
+    member.update({right: right != 'is_anonymous' for right in rights})
+    return member
+
+def chat_dict(chat_id):
+    if chat_id > 0:
+        return {'id': chat_id, 'type': 'private', 'first_name': f"User{chat_id}"}
+    return {'id': chat_id, 'type': 'supergroup', 'title': "Benchmark Group"}
+
+class FakeRequest(BaseRequest):
+    """Answers every Bot API call locally with a plausible result and counts it."""
+
+    def __init__(self):
+        self.calls = 0
+        self._message_id = 0
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        self.calls += 1
+        endpoint = url.rsplit('/', 1)[-1]
+        params = request_data.parameters if request_data is not None else {}
+        return 200, json.dumps({'ok': True, 'result': self._result(endpoint, params)}).encode()
+
+    def _result(self, endpoint, params):
+        if endpoint == 'getMe':
+            return {**user_dict(BOT_ID), 'username': "benchmark_bot"}
+        if endpoint in ('sendMessage', 'copyMessage'):
+            self._message_id += 1
+            chat_id = int(params.get('chat_id', CHAT_ID))
+            return {'message_id': self._message_id, 'date': int(time.time()), 'chat': chat_dict(chat_id), 'text': params.get('text', "")}
+        if endpoint == 'getChat':
+            user_id = int(params['chat_id'])
+            return {**chat_dict(user_id), 'username': f"user{user_id}", 'accent_color_id': 0, 'max_reaction_count': 0}
+        if endpoint == 'getChatAdministrators':
+            owner = {'status': 'creator', 'user': user_dict(1), 'is_anonymous': False}
+            return [owner, admin_dict(BOT_ID)] + [admin_dict(user_id) for user_id in range(2, USER_POOL + 1)]
+        if endpoint == 'getChatMember':
+            return admin_dict(int(params['user_id']))
+        return True
+
+class SqlCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, statement):
+        with self._lock:
+            self.count += 1
+
+def _message(update_id, text, sender, chat_id, reply_to=None):
+    message = {
+        'message_id': update_id, 'date': int(time.time()), 'chat': chat_dict(chat_id),
+        'from': user_dict(sender), 'text': text,
+    }
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    if reply_to is not None:
+        message['reply_to_message'] = {
+            'message_id': update_id + 1000000, 'date': int(time.time()), 'chat': chat_dict(chat_id),
+            'from': user_dict(reply_to), 'text': "hi",
+        }
+    return message
+
+def make_update(bot, update_id, scenario, rng):
+    """Builds a synthetic Update for a command name or a '<...>' update scenario."""
+    sender, target = rng.sample(range(1, USER_POOL + 1), 2)
+    if scenario == '<new_chat_members>':
+        message = _message(update_id, "", sender, CHAT_ID)
+        del message['text']
+        message['new_chat_members'] = [user_dict(target)]
+        data = {'update_id': update_id, 'message': message}
+    elif scenario == '<chat_member>':
+        data = {'update_id': update_id, 'chat_member': {
+            'chat': chat_dict(CHAT_ID), 'from': user_dict(sender), 'date': int(time.time()),
+            'old_chat_member': {'status': 'member', 'user': user_dict(target)},
+            'new_chat_member': admin_dict(target),
+        }}
+    else:
+        if scenario in OWNER_COMMANDS:
+            sender = BOT_OWNER_ID
+        chat_id = sender if scenario in PRIVATE_COMMANDS else CHAT_ID
+        text = f"/{scenario} {COMMAND_ARGS[scenario]}" if scenario in COMMAND_ARGS else f"/{scenario}"
+        data = {'update_id': update_id, 'message': _message(update_id, text, sender, chat_id, reply_to=target)}
+    return Update.de_json(data, bot)
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+async def run(iterations, warmup, seed, only):
+    from main import add_handlers
+    from flood_control import flood_control
+    import async_db
+
+    request = FakeRequest()
+    application = Application.builder().token("123456:BENCHMARK").request(request).get_updates_request(FakeRequest()).build()
+    add_handlers(application)
+    # Benchmark ek hi users se hazaron commands bhejta hai; flood control sab drop kar deta
+    flood_control.enabled = False
+
+    errors = []
+    async def on_error(update, context):
+        errors.append(context.error)
+    application.add_error_handler(on_error)
+
+    scenarios = [
+        command for handler in application.handlers[0] if isinstance(handler, CommandHandler)
+        for command in sorted(handler.commands)
+    ] + ['<new_chat_members>', '<chat_member>']
+    if only:
+        scenarios = [scenario for scenario in scenarios if scenario.strip('<>') in only]
+
+    await application.initialize()
+    for user_id in range(1, USER_POOL + 1):
+        await async_db.set_user_data(user_id, balance=10 ** 9)
+        await async_db.log_name_change(user_id, 'name', f"User{user_id}")
+    await async_db.add_group_to_db(CHAT_ID, 1)
+
+    rng = random.Random(seed)
+    random.seed(seed)
+    update_id = 0
+    results = []
+    for scenario in scenarios:
+        for _ in range(warmup):
+            update_id += 1
+            await application.process_update(make_update(application.bot, update_id, scenario, rng))
+
+        latencies = []
+        sql_before, calls_before, errors_before = sql_counter.count, request.calls, len(errors)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            update_id += 1
+            update = make_update(application.bot, update_id, scenario, rng)
+            t0 = time.perf_counter()
+            await application.process_update(update)
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        results.append((
+            scenario, iterations / elapsed, percentile(latencies, 0.50) * 1000, percentile(latencies, 0.99) * 1000,
+            (sql_counter.count - sql_before) / iterations, (request.calls - calls_before) / iterations,
+            len(errors) - errors_before,
+        ))
+
+    await application.shutdown()
+    async_db.shutdown()
+    return results, errors
+
+def print_report(results):
+    header = f"{'command':<20} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'sql/op':>8} {'api/op':>8} {'errors':>7}"
+    print(header)
+    print('-' * len(header))
+    for scenario, throughput, p50, p99, sql, api, error_count in results:
+        print(f"{scenario:<20} {throughput:>10.1f} {p50:>9.2f} {p99:>9.2f} {sql:>8.1f} {api:>8.1f} {error_count:>7}")
+
+sql_counter = SqlCounter()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every bot handler in-process against a temporary database.")
+    parser.add_argument('-n', '--iterations', type=int, default=200, help="measured updates per command")
+    parser.add_argument('--warmup', type=int, default=5, help="unmeasured updates per command first")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='*', default=None, help="only these commands")
+    parser.add_argument('--backend', choices=('memory', 'file', 'sharded'), default='memory', help="storage backend to run against")
+    parser.add_argument('--shards', type=int, default=4, help="shards for the memory/sharded backends")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Har connection temporary (ya in-memory) DB par khule aur har statement gina jaaye
+        path = os.path.join(tmp, "benchmark.db")
+        if args.backend == 'memory':
+            database.set_backend(MemoryBackend(args.shards))
+        elif args.backend == 'file':
+            database.set_backend(FileBackend(path))
+        else:
+            database.set_backend(ShardedBackend(path, args.shards))
+        open_connection = database._open_connection
+        def traced_connection(shard):
+            conn = open_connection(shard)
+            conn.set_trace_callback(sql_counter)
+            return conn
+        database._open_connection = traced_connection
+
+        database.init_db()
+        results, errors = asyncio.run(run(args.iterations, args.warmup, args.seed, args.only))
+
+    print_report(results)
+    if errors:
+        print(f"\n{len(errors)} handler error(s); first: {errors[0]!r}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+# broadcast.py
+# Owner ka /broadcast: groups table ke har chat ko message bhejta hai.
+# Targets pages mein (chat_id order mein) stream hote hain, sends ek global
+# rate limit aur concurrency cap ke andar parallel chalte hain, aur har send
+# ka result chhote batches mein database mein save hota hai -- bot restart ho to broadcast
+# wahi se resume hota hai. Jo chats bot ko reject karti hain woh groups se hata di jaati hain.
+
+import asyncio
+import time
+
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, ChatMigrated, Forbidden, NetworkError, RetryAfter, TelegramError
+from telegram.ext import ContextTypes
+
+from async_db import (
+    create_broadcast, get_broadcast, get_broadcast_targets, record_broadcast_results, finish_broadcast
+)
+from throttle import BROADCAST, lane
+from config import (
+    BOT_OWNER_ID, BROADCAST_RATE, BROADCAST_CONCURRENCY, BROADCAST_PAGE_SIZE, BROADCAST_RECORD_BATCH,
+    BROADCAST_MAX_RETRIES
+)
+
+# Sabse chhote chat_id se bhi chhota; keyset pagination yahin se shuru hoti hai
+_FIRST_CHAT_ID = -(2 ** 63)
+
+def retry_after_seconds(error):
+    """RetryAfter.retry_after is an int or a timedelta depending on the library version."""
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+
+class RateLimiter:
+    """Spaces acquisitions 1/rate seconds apart; pause() holds everyone back (RetryAfter)."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._paused_until)
+            self._next_slot = slot + self.interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            # Sleep ke dauraan kisi ne pause() kiya ho to naya slot lo
+            if time.monotonic() >= self._paused_until:
+                return
+
+    def pause(self, seconds):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+class Broadcaster:
+    """Runs at most one broadcast at a time as a background task."""
+
+    def __init__(self, rate, concurrency, page_size, record_batch, max_retries):
+        self.limiter = RateLimiter(rate)
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.record_batch = record_batch
+        self.max_retries = max_retries
+        self.broadcast_id = None
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self, bot, broadcast):
+        """Starts (or resumes) the broadcast row returned by get_broadcast()."""
+        broadcast_id, text, from_chat_id, message_id = broadcast[:4]
+        self.broadcast_id = broadcast_id
+        # Task context copy karta hai: iske saare sends broadcast lane mein (replies aur DMs ke baad)
+        with lane(BROADCAST):
+            self._task = asyncio.get_running_loop().create_task(
+                self._run(bot, broadcast_id, text, from_chat_id, message_id)
+            )
+
+    async def _run(self, bot, broadcast_id, text, from_chat_id, message_id):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done = []
+
+        async def deliver(chat_id):
+            async with semaphore:
+                status, sent_to = await self._deliver(bot, chat_id, text, from_chat_id, message_id)
+            done.append((chat_id, status, sent_to))
+
+        saving = None
+
+        async def record():
+            nonlocal saving
+            batch = done[:]
+            del done[:]
+            # Shield: cancel hone par bhi executor mein write chalta rehta hai, flush() uska intezaar karta hai
+            saving = asyncio.ensure_future(record_broadcast_results(broadcast_id, batch))
+            await asyncio.shield(saving)
+
+        async def flush():
+            if saving is not None:
+                await asyncio.gather(saving, return_exceptions=True)
+            if done:
+                await record()
+
+        after = _FIRST_CHAT_ID
+        pending = []
+        try:
+            while True:
+                targets = await get_broadcast_targets(broadcast_id, after, self.page_size)
+                if not targets:
+                    break
+                pending = [asyncio.ensure_future(deliver(chat_id)) for chat_id in targets]
+                # Poore page ka intezaar nahi: har record_batch sends ke baad progress save
+                for finished in asyncio.as_completed(pending):
+                    await finished
+                    if len(done) >= self.record_batch:
+                        await record()
+                if done:
+                    await record()
+                after = targets[-1]
+            await finish_broadcast(broadcast_id)
+        except asyncio.CancelledError:
+            # Shutdown/cancel: in-flight sends rok kar jo pahunch chuke unki progress save, agli baar resume hoga
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            await flush()
+            raise
+        except Exception as e:
+            # Jo bhej diye unki progress save ho, warna resume par unhe dobara jaata
+            print(f"Broadcast {broadcast_id} stopped: {e}")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            try:
+                await flush()
+                await finish_broadcast(broadcast_id, 'failed')
+            except Exception as db_error:
+                print(f"Error saving broadcast {broadcast_id} progress: {db_error}")
+            return await self._report(bot, broadcast_id, error=e)
+
+        await self._report(bot, broadcast_id)
+
+    async def _report(self, bot, broadcast_id, error=None):
+        """Sends the owner the broadcast's totals (and why it stopped, if it failed)."""
+        try:
+            _, _, _, _, _, started_ts, _, sent, failed, pruned = await get_broadcast(broadcast_id)
+            elapsed = int(time.time() - started_ts)
+            if error is None:
+                headline = f"📢 **Broadcast #{broadcast_id} finished** in {elapsed}s"
+            else:
+                reason = str(error).replace('`', "'")
+                headline = f"⚠️ **Broadcast #{broadcast_id} failed** after {elapsed}s: `{reason}`"
+            await bot.send_message(
+                chat_id=BOT_OWNER_ID,
+                text=f"{headline}\n✅ Sent: **{sent}**\n❌ Failed: **{failed}**\n🗑️ Removed chats: **{pruned}**",
+                parse_mode=ParseMode.MARKDOWN
+            )
+        except Exception as e:
+            print(f"Error sending broadcast report to owner: {e}")
+
+    async def _deliver(self, bot, chat_id, text, from_chat_id, message_id):
+        """Returns (status, chat id actually sent to)."""
+        target = chat_id
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            try:
+                if text is not None:
+                    await bot.send_message(chat_id=target, text=text)
+                else:
+                    await bot.copy_message(chat_id=target, from_chat_id=from_chat_id, message_id=message_id)
+                return 'sent', target
+            except RetryAfter as e:
+                # Flood limit poore bot par lagta hai, isliye sab sends ruk jaate hain
+                self.limiter.pause(retry_after_seconds(e))
+            except ChatMigrated as e:
+                target = e.new_chat_id
+            except Forbidden:
+                return 'pruned', target
+            except BadRequest as e:
+                if 'chat not found' in str(e).lower():
+                    return 'pruned', target
+                return 'failed', target
+            except NetworkError:
+                await asyncio.sleep(2 ** attempt)
+            except TelegramError:
+                return 'failed', target
+        return 'failed', target
+
+    async def resume(self, bot):
+        """Restarts an interrupted broadcast, if any (called on startup)."""
+        broadcast = await get_broadcast()
+        if broadcast is not None and broadcast[4] == 'running' and not self.running:
+            print(f"Resuming broadcast #{broadcast[0]}...")
+            self.start(bot, broadcast)
+
+    async def cancel(self):
+        if self.running:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            await finish_broadcast(self.broadcast_id, 'cancelled')
+
+    async def stop(self):
+        """Stops the running task without marking it finished, so it resumes on restart."""
+        if self.running:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+broadcaster = Broadcaster(
+    BROADCAST_RATE, BROADCAST_CONCURRENCY, BROADCAST_PAGE_SIZE, BROADCAST_RECORD_BATCH, BROADCAST_MAX_RETRIES
+)
+
+# /broadcast [msg] ya kisi message par reply; /broadcast status; /broadcast cancel
+async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id != BOT_OWNER_ID:
+        return await update.message.reply_text("❌ You are not the bot owner.", parse_mode=ParseMode.MARKDOWN)
+
+    action = context.args[0].lower() if context.args else None
+
+    if action == 'status':
+        broadcast = await get_broadcast()
+        if broadcast is None:
+            return await update.message.reply_text("No broadcasts yet.")
+        broadcast_id, _, _, _, status, started_ts, _, sent, failed, pruned = broadcast
+        return await update.message.reply_text(
+            f"📢 **Broadcast #{broadcast_id}**: `{status}`\n"
+            f"⏱️ Started: `{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started_ts))}`\n"
+            f"✅ Sent: **{sent}** | ❌ Failed: **{failed}** | 🗑️ Removed: **{pruned}**",
+            parse_mode=ParseMode.MARKDOWN
+        )
+
+    if action == 'cancel' and len(context.args) == 1:
+        if not broadcaster.running:
+            return await update.message.reply_text("❌ No broadcast is running.")
+        await broadcaster.cancel()
+        return await update.message.reply_text(f"🛑 Broadcast #{broadcaster.broadcast_id} cancelled.")
+
+    if broadcaster.running:
+        return await update.message.reply_text(
+            f"⏳ Broadcast #{broadcaster.broadcast_id} is still running. Use `/broadcast status` or `/broadcast cancel`.",
+            parse_mode=ParseMode.MARKDOWN
+        )
+
+    if update.message.reply_to_message:
+        source = update.message.reply_to_message
+        broadcast_id = await create_broadcast(from_chat_id=source.chat_id, message_id=source.message_id)
+    elif context.args:
+        broadcast_id = await create_broadcast(text=" ".join(context.args))
+    else:
+        return await update.message.reply_text("❓ Usage: `/broadcast [message]` or reply to a message with `/broadcast`.", parse_mode=ParseMode.MARKDOWN)
+
+    broadcaster.start(context.bot, await get_broadcast(broadcast_id))
+    await update.message.reply_text(
+        f"📢 Broadcast #{broadcast_id} started. You'll get a report when it finishes.\n"
+        f"Use `/broadcast status` to check progress.",
+        parse_mode=ParseMode.MARKDOWN
+    )
@@ -0,0 +1,76 @@
+# combat.py
+# /kill aur /rob ke rules. Yahan koi I/O nahi hota: database.resolve_combat
+# dono players ki rows ek query mein padhta hai, yahan ka rules function
+# memory mein faisla karta hai, aur jo CombatResult wapas aata hai uske saare
+# effects (balance, death_ts, total_kills, ledger rows) ek hi transaction mein
+# lagte hain. Handler sirf result ko message mein badalta hai.
+
+import random
+
+# Outcomes
+ATTACKER_DEAD = 'attacker_dead'
+TARGET_PROTECTED = 'target_protected'
+TARGET_DEAD = 'target_dead'
+TARGET_TOO_POOR = 'target_too_poor'
+KILLED = 'killed'
+ROBBED = 'robbed'
+ROB_FAILED = 'rob_failed'        # robber ne penalty bhari
+ROB_ESCAPED = 'rob_escaped'      # robber ke paas penalty ke paise nahi the
+
+class CombatResult:
+    """What an attack did. amount is the reward, loot or penalty, depending on outcome.
+
+    entries are (user_id, type, amount, details) ledger rows whose amounts are
+    added to balances; updates sets columns and increments adds to them
+    ({user_id: {column: value}}).
+    """
+
+    __slots__ = ('outcome', 'amount', 'entries', 'updates', 'increments')
+
+    def __init__(self, outcome, amount=0, entries=(), updates=None, increments=None):
+        self.outcome = outcome
+        self.amount = amount
+        self.entries = list(entries)
+        self.updates = updates or {}
+        self.increments = increments or {}
+
+def _blocked(attacker, target, now):
+    """Outcome that stops any attack before it happens, or None."""
+    if attacker.death_ts > now:
+        return CombatResult(ATTACKER_DEAD)
+    if target.protect_ts > now:
+        return CombatResult(TARGET_PROTECTED)
+    if target.death_ts > now:
+        return CombatResult(TARGET_DEAD)
+    return None
+
+def kill_rules(min_reward, max_reward, death_duration):
+    def rules(attacker_id, target_id, attacker, target, now):
+        blocked = _blocked(attacker, target, now)
+        if blocked is not None:
+            return blocked
+        reward = random.randint(min_reward, max_reward)
+        return CombatResult(
+            KILLED, reward,
+            entries=[(attacker_id, 'kill_gain', reward, "")],
+            updates={target_id: {'death_ts': now + death_duration}},
+            increments={attacker_id: {'total_kills': 1}},
+        )
+    return rules
+
+def rob_rules(amount, penalty, attacker_name, target_name):
+    def rules(attacker_id, target_id, attacker, target, now):
+        blocked = _blocked(attacker, target, now)
+        if blocked is not None:
+            return blocked
+        if target.balance < amount:
+            return CombatResult(TARGET_TOO_POOR, amount)
+        if random.random() < 0.5:
+            return CombatResult(ROBBED, amount, entries=[
+                (attacker_id, 'rob_gain', amount, target_name),
+                (target_id, 'rob_loss', -amount, attacker_name),
+            ])
+        if attacker.balance >= penalty:
+            return CombatResult(ROB_FAILED, penalty, entries=[(attacker_id, 'rob_loss', -penalty, "Failed Robbery")])
+        return CombatResult(ROB_ESCAPED)
+    return rules
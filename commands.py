@@ -0,0 +1,132 @@
+# commands.py
+# Bot ke saare commands ki ek declarative list: kaunsa command kis module ke
+# kis function par jaata hai, /help ke kis section mein dikhta hai, aur
+# Telegram ke command menu mein aata hai ya nahi. main.py isi se
+# CommandHandlers, /help text aur set_my_commands ka menu banata hai.
+# Handler modules yahan sirf "module:function" naam se likhe hain -- woh
+# pehli baar unka command aane par hi import hote hain (LazyCallback), isliye
+# startup par koi handler module load nahi hota.
+
+import importlib
+
+class Command:
+    """One bot command.
+
+    target is "module:function". section is a key of SECTIONS (None hides it
+    from /help); hint follows the command there, e.g. "(Reply)". menu puts it
+    in the Telegram command menu with description.
+    """
+
+    __slots__ = ('name', 'target', 'description', 'section', 'hint', 'menu')
+
+    def __init__(self, name, target, description, section=None, hint="", menu=False):
+        self.name = name
+        self.target = target
+        self.description = description
+        self.section = section
+        self.hint = hint
+        self.menu = menu
+
+class LazyCallback:
+    """Handler (or job) callback that imports its "module:function" on the first call."""
+
+    def __init__(self, target):
+        self.target = target
+        self._func = None
+
+    @property
+    def __wrapped__(self):
+        # inspect.unwrap (profiler) bhi isi se asli function tak pahunchta hai
+        if self._func is None:
+            module, _, name = self.target.partition(':')
+            self._func = getattr(importlib.import_module(module), name)
+        return self._func
+
+    async def __call__(self, *args):
+        return await self.__wrapped__(*args)
+
+    def __repr__(self):
+        return f"LazyCallback({self.target!r})"
+
+# /help sections, isi order mein
+SECTIONS = {
+    'economy': "💰 Economy & RPG Commands:",
+    'utility': "🛠️ Utility & Misc Commands:",
+    'moderation': "🛡️ Moderation Commands (Admins, Reply):",
+    'fun': "🎉 Fun Actions (Reply to someone):",
+    'games': "🎲 Games:",
+    'info': "ℹ️ Bot Info:",
+}
+
+COMMANDS = [
+    # core_actions
+    Command("start", "core_actions:start_command", "Start the bot & get group invite link", 'info', menu=True),
+    Command("help", "core_actions:help_command", "Show all commands and features", 'info', menu=True),
+    Command("id", "core_actions:id_command", "Show your, the replied user's and the chat's ID", 'utility', "(Reply to someone)"),
+
+    # economy
+    Command("bal", "economy:bal_command", "Check your or someone else's balance", 'economy', menu=True),
+    Command("daily", "economy:daily_command", "Claim your daily reward", 'economy', menu=True),
+    Command("give", "economy:give_command", "Send money to a user (Reply + amount)", 'economy', "(Reply + amount)"),
+    Command("protect", "economy:protect_command", "Buy protection for 24 hours", 'economy', menu=True),
+    Command("rob", "economy:rob_command", "Rob a user (Reply + amount)", 'economy', "(Reply + amount)"),
+    Command("kill", "economy:kill_command", "Kill a user (Reply)", 'economy', "(Reply)", menu=True),
+    Command("revive", "economy:revive_command", "Revive yourself or a user (Reply)", 'economy', "(Reply)"),
+    Command("toprich", "economy:toprich_command", "Top 10 richest users", 'economy'),
+    Command("topkill", "economy:topkill_command", "Top 10 killers", 'economy'),
+    Command("check", "economy:check_command", "Check a user's protection (Reply)", 'economy'),
+    Command("detail", "economy:detail_command", "Your or a user's full status", 'economy'),
+    Command("claim", "economy:claim_command", "Claim this group for a reward", 'economy'),
+    Command("own", "economy:own_command", "Show who owns this group", 'economy'),
+
+    # utility_actions
+    Command("history", "utility_actions:history_command", "Name and username history", 'economy'),
+    Command("owner", "utility_actions:owner_command", "Show the bot owner", 'utility'),
+    Command("tr", "utility_actions:tr_command", "Translate text", 'utility'),
+
+    # mod_actions
+    Command("adminlist", "mod_actions:adminlist_command", "List the group's admins", 'utility'),
+    Command("ban", "mod_actions:ban_user_command", "Ban a user (Admin, Reply)", 'moderation', menu=True),
+    Command("unban", "mod_actions:unban_user_command", "Unban a user (Admin, Reply)", 'moderation'),
+    Command("mute", "mod_actions:mute_user_command", "Mute a user (Admin, Reply)", 'moderation'),
+    Command("unmute", "mod_actions:unmute_user_command", "Unmute a user (Admin, Reply)", 'moderation'),
+    Command("pin", "mod_actions:pin_message_command", "Pin a message (Admin, Reply)", 'moderation', menu=True),
+    Command("promote", "mod_actions:promote_user_command", "Promote a user to admin (Admin, Reply)", 'moderation'),
+    Command("demote", "mod_actions:demote_user_command", "Demote an admin (Admin, Reply)", 'moderation'),
+    Command("warn", "mod_actions:warn_user_command", "Warn a user (Admin, Reply)", 'moderation'),
+
+    # broadcast, profiler (owner only)
+    Command("broadcast", "broadcast:broadcast_command", "Message every group (Owner only)", 'utility', "[msg] (Owner only)"),
+    Command("profile", "profiler:profile_command", "Profile the live bot (Owner only)"),
+
+    # fun_actions
+    Command("crush", "fun_actions:crush_command", "Crush on someone (Reply)", 'fun'),
+    Command("love", "fun_actions:love_command", "Love someone (Reply)", 'fun'),
+    Command("look", "fun_actions:look_command", "Look at someone (Reply)", 'fun'),
+    Command("brain", "fun_actions:brain_command", "Check someone's brain (Reply)", 'fun'),
+    Command("stupid_meter", "fun_actions:stupid_meter_command", "Stupid meter (Reply)", 'fun'),
+    Command("slap", "fun_actions:slap_command", "Slap someone (Reply)", 'fun'),
+    Command("punch", "fun_actions:punch_command", "Punch someone (Reply)", 'fun'),
+    Command("bite", "fun_actions:bite_command", "Bite someone (Reply)", 'fun'),
+    Command("kiss", "fun_actions:kiss_command", "Kiss someone (Reply)", 'fun'),
+    Command("hug", "fun_actions:hug_command", "Hug someone (Reply)", 'fun'),
+    Command("truth", "fun_actions:truth_command", "Get a truth question", 'games'),
+    Command("dare", "fun_actions:dare_command", "Get a dare", 'games'),
+    Command("puzzle", "fun_actions:game_placeholder_command", "Puzzle game (coming soon)", 'games', "(*Placeholder*)"),
+]
+
+def menu_commands():
+    """(command, description) pairs for set_my_commands, in COMMANDS order."""
+    return [(command.name, command.description) for command in COMMANDS if command.menu]
+
+def help_text():
+    """The /help message (Markdown), one line per section."""
+    lines = ["🌸 **Mahiru Shiina All-Rounder Bot Commands** 🌸"]
+    for section, title in SECTIONS.items():
+        entries = [
+            f"*/{command.name}*" + (f" {command.hint}" if command.hint else "")
+            for command in COMMANDS if command.section == section
+        ]
+        if entries:
+            lines.append(f"\n**{title}**\n" + ", ".join(entries))
+    return "\n".join(lines)
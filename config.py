@@ -26,3 +26,101 @@ ROB_PENALTY_COST = 300
 
 # RPG Limits
 REVIVE_LIMIT_DAILY = 3
+
+# --- DATABASE TUNING ---
+DB_BUSY_TIMEOUT_MS = 5000        # Lock milne tak kitna wait karein (ms)
+DB_STATEMENT_CACHE_SIZE = 256    # Har connection par prepared statements ka cache
+DB_CACHE_SIZE_KB = 16384         # SQLite page cache (KB) per connection
+DB_EXECUTOR_WORKERS = 4          # Database queries chalane wale background threads
+
+# --- STORAGE BACKEND ---
+DB_BACKEND = "file"              # "file" (sab DB_NAME mein), "sharded" (users DB_SHARDS files mein), "memory" (tests/benchmark)
+DB_SHARDS = 4                    # "sharded"/"memory" mein shards; badalne par startup par users apne naye shard mein chale jaate hain
+
+# --- USER CACHE ---
+USER_CACHE_SIZE = 10000          # Memory mein max kitne users ki rows
+USER_CACHE_TTL = 30              # Cached row kitne seconds tak valid hai
+
+# --- LEADERBOARDS ---
+LEADERBOARD_SIZE = 50            # /toprich, /topkill ke liye memory mein top kitne users (10 dikhte hain; baaki girne walon ki jagah)
+
+# --- DISPLAY NAME CACHE ---
+NAME_CACHE_SIZE = 50000          # Memory mein max kitne users ke naam
+NAME_CACHE_TTL = 60 * 60 * 6     # Isse purana naam background mein refresh hota hai
+NAME_FETCH_CONCURRENCY = 8       # Ek saath kitne get_chat calls
+
+# --- ADMIN CACHE ---
+ADMIN_CACHE_TTL = 60 * 10        # chat_member updates miss hon to bhi itne seconds baad refresh
+
+# --- BROADCAST ---
+BROADCAST_RATE = 25              # Messages per second (Telegram global limit ~30/s)
+BROADCAST_CONCURRENCY = 20       # Ek saath kitne sends in-flight
+BROADCAST_PAGE_SIZE = 500        # groups table se ek baar mein kitne targets
+BROADCAST_RECORD_BATCH = 20      # Itne sends poore hote hi progress save (stop/crash par max itne dobara jaate hain)
+BROADCAST_MAX_RETRIES = 3        # RetryAfter / network errors par kitni baar dobara
+
+# --- NOTIFICATION OUTBOX ---
+OUTBOX_CONCURRENCY = 10          # Ek saath kitne DMs bheje jaate hain
+OUTBOX_BATCH_SIZE = 200          # Ek round mein kitni due rows uthayi jaati hain
+OUTBOX_MAX_ATTEMPTS = 5          # Itni failures ke baad notification drop
+OUTBOX_RETRY_BASE = 5            # Backoff: OUTBOX_RETRY_BASE * 2^attempts seconds
+OUTBOX_IDLE_POLL = 30            # Kuch due na ho to itne seconds baad dobara check
+OUTBOX_DIGEST_WINDOWS = {'tax': 60}  # Kind -> seconds; is window ke notifications ek digest ban jaate hain
+
+# --- DEPLOYMENT (POLLING / WEBHOOK) ---
+RUN_MODE = "polling"             # "polling" ya "webhook"
+WEB_HOST = "0.0.0.0"             # Health check (aur webhook) server
+WEB_PORT = 8080
+WEBHOOK_URL = ""                 # Public HTTPS base URL, e.g. "https://mybot.example.com"
+WEBHOOK_PATH = "/telegram"       # Telegram updates isi path par POST karta hai
+WEBHOOK_SECRET = ""              # X-Telegram-Bot-Api-Secret-Token; khali ho to check nahi hota
+WEBHOOK_MAX_CONNECTIONS = 40     # Telegram se ek saath kitne webhook connections
+
+# --- UPDATE CONCURRENCY ---
+UPDATE_WORKERS = 8               # Ek saath kitne updates process hote hain (polling aur webhook dono)
+ACCOUNT_LOCK_SHARDS = 1024       # Per-account locks ke shards (do users ka ek shard share karna safe hai)
+
+# --- OUTGOING API THROTTLE ---
+THROTTLE_GLOBAL_RATE = 30        # Messages per second, sab chats milakar (Telegram ~30/s); worker mode mein workers mein bant jaata hai
+THROTTLE_GLOBAL_BURST = 30       # Ek saath itne messages bina ruke
+THROTTLE_GROUP_RATE = 20 / 60    # Ek group mein messages per second (Telegram: 20/min)
+THROTTLE_GROUP_BURST = 20        # Ek group mein ek saath itne messages
+THROTTLE_PRIVATE_RATE = 1        # Ek private chat mein messages per second
+THROTTLE_PRIVATE_BURST = 3       # Ek private chat mein ek saath itne messages
+THROTTLE_MAX_CHAT_WAIT = 5       # Chat limit ke liye isse zyada wait nahi (handler slot rukta hai); tab Telegram ka 429 decide karta hai.
+                                 # Handler replies ke 429 retries ka kul wait bhi isi tak, phir RetryAfter
+THROTTLE_MAX_RETRY_WAIT = 30     # DMs/broadcast: isse chhota RetryAfter chup-chaap wait karke retry; bada ho to caller ko RetryAfter milta hai
+THROTTLE_MAX_RETRIES = 3         # Ek call ke kitne automatic retries
+
+# --- FLOOD CONTROL ---
+# Buckets har process ki memory mein hain. Worker mode (WORKER_PROCESSES > 0) mein ek
+# chat hamesha ek worker mein hoti hai, isliye chat budget exact hai; par user ka
+# budget har worker mein alag hai -- jo user N workers ki chats mein commands bheje
+# use kul N guna FLOOD_USER_RATE/BURST tak milta hai (ek chat ke andar limit wahi).
+FLOOD_USER_RATE = 0.5            # Ek user ke commands per second (lambe waqt ka average)
+FLOOD_USER_BURST = 5             # Ek user ek saath itne commands tak bina ruke
+FLOOD_CHAT_RATE = 3              # Ek chat ke sab users milakar commands per second
+FLOOD_CHAT_BURST = 20            # Ek chat mein ek saath itne commands
+FLOOD_COMMAND_COSTS = {'toprich': 3, 'topkill': 3, 'history': 2, 'detail': 2, 'kill': 2, 'rob': 2, 'broadcast': 0, 'profile': 0}  # Baaki commands 1; 0 = limit nahi
+FLOOD_IDLE_SECONDS = 600         # Itni der idle bucket memory se hat jaata hai (tab tak woh full ho chuka hota hai)
+
+# --- MULTI-PROCESS WORKERS ---
+WORKER_PROCESSES = 0             # 0 = sab ek process mein; N = ek ingress process + N workers (updates chat_id se baante jaate hain)
+WORKER_WEB_PORT = 8081           # Worker i ka health/metrics server WORKER_WEB_PORT + i par (ingress WEB_PORT par)
+WORKER_OUTBOX_POLL = 2           # Worker mode mein doosre workers ke queue kiye DMs itne seconds mein uthte hain
+INGRESS_POLL_TIMEOUT = 30        # Ingress ka getUpdates long-poll timeout (seconds)
+
+# --- PROFILER (/profile) ---
+PROFILE_SAMPLE_INTERVAL = 0.005  # Stack sample kitne seconds par
+PROFILE_MAX_SECONDS = 300        # Ek profile window ki max length
+PROFILE_TOP_FUNCTIONS = 8        # Har handler ke kitne hot functions report mein
+
+# --- BALANCE HISTORY RETENTION ---
+HISTORY_RETENTION_DAYS = 30      # Itne din tak raw rows; usse purani daily totals ban jaati hain
+HISTORY_COMPACT_INTERVAL = 60 * 60  # Compaction pass kitne seconds par
+HISTORY_COMPACT_BATCH = 2000     # Ek transaction mein kitni rows roll up hoti hain
+HISTORY_COMPACT_PAUSE = 0.05     # Batches ke beech pause (seconds)
+HISTORY_VACUUM_PAGES = 1000      # Har pass ke baad kitne free pages file se wapas
+
+# --- DAILY RESET ---
+DAILY_RESET_HOUR = 0             # Local time ka ghanta jab naya din (daily, revive limit) shuru hota hai
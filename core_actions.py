@@ -0,0 +1,75 @@
+# core_actions.py
+# /start, /help, /id aur naye members ka welcome. /help ka text commands.py
+# ki registry se banta hai, isliye naya command wahan add karte hi yahan dikhta hai.
+
+from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+
+from async_db import add_group_to_db, log_name_change
+from commands import help_text
+from name_resolver import name_resolver
+
+# --- CORE COMMANDS ---
+
+# Placeholder command for unimplemented features
+async def placeholder_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text("🛠️ This feature is under construction! Come back later.", parse_mode=ParseMode.MARKDOWN)
+
+# /id command (FIXED logic)
+async def id_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    chat_id = update.effective_chat.id
+    reply_text = ""
+    
+    reply_text += f"👤 **Your User ID:** `{user.id}`\n"
+    
+    if update.message.reply_to_message:
+        replied_user = update.message.reply_to_message.from_user
+        reply_text += f"➡️ **Replied User ID:** `{replied_user.id}`\n"
+        
+    if update.effective_chat.type != 'private':
+        reply_text += f"🏠 **Chat ID:** `{chat_id}`"
+
+    await update.message.reply_text(reply_text, parse_mode=ParseMode.MARKDOWN)
+
+# /start command
+async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    chat = update.effective_chat
+    
+    if user:
+        name_resolver.remember(user.id, user.first_name, user.username)
+        # Log name and username history
+        await log_name_change(user.id, 'name', user.first_name)
+        if user.username:
+            await log_name_change(user.id, 'username', user.username)
+            
+    if chat.type == 'private':
+        bot_info = await context.bot.get_me()
+        bot_username = bot_info.username
+        
+        keyboard = [
+            [
+                InlineKeyboardButton("➕ Add Me To Your Group ➕", url=f"https://t.me/{bot_username}?startgroup=true")
+            ]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+
+        await update.message.reply_text(
+            f"Hello **{user.first_name}**! I am Mahiru Shiina All-Rounder Bot. Use /help to see commands, or add me to your group to manage it!",
+            reply_markup=reply_markup,
+            parse_mode=ParseMode.MARKDOWN
+        )
+        
+    elif update.message.new_chat_members:
+        new_members = ", ".join([m.first_name for m in update.message.new_chat_members])
+        adder_id = update.effective_user.id
+        await add_group_to_db(chat.id, adder_id)
+        await context.bot.send_message(
+            chat_id=chat.id, 
+            text=f"Welcome {new_members} to the group! Use /help to see what I can do."
+        )
+
+async def help_command(update: Update, context):
+    await update.message.reply_text(help_text(), parse_mode=ParseMode.MARKDOWN)
@@ -1,15 +1,169 @@
 # database.py
 
+import json
 import sqlite3
+import threading
 import time
+import uuid
+from contextlib import contextmanager
 
-from config import DB_NAME
+from config import (
+    USER_CACHE_SIZE, USER_CACHE_TTL, LEADERBOARD_SIZE,
+    HISTORY_RETENTION_DAYS, HISTORY_COMPACT_INTERVAL, HISTORY_COMPACT_BATCH, HISTORY_COMPACT_PAUSE,
+    HISTORY_VACUUM_PAGES, DAILY_RESET_HOUR
+)
+from history_compactor import HistoryCompactor
+from leaderboard import Leaderboard
+from metrics import DB_SECONDS, DB_ERRORS
+from migrations import apply_migrations
+from storage import MAIN_SHARD, make_backend
+from user_cache import UserCache
+from user_state import USER_COLUMNS, UserState
+
+# --- CONNECTION MANAGER ---
+# Har thread ka har shard ke liye apna ek long-lived connection hota hai (sqlite3
+# connections threads ke beech share nahi kiye jaate). Connection pehli baar use
+# hone par backend se khulta hai aur phir process ke end tak reuse hota hai.
+# Jo functions user_id nahi lete (groups, broadcasts, outbox) woh main shard par chalte hain.
+
+# storage.py ka backend (DB_BACKEND); tests/benchmark set_backend() se badal sakte hain
+backend = make_backend()
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+# _close_all() par badhta hai; doosre threads (async_db pool) ke cached connections isse pehchaane jaate hain
+_generation = 0
+# Commit aur uske on_commit callbacks ek saath chalte hain, taaki in-memory
+# structures (leaderboards) ko updates usi order mein milein jis order mein commit hue.
+# Har shard ka apna lock hai; ek user hamesha ek hi shard mein hota hai.
+_commit_locks = {}
+
+def _commit_lock(shard):
+    lock = _commit_locks.get(shard)
+    if lock is None:
+        lock = _commit_locks.setdefault(shard, threading.Lock())
+    return lock
+
+def _open_connection(shard):
+    return backend.connect(shard)
+
+def _shard(user_id):
+    return backend.shard_for(user_id)
+
+def get_connection(shard=MAIN_SHARD):
+    """Returns this thread's shared connection to shard, opening it on first use."""
+    conns = getattr(_local, "conns", None)
+    if conns is None or _local.generation != _generation:
+        # Pehli baar, ya _close_all() ke baad (is thread ke purane connections band ho chuke)
+        conns = _local.conns = {}
+        _local.generation = _generation
+    conn = conns.get(shard)
+    if conn is None:
+        conn = conns[shard] = _open_connection(shard)
+        with _connections_lock:
+            _connections.append(conn)
+    return conn
+
+@contextmanager
+def transaction(immediate=False, shard=MAIN_SHARD):
+    """Yields a cursor; commits on success and rolls back on any error.
+
+    With immediate=True the write lock is taken up front (BEGIN IMMEDIATE),
+    so reads done inside the transaction cannot go stale before the writes.
+    """
+    conn = get_connection(shard)
+    cursor = conn.cursor()
+    outer = getattr(_local, "on_commit", None)
+    _local.on_commit = []
+    start = time.perf_counter()
+    try:
+        if immediate:
+            cursor.execute("BEGIN IMMEDIATE")
+        yield cursor
+        with _commit_lock(shard):
+            conn.commit()
+            for callback in _local.on_commit:
+                callback()
+    except BaseException:
+        conn.rollback()
+        DB_ERRORS.inc('transaction')
+        raise
+    finally:
+        _local.on_commit = outer
+        cursor.close()
+        DB_SECONDS.observe(time.perf_counter() - start, 'transaction')
+
+def on_commit(callback):
+    """Registers callback to run once the current transaction has committed."""
+    _local.on_commit.append(callback)
+
+def _query(op, sql, params, fetch, shard):
+    start = time.perf_counter()
+    try:
+        cursor = get_connection(shard).execute(sql, params)
+        try:
+            return fetch(cursor)
+        finally:
+            cursor.close()
+    except BaseException:
+        DB_ERRORS.inc(op)
+        raise
+    finally:
+        DB_SECONDS.observe(time.perf_counter() - start, op)
+
+def query_one(sql, params=(), shard=MAIN_SHARD):
+    return _query('query_one', sql, params, lambda cursor: cursor.fetchone(), shard)
+
+def query_all(sql, params=(), shard=MAIN_SHARD):
+    return _query('query_all', sql, params, lambda cursor: cursor.fetchall(), shard)
+
+def _close_all():
+    global _generation
+    with _connections_lock:
+        _generation += 1
+        for conn in _connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _connections.clear()
+    _local.__dict__.clear()
+
+def close_connections():
+    """Closes every connection opened by the manager (call on shutdown)."""
+    history_compactor.close()
+    _close_all()
+    backend.close()
+
+def set_backend(new_backend):
+    """Switches to another storage backend (tests, benchmark); call before init_db()."""
+    global backend
+    _close_all()
+    backend.close()
+    backend = new_backend
 
 # --- DATABASE INITIALIZATION ---
 def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
+    _init_shard(MAIN_SHARD)
+    previous = _recorded_shards()
+    # Shard count ghata ho to purani files bhi khulni chahiye (unke users wapas laane hain)
+    for shard in range(1, max(previous, backend.shards)):
+        _init_shard(shard)
+    # Crash ki wajah se adhure reh gaye cross-shard writes pehle poore karo
+    recover_transfers(range(max(previous, backend.shards)))
+    if previous != backend.shards:
+        _rebalance_users(previous)
+    # Bot band tha jab din badla, to reset ab kar do
+    reset_daily_counters()
+
+def _init_shard(shard):
+    with transaction(shard=shard) as cursor:
+        _create_tables(cursor)
+    apply_migrations(get_connection(shard))
+    _enable_incremental_vacuum(shard)
+
+def _create_tables(cursor):
     # 1. Users Table (7 data columns + user_id)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -57,69 +211,156 @@ def init_db():
             claimed_ts REAL
         )
     """)
-    
-    conn.commit()
-    conn.close()
 
 # --- HELPER FUNCTIONS ---
 
+# Hot users ki rows memory se serve hoti hain; har write path inhe invalidate karta hai
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+# /toprich aur /topkill ke liye; har write apni nayi value commit ke baad yahan publish karta hai
+leaderboards = {field: Leaderboard(field, LEADERBOARD_SIZE) for field in ('balance', 'total_kills')}
+
+def disable_process_caches():
+    """Sends every user read and leaderboard to SQLite.
+
+    For running in several processes at once: another process's commits
+    cannot invalidate this one's cache or leaderboards.
+    """
+    user_cache.maxsize = 0
+    user_cache.clear()
+    leaderboards.clear()
+
+def _publish(user_id, fields):
+    for field, value in fields.items():
+        board = leaderboards.get(field)
+        if board is not None:
+            on_commit(lambda board=board, value=value: board.set(user_id, value))
+
+def _ensure_user(cursor, user_id):
+    cursor.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,))
+    if cursor.rowcount:
+        _publish(user_id, {'balance': 100, 'total_kills': 0})
+
+_USER_FIELDS = ', '.join(USER_COLUMNS)
+
 def get_user_data(user_id):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-    data = cursor.fetchone()
-    conn.close()
-    if data:
-        return data[1:] 
-    
-    set_user_data(user_id) 
-    return (100, 0.0, 0.0, 0, None, 0, 0.0)
+    """Returns the user's UserState, creating the row with defaults on first use."""
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    generation = user_cache.generation
+    shard = _shard(user_id)
+    row = query_one(f"SELECT {_USER_FIELDS} FROM users WHERE user_id = ?", (user_id,), shard)
+    if row is None:
+        # Naya user: ek hi statement row banata hai aur use wapas deta hai. Do threads
+        # ek saath aayein to conflict wala no-op update wahi row return karta hai
+        with transaction(shard=shard) as cursor:
+            cursor.execute(
+                f"INSERT INTO users (user_id) VALUES (?) ON CONFLICT (user_id) DO UPDATE SET user_id = excluded.user_id RETURNING {_USER_FIELDS}",
+                (user_id,)
+            )
+            row = cursor.fetchone()
+            _publish(user_id, {'balance': row[0], 'total_kills': row[5]})
+    state = UserState(*row)
+    user_cache.put(user_id, state, generation)
+    return state
 
 def set_user_data(user_id, **kwargs):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    fields = []
-    values = []
-    
-    for key, value in kwargs.items():
-        fields.append(f"{key} = ?")
-        values.append(value)
-    
-    if fields:
-        cursor.execute("SELECT user_id FROM users WHERE user_id = ?", (user_id,))
-        if cursor.fetchone():
-            query = f"UPDATE users SET {', '.join(fields)} WHERE user_id = ?"
-            values.append(user_id)
-            cursor.execute(query, values)
+    with transaction(shard=_shard(user_id)) as cursor:
+        if kwargs:
+            # Ek UPSERT: row nahi hai to defaults + kwargs ke saath banti hai, warna sirf kwargs badalte hain
+            cols = ', '.join(kwargs)
+            placeholders = ', '.join('?' * len(kwargs))
+            assignments = ', '.join(f"{key} = excluded.{key}" for key in kwargs)
+            cursor.execute(
+                f"INSERT INTO users (user_id, {cols}) VALUES (?, {placeholders}) "
+                f"ON CONFLICT (user_id) DO UPDATE SET {assignments} RETURNING balance, total_kills",
+                [user_id, *kwargs.values()]
+            )
+            balance, total_kills = cursor.fetchone()
+            _publish(user_id, {'balance': balance, 'total_kills': total_kills})
         else:
-            default_data = {
-                'balance': 100, 'death_ts': 0.0, 'protect_ts': 0.0, 
-                'revive_count': 0, 'revive_date': None, 'total_kills': 0, 
-                'daily_ts': 0.0
-            }
-            default_data.update(kwargs)
-            
-            cols = ', '.join(['user_id'] + list(default_data.keys()))
-            placeholders = ', '.join(['?'] * (len(default_data) + 1))
-            insert_values = [user_id] + list(default_data.values())
-            
-            query = f"INSERT INTO users ({cols}) VALUES ({placeholders})"
-            cursor.execute(query, insert_values)
-            
-    else:
-        cursor.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,))
-
-    conn.commit()
-    conn.close()
+            _ensure_user(cursor, user_id)
+    if kwargs:
+        user_cache.invalidate(user_id)
 
 def update_balance(user_id, amount):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,))
-    cursor.execute("UPDATE users SET balance = balance + ? WHERE user_id = ?", (amount, user_id))
-    conn.commit()
-    conn.close()
+    with transaction(shard=_shard(user_id)) as cursor:
+        _ensure_user(cursor, user_id)
+        cursor.execute("UPDATE users SET balance = balance + ? WHERE user_id = ? RETURNING balance", (amount, user_id))
+        _publish(user_id, {'balance': cursor.fetchone()[0]})
+    user_cache.invalidate(user_id)
+
+# --- DAILY RESET ---
+# Har bot-day (DAILY_RESET_HOUR se DAILY_RESET_HOUR tak) ke start par ek set-based UPDATE
+# sabke revive_count zero karta hai. Handlers sirf day_start() se compare karte hain.
+# Reset job late chale, miss ho jaye ya DST par ghanta aage-peeche fire ho, to bhi
+# boundary yahan local time se nikalti hai: day_start() turant naya din dikhata hai
+# aur revive_count padhne wale handlers pehle new_day_due() dekh kar reset chala lete hain.
+
+_day_start = 0.0
+_next_day_start = 0.0
+
+def day_start():
+    """Start (epoch) of the current bot day."""
+    now = time.time()
+    if now >= _next_day_start:
+        # Boundary nikal gaya par reset abhi hua nahi
+        return _bot_day_start(now)
+    return _day_start
+
+def new_day_due():
+    """True once the next bot day has begun but reset_daily_counters() has not run for it."""
+    return time.time() >= _next_day_start
+
+def _bot_day_start(now):
+    local = time.localtime(now)
+    start = time.mktime((local.tm_year, local.tm_mon, local.tm_mday, DAILY_RESET_HOUR, 0, 0, 0, 0, -1))
+    if start > now:
+        # Aaj ka boundary abhi aaya nahi; bot-day kal shuru hua tha (mktime day 0 ko normalize karta hai)
+        start = time.mktime((local.tm_year, local.tm_mon, local.tm_mday - 1, DAILY_RESET_HOUR, 0, 0, 0, 0, -1))
+    return start
+
+def reset_daily_counters():
+    """Starts the new bot day if its boundary has passed. Returns True if counters were reset.
+
+    The boundary is stored in bot_state, so the reset runs once per day even
+    when several processes (or a restart) call this.
+    """
+    global _day_start, _next_day_start
+    start = _bot_day_start(time.time())
+    reset = False
+    with transaction(immediate=True) as cursor:
+        cursor.execute("SELECT value FROM bot_state WHERE key = 'day_start'")
+        row = cursor.fetchone()
+        if row is None or row[0] < start:
+            # Baaki shards pehle; main shard ka boundary sabse aakhir mein commit hota hai,
+            # isliye beech mein crash ho to agla call reset dobara kar deta hai
+            for shard in range(1, backend.shards):
+                with transaction(shard=shard) as shard_cursor:
+                    shard_cursor.execute("UPDATE users SET revive_count = 0 WHERE revive_count != 0")
+            cursor.execute("UPDATE users SET revive_count = 0 WHERE revive_count != 0")
+            cursor.execute("INSERT OR REPLACE INTO bot_state (key, value) VALUES ('day_start', ?)", (start,))
+            reset = True
+        else:
+            start = row[0]
+    if reset:
+        user_cache.clear()
+    _day_start = start
+    # Agle bot-day ka start (36 ghante baad wala din; 23/25 ghante ke DST din bhi sahi)
+    _next_day_start = _bot_day_start(start + 36 * 3600)
+    return reset
+
+# --- BOT STATE (key/value, main shard) ---
+
+def get_bot_state(key, default=None):
+    row = query_one("SELECT value FROM bot_state WHERE key = ?", (key,))
+    return row[0] if row else default
+
+def set_bot_state(key, value):
+    with transaction() as cursor:
+        cursor.execute("INSERT OR REPLACE INTO bot_state (key, value) VALUES (?, ?)", (key, value))
 
 def is_protected(protect_ts):
     return protect_ts > time.time()
@@ -127,89 +368,602 @@ def is_protected(protect_ts):
 def is_dead(death_ts):
     return death_ts > time.time()
 
+def _all_shards_query(sql, params=()):
+    rows = []
+    for shard in range(backend.shards):
+        rows.extend(query_all(sql, params, shard))
+    return rows
+
+def _load_top_users(field, limit):
+    # Har shard ke top `limit` (idx_users_<field> index se), phir milakar
+    rows = _all_shards_query(f"SELECT user_id, {field} FROM users ORDER BY {field} DESC, user_id LIMIT ?", (limit,))
+    return sorted(rows, key=lambda row: (-row[1], row[0]))[:limit]
+
 def get_top_users(field, limit=10):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT user_id, {field} FROM users ORDER BY {field} DESC LIMIT ?", (limit,))
-    data = cursor.fetchall()
-    conn.close()
-    return data
+    board = leaderboards.get(field)
+    if board is None or limit > board.size:
+        return _load_top_users(field, limit)
+    if not board.seeded:
+        board.seed(lambda size: _load_top_users(field, size))
+    return board.top(limit)
 
 def add_group_to_db(chat_id, added_by):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT OR IGNORE INTO groups (chat_id, added_by, added_ts) VALUES (?, ?, ?)",
-        (chat_id, added_by, time.time())
-    )
-    conn.commit()
-    conn.close()
+    with transaction() as cursor:
+        cursor.execute(
+            "INSERT OR IGNORE INTO groups (chat_id, added_by, added_ts) VALUES (?, ?, ?)",
+            (chat_id, added_by, time.time())
+        )
+
+# --- MULTI-ACCOUNT WRITES (LEDGER, COMBAT, CLAIM) ---
+# Ek se zyada users ko chhoone wale writes _write_accounts se jaate hain: saare
+# involved shards ke write locks sorted order mein liye jaate hain (deadlock nahi
+# hota), users ki rows padhi jaati hain, decide() memory mein faisla karta hai,
+# aur uske effects sab shards par ek saath commit hote hain.
+#
+# Ek hi shard ho (file backend mein hamesha) to yeh ek normal transaction hai.
+# Kai shards hon to sabse chhota shard coordinator hai: baaki shards ke
+# statements ek shard_transfers journal row mein coordinator ke apne writes ke
+# saath commit hote hain -- yahi commit point hai. Har doosra shard apne
+# statements ke saath ek shard_transfers_applied marker commit karta hai. Commit
+# point ke baad crash ho jaaye to recover_transfers() (startup par) jin shards
+# par marker nahi hai unpar woh statements chala deta hai. Is tarah transfer ya
+# to har shard par hota hai ya kisi par nahi.
+
+# Rebalance mein ek cross-shard write kitne users move karta hai
+REBALANCE_BATCH = 100
+# Itne purane markers ki koi journal row nahi bachti
+TRANSFER_MARKER_TTL = 3600
+# Runtime recovery itne seconds par, aur sirf itni purani journal rows ke liye
+TRANSFER_RECOVER_INTERVAL = 30
+TRANSFER_RECOVER_AGE = 10
+
+class _Changes:
+    """Effects decided by a multi-account write.
+
+    entries are (user_id, type, amount, details) ledger rows whose amounts are
+    added to balances; updates sets columns and increments adds to them
+    ({user_id: {column: value}}). combat.CombatResult has the same shape.
+    """
+
+    __slots__ = ('entries', 'updates', 'increments')
+
+    def __init__(self, entries=(), updates=None, increments=None):
+        self.entries = list(entries)
+        self.updates = updates or {}
+        self.increments = increments or {}
+
+def _check_column(key):
+    if key not in USER_COLUMNS:
+        raise ValueError(f"Unknown users column: {key}")
+
+def _net_changes(entries):
+    net = {}
+    for user_id, _, amount, _ in entries:
+        net[user_id] = net.get(user_id, 0) + amount
+    return net
+
+def _load_users(cursor, user_ids):
+    """Returns {user_id: UserState} for user_ids, creating missing rows."""
+    placeholders = ', '.join('?' * len(user_ids))
+    cursor.execute(f"SELECT user_id, {_USER_FIELDS} FROM users WHERE user_id IN ({placeholders})", list(user_ids))
+    states = {row[0]: UserState(*row[1:]) for row in cursor.fetchall()}
+    for user_id in user_ids:
+        if user_id not in states:
+            cursor.execute(f"INSERT INTO users (user_id) VALUES (?) RETURNING {_USER_FIELDS}", (user_id,))
+            states[user_id] = UserState(*cursor.fetchone())
+            _publish(user_id, {'balance': states[user_id].balance, 'total_kills': states[user_id].total_kills})
+    return states
+
+def _plan_writes(states, changes, now, ensure_rows):
+    """Turns changes into {shard: [(sql, params)]} plus each user's new leaderboard values.
+
+    With ensure_rows every UPDATE is preceded by an INSERT OR IGNORE, so the
+    statements can be replayed by recovery even if the row's creation was lost.
+    """
+    net = _net_changes(changes.entries)
+    writes = {}
+    published = {}
+    for user_id in {*net, *changes.updates, *changes.increments}:
+        state = states[user_id]
+        assignments = []
+        values = []
+        new = {}
+        if net.get(user_id):
+            assignments.append("balance = balance + ?")
+            values.append(net[user_id])
+            new['balance'] = state.balance + net[user_id]
+        for key, amount in changes.increments.get(user_id, {}).items():
+            _check_column(key)
+            assignments.append(f"{key} = {key} + ?")
+            values.append(amount)
+            new[key] = getattr(state, key) + amount
+        for key, value in changes.updates.get(user_id, {}).items():
+            _check_column(key)
+            assignments.append(f"{key} = ?")
+            values.append(value)
+            new[key] = value
+        if not assignments:
+            continue
+        statements = writes.setdefault(_shard(user_id), [])
+        if ensure_rows:
+            statements.append(("INSERT OR IGNORE INTO users (user_id) VALUES (?)", [user_id]))
+        statements.append((f"UPDATE users SET {', '.join(assignments)} WHERE user_id = ?", [*values, user_id]))
+        published[user_id] = new
+    for user_id, type, amount, details in changes.entries:
+        writes.setdefault(_shard(user_id), []).append((
+            "INSERT INTO balance_history (user_id, timestamp, type, amount, details) VALUES (?, ?, ?, ?, ?)",
+            [user_id, now, type, amount, details]
+        ))
+    return writes, published
+
+@contextmanager
+def _shard_transactions(shards):
+    """Yields ({shard: conn}, {shard: cursor}) with BEGIN IMMEDIATE open on every
+    shard, taken in sorted order. Whatever is not committed is rolled back."""
+    conns = {shard: get_connection(shard) for shard in sorted(shards)}
+    cursors = {}
+    outer = getattr(_local, "on_commit", None)
+    _local.on_commit = []
+    start = time.perf_counter()
+    try:
+        for shard, conn in conns.items():
+            cursors[shard] = conn.cursor()
+            cursors[shard].execute("BEGIN IMMEDIATE")
+        yield conns, cursors
+    except BaseException:
+        DB_ERRORS.inc('transaction')
+        raise
+    finally:
+        for shard, conn in conns.items():
+            conn.rollback()
+        for cursor in cursors.values():
+            cursor.close()
+        _local.on_commit = outer
+        DB_SECONDS.observe(time.perf_counter() - start, 'transaction')
+
+def _commit_writes(conns, cursors, writes, now):
+    """Runs writes in the open transactions and commits every shard, all or nothing."""
+    shards = list(conns)
+    coordinator = shards[0]
+    transfer_id = uuid.uuid4().hex
+    redo = {}
+    for shard in shards:
+        statements = writes.get(shard, ())
+        for sql, params in statements:
+            cursors[shard].execute(sql, params)
+        if shard != coordinator and statements:
+            redo[shard] = statements
+            cursors[shard].execute("INSERT INTO shard_transfers_applied (id, applied_ts) VALUES (?, ?)", (transfer_id, now))
+    if redo:
+        cursors[coordinator].execute(
+            "INSERT INTO shard_transfers (id, writes, created_ts) VALUES (?, ?, ?)",
+            (transfer_id, json.dumps(redo), now)
+        )
+
+    locks = [_commit_lock(shard) for shard in shards]
+    for lock in locks:
+        lock.acquire()
+    try:
+        # Coordinator pehle: uska commit hi commit point hai
+        conns[coordinator].commit()
+        try:
+            for shard in shards[1:]:
+                conns[shard].commit()
+        except BaseException:
+            # Transfer ho chuka hai par kuch shards par recover_transfers() ke baad dikhega;
+            # tab tak memory wali copies par bharosa nahi, agli read DB se seed karegi
+            user_cache.clear()
+            for board in leaderboards.values():
+                board.reset()
+            raise
+        for callback in _local.on_commit:
+            callback()
+    finally:
+        for lock in reversed(locks):
+            lock.release()
+
+    if redo:
+        # Har shard commit ho gaya; journal row ki ab zaroorat nahi
+        with transaction(shard=coordinator) as cursor:
+            cursor.execute("DELETE FROM shard_transfers WHERE id = ?", (transfer_id,))
+
+def _write_accounts(user_ids, decide, extra_shards=()):
+    """Runs decide(cursors, states, now) under the write locks of every shard involved
+    and applies the changes it returns on all of them atomically.
+
+    states maps each of user_ids to its UserState (missing rows are created);
+    cursors maps shard -> cursor. decide may also write through
+    cursors[MAIN_SHARD] (pass MAIN_SHARD in extra_shards): the main shard is
+    always the coordinator, so those writes commit with the rest. If decide
+    returns None nothing is written. Returns what decide returned.
+    """
+    by_shard = {}
+    for user_id in dict.fromkeys(user_ids):
+        by_shard.setdefault(_shard(user_id), []).append(user_id)
+
+    with _shard_transactions({*by_shard, *extra_shards}) as (conns, cursors):
+        states = {}
+        for shard, shard_user_ids in by_shard.items():
+            states.update(_load_users(cursors[shard], shard_user_ids))
+        now = time.time()
+        changes = decide(cursors, states, now)
+        if changes is None:
+            return None
+        writes, published = _plan_writes(states, changes, now, ensure_rows=len(conns) > 1)
+        for user_id, fields in published.items():
+            _publish(user_id, fields)
+        _commit_writes(conns, cursors, writes, now)
+    if writes:
+        user_cache.invalidate(*states)
+    return changes
+
+def recover_transfers(shards, min_age=0.0):
+    """Finishes cross-shard writes that were interrupted after their commit point.
+
+    Runs on startup (every journal row) and from the housekeeping thread, where
+    min_age skips rows whose writer may simply not have cleaned up yet.
+    Replaying a transfer that did finish meanwhile is a no-op (applied markers).
+    """
+    for coordinator in shards:
+        for transfer_id, payload in query_all(
+            "SELECT id, writes FROM shard_transfers WHERE created_ts <= ?", (time.time() - min_age,), shard=coordinator
+        ):
+            for shard, statements in json.loads(payload).items():
+                with transaction(immediate=True, shard=int(shard)) as cursor:
+                    cursor.execute("SELECT 1 FROM shard_transfers_applied WHERE id = ?", (transfer_id,))
+                    if cursor.fetchone() is None:
+                        for sql, params in statements:
+                            cursor.execute(sql, params)
+                        cursor.execute("INSERT INTO shard_transfers_applied (id, applied_ts) VALUES (?, ?)", (transfer_id, time.time()))
+            with transaction(shard=coordinator) as cursor:
+                cursor.execute("DELETE FROM shard_transfers WHERE id = ?", (transfer_id,))
+            print(f"Recovered interrupted cross-shard write {transfer_id}")
+    # Marker sirf tab tak chahiye jab tak uski journal row hai
+    for shard in shards:
+        with transaction(shard=shard) as cursor:
+            cursor.execute("DELETE FROM shard_transfers_applied WHERE applied_ts < ?", (time.time() - TRANSFER_MARKER_TTL,))
+
+# --- LEDGER FUNCTIONS (ATOMIC BALANCE MOVES) ---
+
+def apply_ledger(entries, updates=None, increments=None, require=None):
+    """Moves money between accounts and records it in one commit.
+
+    entries: (user_id, type, amount, details) tuples; each becomes a
+    balance_history row and its amount is added to that user's balance.
+    updates: optional {user_id: {column: value}} written in the same
+    transaction (e.g. protect_ts for /protect); increments adds to columns
+    instead ({user_id: {column: amount}}).
+    require: optional require(states, now) checked under the write locks,
+    with states mapping every involved user_id to its current UserState.
+
+    Returns False without changing anything if require returns False or any
+    account whose net change is negative cannot cover it.
+    """
+    updates = updates or {}
+    increments = increments or {}
+    def decide(cursors, states, now):
+        # Handler ka pre-check kisi aur process ke commit se purana ho sakta hai; yahan rows locked hain
+        if require is not None and not require(states, now):
+            return None
+        # Balance check: jin accounts ka net change negative hai unke paas utna paisa hona chahiye
+        for user_id, change in _net_changes(entries).items():
+            if change < 0 and states[user_id].balance + change < 0:
+                return None
+        return _Changes(entries, updates, increments)
+    user_ids = [entry[0] for entry in entries] + list(updates) + list(increments)
+    return _write_accounts(user_ids, decide) is not None
+
+def claim_group(chat_id, user_id, reward):
+    """Claims an unclaimed group and pays the reward in one transaction.
+
+    Returns False if the group was already claimed.
+    """
+    def decide(cursors, states, now):
+        cursor = cursors[MAIN_SHARD]
+        cursor.execute("INSERT OR IGNORE INTO groups (chat_id, added_by, added_ts) VALUES (?, ?, ?)", (chat_id, user_id, now))
+        cursor.execute("UPDATE groups SET claimed_by_id = ?, claimed_ts = ? WHERE chat_id = ? AND claimed_by_id IS NULL",
+                       (user_id, now, chat_id))
+        if cursor.rowcount == 0:
+            return None
+        return _Changes([(user_id, 'group_claim', reward, str(chat_id))])
+    return _write_accounts([user_id], decide, extra_shards=(MAIN_SHARD,)) is not None
+
+# --- COMBAT (/kill, /rob) ---
+
+def resolve_combat(attacker_id, target_id, rules):
+    """Loads both players, lets rules decide, and applies the outcome in one transaction.
+
+    rules(attacker_id, target_id, attacker, target, now) gets both UserStates
+    and returns a combat.CombatResult; the rows cannot change in between
+    because the write locks are held from the start.
+    """
+    if attacker_id == target_id:
+        raise ValueError("attacker and target must be different users")
+    def decide(cursors, states, now):
+        return rules(attacker_id, target_id, states[attacker_id], states[target_id], now)
+    return _write_accounts((attacker_id, target_id), decide)
+
+# --- SHARD REBALANCE ---
+# DB_SHARDS (ya backend) badalne par startup par chalta hai: har user jo ab galat
+# shard mein hai, apni rows aur history ke saath naye shard mein jaata hai. Har
+# batch ek cross-shard write hai, isliye beech mein crash ho to bhi koi row do
+# baar nahi banti.
+
+def _recorded_shards():
+    row = query_one("SELECT value FROM bot_state WHERE key = 'shards'")
+    return row[0] if row else 1
+
+def _move_users(source, user_ids):
+    with _shard_transactions({source, *(_shard(user_id) for user_id in user_ids)}) as (conns, cursors):
+        cursor = cursors[source]
+        placeholders = ', '.join('?' * len(user_ids))
+        writes = {}
+        copies = (
+            (f"SELECT user_id, {_USER_FIELDS} FROM users", f"INSERT OR REPLACE INTO users (user_id, {_USER_FIELDS}) VALUES ({', '.join('?' * (len(USER_COLUMNS) + 1))})"),
+            ("SELECT user_id, type, value, timestamp FROM user_history", "INSERT INTO user_history (user_id, type, value, timestamp) VALUES (?, ?, ?, ?)"),
+            ("SELECT user_id, timestamp, type, amount, details FROM balance_history",
+             "INSERT INTO balance_history (user_id, timestamp, type, amount, details) VALUES (?, ?, ?, ?, ?)"),
+            ("SELECT user_id, day_ts, type, amount, count FROM balance_history_daily",
+             """INSERT INTO balance_history_daily (user_id, day_ts, type, amount, count) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, day_ts, type) DO UPDATE SET amount = amount + excluded.amount, count = count + excluded.count"""),
+        )
+        for select, insert in copies:
+            cursor.execute(f"{select} WHERE user_id IN ({placeholders})", user_ids)
+            for row in cursor.fetchall():
+                writes.setdefault(_shard(row[0]), []).append((insert, list(row)))
+        for table in ('users', 'user_history', 'balance_history', 'balance_history_daily'):
+            writes.setdefault(source, []).append((f"DELETE FROM {table} WHERE user_id IN ({placeholders})", list(user_ids)))
+        _commit_writes(conns, cursors, writes, time.time())
+
+def _rebalance_users(previous):
+    """Moves users to their shard after the shard count changed from previous."""
+    moved = 0
+    for source in range(previous):
+        user_ids = [row[0] for row in query_all(
+            """SELECT user_id FROM users UNION SELECT user_id FROM user_history
+               UNION SELECT user_id FROM balance_history UNION SELECT user_id FROM balance_history_daily""",
+            shard=source
+        )]
+        user_ids = [user_id for user_id in user_ids if user_id is not None and _shard(user_id) != source]
+        for i in range(0, len(user_ids), REBALANCE_BATCH):
+            _move_users(source, user_ids[i:i + REBALANCE_BATCH])
+        moved += len(user_ids)
+    with transaction() as cursor:
+        cursor.execute("INSERT OR REPLACE INTO bot_state (key, value) VALUES ('shards', ?)", (backend.shards,))
+    user_cache.clear()
+    for board in leaderboards.values():
+        board.reset()
+    print(f"Rebalanced {moved} users from {previous} to {backend.shards} shard(s)")
 
 # --- NAME/USERNAME HISTORY FUNCTIONS ---
 
 def log_name_change(user_id, type, new_value):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT value FROM user_history WHERE user_id = ? AND type = ? ORDER BY timestamp DESC LIMIT 1", (user_id, type))
-    last_value = cursor.fetchone()
+    shard = _shard(user_id)
+    last_value = query_one("SELECT value FROM user_history WHERE user_id = ? AND type = ? ORDER BY timestamp DESC LIMIT 1", (user_id, type), shard)
     if last_value is None or last_value[0] != new_value:
-        cursor.execute("INSERT INTO user_history (user_id, type, value, timestamp) VALUES (?, ?, ?, ?)", (user_id, type, new_value, time.time()))
-        conn.commit()
-    conn.close()
+        with transaction(shard=shard) as cursor:
+            cursor.execute("INSERT INTO user_history (user_id, type, value, timestamp) VALUES (?, ?, ?, ?)", (user_id, type, new_value, time.time()))
 
 def get_user_history(user_id):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT type, value, timestamp FROM user_history WHERE user_id = ? ORDER BY timestamp DESC", (user_id,))
-    history = cursor.fetchall()
-    conn.close()
-    return history
+    return query_all("SELECT type, value, timestamp FROM user_history WHERE user_id = ? ORDER BY timestamp DESC", (user_id,), _shard(user_id))
 
-# --- BALANCE HISTORY FUNCTIONS ---
+def get_latest_names(user_ids):
+    """Returns {user_id: (first_name, username, timestamp)} from each user's newest history rows."""
+    by_shard = {}
+    for user_id in user_ids:
+        by_shard.setdefault(_shard(user_id), []).append(user_id)
+    rows = []
+    for shard, shard_user_ids in by_shard.items():
+        placeholders = ', '.join('?' * len(shard_user_ids))
+        # SQLite: MAX() ke saath bare column (value) usi row se aata hai jiska timestamp max hai
+        rows.extend(query_all(
+            f"SELECT user_id, type, value, MAX(timestamp) FROM user_history WHERE user_id IN ({placeholders}) GROUP BY user_id, type",
+            shard_user_ids, shard
+        ))
+    latest = {}
+    for user_id, type, value, timestamp in rows:
+        latest.setdefault(user_id, {})[type] = (value, timestamp)
+    return {
+        user_id: (values['name'][0], values.get('username', (None,))[0], values['name'][1])
+        for user_id, values in latest.items() if 'name' in values
+    }
 
-def log_balance_change(user_id, type, amount, details=""):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO balance_history (user_id, timestamp, type, amount, details) VALUES (?, ?, ?, ?, ?)", (user_id, time.time(), type, amount, details))
-    conn.commit()
-    conn.close()
+# --- BALANCE HISTORY FUNCTIONS ---
+# balance_history rows ka koi alag writer/queue nahi hai: har row apne balance
+# change ke saath apply_ledger ke usi transaction (usi commit) mein likhi jaati
+# hai. Pehle (write-behind writer ke zamane mein) har audit row ka apna commit
+# tha; ab ek command = ek commit, history ke liye extra fsync zero hai, aur crash
+# mein balance aur uski history kabhi alag nahi hote -- queue mein padi rows ke
+# khone ka risk bhi nahi. Commit latency bot_db_query_duration_seconds{op="transaction"} mein dikhti hai.
 
 def get_balance_history(user_id, limit=15):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT timestamp, type, amount, details FROM balance_history WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?", (user_id, limit))
-    history = cursor.fetchall()
-    conn.close()
-    return history
+    """Newest (timestamp, type, amount, details) rows: raw rows, then daily totals for compacted days."""
+    return query_all(
+        """SELECT timestamp, type, amount, details FROM (
+               SELECT timestamp, type, amount, details FROM balance_history WHERE user_id = ?
+               UNION ALL
+               SELECT day_ts, type, amount, count || ' transactions (daily total)' FROM balance_history_daily WHERE user_id = ?
+           ) ORDER BY timestamp DESC LIMIT ?""",
+        (user_id, user_id, limit), _shard(user_id)
+    )
+
+# --- BALANCE HISTORY COMPACTION ---
+
+def _local_midnight(timestamp):
+    local = time.localtime(timestamp)
+    return time.mktime((local.tm_year, local.tm_mon, local.tm_mday, 0, 0, 0, 0, 0, -1))
+
+def _compact_history_batch(cutoff):
+    """Rolls up one batch per shard of rows older than cutoff into balance_history_daily."""
+    return sum(_compact_shard_batch(shard, cutoff) for shard in range(backend.shards))
+
+def _compact_shard_batch(shard, cutoff):
+    with transaction(immediate=True, shard=shard) as cursor:
+        # Purani rows table ki shuruaat mein hoti hain, isliye id order scan jaldi ruk jaata hai
+        cursor.execute(
+            "SELECT id, user_id, timestamp, type, amount FROM balance_history WHERE timestamp < ? ORDER BY id LIMIT ?",
+            (cutoff, HISTORY_COMPACT_BATCH)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+        totals = {}
+        for _, user_id, timestamp, type, amount in rows:
+            key = (user_id, _local_midnight(timestamp), type)
+            total = totals.setdefault(key, [0, 0])
+            total[0] += amount
+            total[1] += 1
+        cursor.executemany(
+            """INSERT INTO balance_history_daily (user_id, day_ts, type, amount, count) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (user_id, day_ts, type) DO UPDATE SET amount = amount + excluded.amount, count = count + excluded.count""",
+            [(*key, amount, count) for key, (amount, count) in totals.items()]
+        )
+        cursor.executemany("DELETE FROM balance_history WHERE id = ?", [(row[0],) for row in rows])
+    return len(rows)
+
+def _enable_incremental_vacuum(shard):
+    """One-time switch of a pre-existing file to auto_vacuum=INCREMENTAL.
+
+    storage._connect sets it for new files only; an older file stays at NONE
+    (and never shrinks) until a full VACUUM rebuilds it with the new mode.
+    """
+    conn = get_connection(shard)
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 0:
+        return
+    print(f"Shard {shard}: enabling incremental auto-vacuum (one-time VACUUM, may take a while)...")
+    start = time.perf_counter()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    print(f"Shard {shard}: incremental auto-vacuum enabled in {time.perf_counter() - start:.1f}s")
+
+def _reclaim_history_space():
+    for shard in range(backend.shards):
+        # executescript: execute() PRAGMA ko sirf ek step chalata hai, yani har pass mein bas ek page free hota
+        get_connection(shard).executescript(f"PRAGMA incremental_vacuum({int(HISTORY_VACUUM_PAGES)});")
+
+def _housekeep():
+    # Runtime par kisi shard ka commit fail hua ho to woh restart ka intezaar kiye bina poora ho,
+    # aur applied markers bhi yahin prune hote hain
+    recover_transfers(range(backend.shards), min_age=TRANSFER_RECOVER_AGE)
+
+# Retention window se purani balance_history rows ko daily totals mein badalta hai, aur
+# cross-shard journal ko chhote intervals par saaf rakhta hai (main.py start karta hai)
+history_compactor = HistoryCompactor(
+    _compact_history_batch, _reclaim_history_space,
+    HISTORY_RETENTION_DAYS * 86400, HISTORY_COMPACT_INTERVAL, HISTORY_COMPACT_PAUSE,
+    housekeep=_housekeep, housekeep_interval=TRANSFER_RECOVER_INTERVAL
+)
     
 # --- GROUP CLAIM FUNCTIONS (NEW) ---
 
 def get_group_claim_data(chat_id):
     """Fetches the user ID and timestamp of the group claim."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute("SELECT claimed_by_id, claimed_ts FROM groups WHERE chat_id = ?", (chat_id,))
-        data = cursor.fetchone()
+        data = query_one("SELECT claimed_by_id, claimed_ts FROM groups WHERE chat_id = ?", (chat_id,))
     except sqlite3.OperationalError:
-        conn.close()
         return None, None 
 
-    conn.close()
     if data and data[0] is not None: 
         return data[0], data[1]
     return None, None 
 
 def set_group_claim_data(chat_id, user_id, timestamp):
     """Sets the user ID and timestamp for the group claim."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute("INSERT OR IGNORE INTO groups (chat_id, added_by, added_ts) VALUES (?, ?, ?)", 
-                   (chat_id, user_id, time.time()))
-    
-    cursor.execute("UPDATE groups SET claimed_by_id = ?, claimed_ts = ? WHERE chat_id = ?", 
-                   (user_id, timestamp, chat_id))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    with transaction() as cursor:
+        cursor.execute("INSERT OR IGNORE INTO groups (chat_id, added_by, added_ts) VALUES (?, ?, ?)", 
+                       (chat_id, user_id, time.time()))
+        
+        cursor.execute("UPDATE groups SET claimed_by_id = ?, claimed_ts = ? WHERE chat_id = ?", 
+                       (user_id, timestamp, chat_id))
+
+# --- BROADCAST FUNCTIONS ---
+
+def create_broadcast(text=None, from_chat_id=None, message_id=None):
+    with transaction() as cursor:
+        cursor.execute(
+            "INSERT INTO broadcasts (text, from_chat_id, message_id, status, started_ts) VALUES (?, ?, ?, 'running', ?)",
+            (text, from_chat_id, message_id, time.time())
+        )
+        return cursor.lastrowid
+
+def get_broadcast(broadcast_id=None):
+    """Returns (id, text, from_chat_id, message_id, status, started_ts, finished_ts,
+    sent, failed, pruned) for broadcast_id, or for the newest broadcast."""
+    columns = "id, text, from_chat_id, message_id, status, started_ts, finished_ts, sent, failed, pruned"
+    if broadcast_id is None:
+        return query_one(f"SELECT {columns} FROM broadcasts ORDER BY id DESC LIMIT 1")
+    return query_one(f"SELECT {columns} FROM broadcasts WHERE id = ?", (broadcast_id,))
+
+def get_broadcast_targets(broadcast_id, after_chat_id, limit):
+    """Next page of group chat ids (ordered, keyset) this broadcast has not delivered to yet."""
+    return [row[0] for row in query_all(
+        """SELECT chat_id FROM groups g WHERE chat_id > ?
+           AND NOT EXISTS (SELECT 1 FROM broadcast_deliveries d WHERE d.broadcast_id = ? AND d.chat_id = g.chat_id)
+           ORDER BY chat_id LIMIT ?""",
+        (after_chat_id, broadcast_id, limit)
+    )]
+
+def record_broadcast_results(broadcast_id, results):
+    """Saves one page of (chat_id, status, sent_to_chat_id) results.
+
+    Chats that rejected the bot ('pruned') are removed from groups; a group
+    that migrated to a supergroup is moved to its new chat id.
+    """
+    counts = {'sent': 0, 'failed': 0, 'pruned': 0}
+    deliveries = []
+    with transaction() as cursor:
+        for chat_id, status, sent_to in results:
+            counts[status] += 1
+            deliveries.append((broadcast_id, chat_id, status))
+            if status == 'pruned':
+                cursor.execute("DELETE FROM groups WHERE chat_id = ?", (sent_to,))
+            elif sent_to != chat_id:
+                cursor.execute("UPDATE OR IGNORE groups SET chat_id = ? WHERE chat_id = ?", (sent_to, chat_id))
+                deliveries.append((broadcast_id, sent_to, status))
+        cursor.executemany("INSERT OR REPLACE INTO broadcast_deliveries (broadcast_id, chat_id, status) VALUES (?, ?, ?)", deliveries)
+        cursor.execute(
+            "UPDATE broadcasts SET sent = sent + ?, failed = failed + ?, pruned = pruned + ? WHERE id = ?",
+            (counts['sent'], counts['failed'], counts['pruned'], broadcast_id)
+        )
+
+def finish_broadcast(broadcast_id, status='done'):
+    with transaction() as cursor:
+        cursor.execute("UPDATE broadcasts SET status = ?, finished_ts = ? WHERE id = ? AND status = 'running'",
+                       (status, time.time(), broadcast_id))
+
+# --- NOTIFICATION OUTBOX FUNCTIONS ---
+
+def enqueue_notification(chat_id, kind, text, delay=0.0):
+    """Queues a DM. With a delay, it joins the same chat/kind row already waiting
+    (same due time), so the worker can send them together as one digest."""
+    now = time.time()
+    with transaction() as cursor:
+        due = now + delay
+        if delay:
+            cursor.execute("SELECT MIN(next_attempt_ts) FROM outbox WHERE chat_id = ? AND kind = ? AND attempts = 0", (chat_id, kind))
+            due = cursor.fetchone()[0] or due
+        cursor.execute(
+            "INSERT INTO outbox (chat_id, kind, text, created_ts, next_attempt_ts) VALUES (?, ?, ?, ?, ?)",
+            (chat_id, kind, text, now, due)
+        )
+
+def get_due_notifications(limit):
+    """Returns (id, chat_id, kind, text, attempts) rows that are due now, oldest first."""
+    return query_all(
+        "SELECT id, chat_id, kind, text, attempts FROM outbox WHERE next_attempt_ts <= ? ORDER BY next_attempt_ts, id LIMIT ?",
+        (time.time(), limit)
+    )
+
+def get_next_notification_ts():
+    return query_one("SELECT MIN(next_attempt_ts) FROM outbox")[0]
+
+def delete_notifications(ids):
+    with transaction() as cursor:
+        cursor.executemany("DELETE FROM outbox WHERE id = ?", [(id,) for id in ids])
+
+def reschedule_notifications(ids, next_attempt_ts):
+    with transaction() as cursor:
+        cursor.executemany(
+            "UPDATE outbox SET attempts = attempts + 1, next_attempt_ts = ? WHERE id = ?",
+            [(next_attempt_ts, id) for id in ids]
+        )
@@ -4,19 +4,22 @@ from telegram.ext import ContextTypes
 from telegram import Update
 import time
 import math
-import random
 from telegram.constants import ParseMode 
 
-from database import (
-    get_user_data, set_user_data, update_balance, is_protected, is_dead, 
-    get_top_users, get_group_claim_data, set_group_claim_data, 
-    log_balance_change, get_balance_history
+from async_db import (
+    get_user_data, is_protected, is_dead, day_start, new_day_due, reset_daily_counters,
+    get_top_users, get_group_claim_data, apply_ledger, claim_group, resolve_combat,
+    get_balance_history
 )
 from config import (
     TAX_RATE, ROB_PENALTY_COST, PROTECT_COST, REVIVE_COST, DAILY_REWARD, 
     DEATH_DURATION_SECONDS, PROTECT_DURATION_SECONDS, MIN_KILL_REWARD, MAX_KILL_REWARD, 
     REVIVE_LIMIT_DAILY, BOT_OWNER_ID, GROUP_CLAIM_REWARD
 )
+from account_locks import locks_accounts
+import combat
+from name_resolver import name_resolver
+from outbox import outbox
 
 # --- HELPER FUNCTION (NEW for consistent name display) ---
 def get_user_mention(user):
@@ -27,35 +30,59 @@ def get_user_mention(user):
     # Otherwise, use a mention link with first_name as the text
     return f"[{user.first_name}](tg://user?id={user.id})"
 
+def format_leaderboard_name(user_id, name):
+    """Formats a resolved (first_name, username) for leaderboard lines."""
+    if name is None:
+        return f"Unknown User (`{user_id}`)"
+    first_name, username = name
+    display_name = f"[{first_name}](tg://user?id={user_id})"
+    if username:
+        display_name += f" (@{username})"
+    return display_name
+
+async def get_claimant_name(context, claimed_by_id):
+    names = await name_resolver.resolve(context.bot, [claimed_by_id])
+    name = names[claimed_by_id]
+    if name is None:
+        return f"User ID: `{claimed_by_id}`"
+    return f"[{name[0]}](tg://user?id={claimed_by_id})"
+
 # --- ECONOMY COMMANDS ---
+# Jo commands balance/state padh kar check karti hain aur phir likhti hain, woh
+# @locks_accounts() ke saath chalti hain: updates concurrently process hote hain,
+# par ek hi account ke do commands (e.g. do /give) ek saath nahi chal sakte.
 
 async def bal_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     target = update.effective_user
     if update.message.reply_to_message:
         target = update.message.reply_to_message.from_user
         
-    balance, _, _, _, _, _, _ = get_user_data(target.id) 
+    balance = (await get_user_data(target.id)).balance
     target_name = get_user_mention(target)
     
     await update.message.reply_text(f"💰 **{target_name}** ka current balance: **${balance}**", parse_mode=ParseMode.MARKDOWN)
 
+@locks_accounts()
 async def daily_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    balance, _, _, _, _, _, daily_ts = get_user_data(user_id) 
-    
-    current_day = time.strftime('%Y-%m-%d')
-    last_claim_day = time.strftime('%Y-%m-%d', time.localtime(daily_ts))
+    state = await get_user_data(user_id)
 
-    if last_claim_day == current_day:
+    if state.daily_ts >= day_start():
         await update.message.reply_text("❌ Aapne aaj ka daily reward pehle hi claim kar liya hai. Kal aana!", parse_mode=ParseMode.MARKDOWN)
         return
 
-    update_balance(user_id, DAILY_REWARD)
-    log_balance_change(user_id, 'daily', DAILY_REWARD) 
-    set_user_data(user_id, daily_ts=time.time())
+    # Dusre worker process mein usi user ka /daily isi beech commit ho sakta hai; check lock ke andar dobara
+    claimed = await apply_ledger(
+        [(user_id, 'daily', DAILY_REWARD, "")], updates={user_id: {'daily_ts': time.time()}},
+        require=lambda states, now: states[user_id].daily_ts < day_start()
+    )
+    if not claimed:
+        await update.message.reply_text("❌ Aapne aaj ka daily reward pehle hi claim kar liya hai. Kal aana!", parse_mode=ParseMode.MARKDOWN)
+        return
     
     await update.message.reply_text(f"✅ Daily reward claimed! You got **${DAILY_REWARD}**", parse_mode=ParseMode.MARKDOWN)
 
+@locks_accounts()
 async def give_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not update.message.reply_to_message or not context.args or not context.args[0].isdigit():
         return await update.message.reply_text("❓ Usage: `/give [amount]` and reply to the user.")
@@ -68,9 +95,6 @@ async def give_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if sender_id == receiver_id: return await update.message.reply_text("❌ You cannot send money to yourself.")
     if amount <= 0: return await update.message.reply_text("❌ Amount must be greater than zero.")
 
-    sender_balance, _, _, _, _, _, _ = get_user_data(sender_id) 
-    if sender_balance < amount: return await update.message.reply_text("❌ You do not have sufficient funds.")
-
     tax = math.ceil(amount * TAX_RATE)
     transfer_amount = amount - tax
     tax_percentage = int(TAX_RATE * 100)
@@ -78,12 +102,13 @@ async def give_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     receiver_display_name = get_user_mention(receiver)
     sender_name = get_user_mention(update.effective_user)
 
-    update_balance(sender_id, -amount)
-    log_balance_change(sender_id, 'give_out', -amount, details=receiver.first_name)
-    update_balance(receiver_id, transfer_amount)
-    log_balance_change(receiver_id, 'give_in', transfer_amount, details=update.effective_user.first_name)
-    update_balance(BOT_OWNER_ID, tax)
-    log_balance_change(BOT_OWNER_ID, 'tax', tax, details=update.effective_user.first_name)
+    # Sender, receiver aur tax teeno ek hi transaction mein (balance check ke saath)
+    transferred = await apply_ledger([
+        (sender_id, 'give_out', -amount, receiver.first_name),
+        (receiver_id, 'give_in', transfer_amount, update.effective_user.first_name),
+        (BOT_OWNER_ID, 'tax', tax, update.effective_user.first_name),
+    ])
+    if not transferred: return await update.message.reply_text("❌ You do not have sufficient funds.")
 
     notification_message = (
         f"💸 **Commission Received!** 💸\n"
@@ -91,10 +116,7 @@ async def give_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"💰 Amount: **${tax}** (from ${amount} transaction)\n"
         f"🔄 Type: `/give` Tax"
     )
-    try:
-        await context.bot.send_message(chat_id=BOT_OWNER_ID, text=notification_message, parse_mode=ParseMode.MARKDOWN)
-    except Exception as e:
-        print(f"Error sending commission notification to owner: {e}")
+    await outbox.notify(BOT_OWNER_ID, 'tax', notification_message)
         
     await update.message.reply_text(
         f"✅ You gave **${amount}** to **{receiver_display_name}**\n"
@@ -104,33 +126,47 @@ async def give_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # --- RPG COMMANDS ---
 
+async def _reply_already_protected(update, protect_ts):
+    remaining = int(protect_ts - time.time())
+    d = remaining // 86400
+    h = (remaining % 86400) // 3600
+    m = (remaining % 3600) // 60
+    return await update.message.reply_text(
+        f"🛡️ You are already protected!\n"
+        f"⏳ Remaining: **{d}d {h}h {m}m**", parse_mode=ParseMode.MARKDOWN
+    )
+
+@locks_accounts()
 async def protect_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    balance, _, protect_ts, _, _, _, _ = get_user_data(user_id) 
+    state = await get_user_data(user_id)
     
-    if is_protected(protect_ts):
-        remaining = int(protect_ts - time.time())
-        d = remaining // 86400
-        h = (remaining % 86400) // 3600
-        m = (remaining % 3600) // 60
-        return await update.message.reply_text(
-            f"🛡️ You are already protected!\n"
-            f"⏳ Remaining: **{d}d {h}h {m}m**", parse_mode=ParseMode.MARKDOWN
-        )
+    if is_protected(state.protect_ts):
+        return await _reply_already_protected(update, state.protect_ts)
     
-    if balance < PROTECT_COST:
+    if state.balance < PROTECT_COST:
         return await update.message.reply_text(f"❌ Protection needs **${PROTECT_COST}**.", parse_mode=ParseMode.MARKDOWN)
 
     new_protect_ts = time.time() + PROTECT_DURATION_SECONDS
-    update_balance(user_id, -PROTECT_COST)
-    log_balance_change(user_id, 'protect_cost', -PROTECT_COST) 
-    set_user_data(user_id, protect_ts=new_protect_ts) 
+    bought = await apply_ledger(
+        [(user_id, 'protect_cost', -PROTECT_COST, "")], updates={user_id: {'protect_ts': new_protect_ts}},
+        require=lambda states, now: states[user_id].protect_ts <= now
+    )
+    if not bought:
+        # Kisi aur worker ne beech mein protection khareed li ho to wahi batao
+        state = await get_user_data(user_id)
+        if is_protected(state.protect_ts):
+            return await _reply_already_protected(update, state.protect_ts)
+        return await update.message.reply_text(f"❌ Protection needs **${PROTECT_COST}**.", parse_mode=ParseMode.MARKDOWN)
     
     await update.message.reply_text(
         f"✅ Protection bought! **${PROTECT_COST}** deducted.\n"
         "🛡️ You are safe from `/kill` and `/rob` for the next **24 hours**.", parse_mode=ParseMode.MARKDOWN
     )
 
+# /kill aur /rob: rules combat.py mein, saare effects resolve_combat ke ek transaction mein
+
+@locks_accounts()
 async def rob_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not update.message.reply_to_message or not context.args or not context.args[0].isdigit():
         return await update.message.reply_text("❓ Usage: `/rob [amount]` and reply to the user.")
@@ -141,54 +177,41 @@ async def rob_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     target_id = target.id
     amount = int(context.args[0])
     
-    killer_data = get_user_data(killer_id)
-    target_data = get_user_data(target_id)
-    killer_balance, killer_death_ts, _, _, _, _, _ = killer_data 
-    target_balance, target_death_ts, target_protect_ts, _, _, _, _ = target_data 
-    
     killer_name = get_user_mention(killer)
     target_name = get_user_mention(target)
 
     if killer_id == target_id: return await update.message.reply_text("❌ Robbing yourself is pointless.")
-    if is_dead(killer_death_ts): return await update.message.reply_text("💀 Dead users cannot rob!", parse_mode=ParseMode.MARKDOWN)
-    
-    if is_protected(target_protect_ts): return await update.message.reply_text(f"🛡️ **{target_name}** is protected right now!", parse_mode=ParseMode.MARKDOWN)
-    
-    if is_dead(target_death_ts): return await update.message.reply_text(f"⚰️ **{target_name}** is already dead.")
-    if target_balance < amount: return await update.message.reply_text(f"❌ **{target_name}** doesn't have **${amount}** to rob.")
 
-    if random.random() < 0.5:
-        # SUCCESS!
-        earned_amount = amount
-        update_balance(killer_id, earned_amount)
-        update_balance(target_id, -earned_amount)
-        log_balance_change(killer_id, 'rob_gain', earned_amount, details=target.first_name)
-        log_balance_change(target_id, 'rob_loss', -earned_amount, details=killer.first_name)
+    result = await resolve_combat(killer_id, target_id, combat.rob_rules(amount, ROB_PENALTY_COST, killer.first_name, target.first_name))
 
+    if result.outcome == combat.ATTACKER_DEAD:
+        return await update.message.reply_text("💀 Dead users cannot rob!", parse_mode=ParseMode.MARKDOWN)
+    if result.outcome == combat.TARGET_PROTECTED:
+        return await update.message.reply_text(f"🛡️ **{target_name}** is protected right now!", parse_mode=ParseMode.MARKDOWN)
+    if result.outcome == combat.TARGET_DEAD:
+        return await update.message.reply_text(f"⚰️ **{target_name}** is already dead.")
+    if result.outcome == combat.TARGET_TOO_POOR:
+        return await update.message.reply_text(f"❌ **{target_name}** doesn't have **${amount}** to rob.")
+
+    if result.outcome == combat.ROBBED:
         notification_message = (
             f"🚨 **You were ROBBED!** 🚨\n"
             f"👤 Robber: **{killer_name}**\n"
-            f"💸 Loss: **${earned_amount}**" 
+            f"💸 Loss: **${result.amount}**" 
         )
-        try:
-            await context.bot.send_message(chat_id=target_id, text=notification_message, parse_mode=ParseMode.MARKDOWN)
-        except Exception as e:
-            print(f"Error sending rob notification to target {target_id}: {e}")
+        await outbox.notify(target_id, 'rob', notification_message)
         
         await update.message.reply_text(
-            f"💸 **{killer_name}** successfully robbed **${earned_amount}** from **{target_name}**!", parse_mode=ParseMode.MARKDOWN
+            f"💸 **{killer_name}** successfully robbed **${result.amount}** from **{target_name}**!", parse_mode=ParseMode.MARKDOWN
+        )
+    elif result.outcome == combat.ROB_FAILED:
+        await update.message.reply_text(
+            f"🚨 **{killer_name}**, your robbery failed! A **${result.amount}** penalty has been deducted!", parse_mode=ParseMode.MARKDOWN
         )
     else:
-        # FAILURE! Penalty for killer
-        if killer_balance >= ROB_PENALTY_COST:
-            update_balance(killer_id, -ROB_PENALTY_COST)
-            log_balance_change(killer_id, 'rob_loss', -ROB_PENALTY_COST, details="Failed Robbery")
-            await update.message.reply_text(
-                f"🚨 **{killer_name}**, your robbery failed! A **${ROB_PENALTY_COST}** penalty has been deducted!", parse_mode=ParseMode.MARKDOWN
-            )
-        else:
-            await update.message.reply_text(f"🚨 **{killer_name}**, your robbery failed! You were lucky to escape the penalty.")
+        await update.message.reply_text(f"🚨 **{killer_name}**, your robbery failed! You were lucky to escape the penalty.")
 
+@locks_accounts()
 async def kill_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not update.message.reply_to_message: return await update.message.reply_text("❓ Usage: `/kill` and reply to the target user.")
     killer = update.effective_user
@@ -196,48 +219,34 @@ async def kill_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     killer_id = killer.id
     target_id = target.id
     
-    killer_data = get_user_data(killer_id)
-    target_data = get_user_data(target_id)
-    
-    _, killer_death_ts, _, _, _, _, _ = killer_data 
-    _, target_death_ts, target_protect_ts, _, _, target_total_kills, _ = target_data 
-    
     killer_name = get_user_mention(killer)
     target_name = get_user_mention(target)
 
     if killer_id == target_id: return await update.message.reply_text("❌ Suicide is not allowed.")
-    if is_dead(killer_death_ts): return await update.message.reply_text("💀 Dead users cannot kill anyone!", parse_mode=ParseMode.MARKDOWN) 
-    
-    if is_protected(target_protect_ts): return await update.message.reply_text(f"🛡️ **{target_name}** is protected right now!", parse_mode=ParseMode.MARKDOWN)
-    
-    if is_dead(target_death_ts): return await update.message.reply_text(f"⚰️ **{target_name}** is already dead.")
+
+    result = await resolve_combat(killer_id, target_id, combat.kill_rules(MIN_KILL_REWARD, MAX_KILL_REWARD, DEATH_DURATION_SECONDS))
+
+    if result.outcome == combat.ATTACKER_DEAD:
+        return await update.message.reply_text("💀 Dead users cannot kill anyone!", parse_mode=ParseMode.MARKDOWN)
+    if result.outcome == combat.TARGET_PROTECTED:
+        return await update.message.reply_text(f"🛡️ **{target_name}** is protected right now!", parse_mode=ParseMode.MARKDOWN)
+    if result.outcome == combat.TARGET_DEAD:
+        return await update.message.reply_text(f"⚰️ **{target_name}** is already dead.")
 
     # Kill Successful
-    reward = random.randint(MIN_KILL_REWARD, MAX_KILL_REWARD)
-    new_target_death_ts = time.time() + DEATH_DURATION_SECONDS
-    
-    update_balance(killer_id, reward)
-    log_balance_change(killer_id, 'kill_gain', reward) 
-    
-    killer_balance, killer_death_ts, killer_protect_ts, killer_revive_count, killer_revive_date, killer_total_kills, killer_daily_ts = get_user_data(killer_id)
-    set_user_data(killer_id, total_kills=killer_total_kills + 1)
-    set_user_data(target_id, death_ts=new_target_death_ts)
-    
     notification_message = (
         f"💀 **You were KILLED!** 💀\n"
         f"🔥 Killer: **{killer_name}**\n"
         f"⚰️ You are now dead and can be revived in **{DEATH_DURATION_SECONDS // 3600} hours**."
     )
-    try:
-        await context.bot.send_message(chat_id=target_id, text=notification_message, parse_mode=ParseMode.MARKDOWN)
-    except Exception as e:
-        print(f"Error sending kill notification to target {target_id}: {e}")
+    await outbox.notify(target_id, 'kill', notification_message)
         
     await update.message.reply_text(
         f"👤 —🍒→ **{killer_name}** 🔥\" killed xx **{target_name}** xx!\n"
-        f"💰 Earned: **${reward}**", parse_mode=ParseMode.MARKDOWN
+        f"💰 Earned: **${result.amount}**", parse_mode=ParseMode.MARKDOWN
     )
 
+@locks_accounts()
 async def revive_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     target = user
@@ -247,36 +256,42 @@ async def revive_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = user.id
     target_id = target.id
     
-    user_data = get_user_data(user_id) 
-    target_data = get_user_data(target_id)
-    
-    balance, _, _, user_revive_count, user_revive_date, _, _ = user_data 
-    _, target_death_ts, _, _, _, _, _ = target_data 
-    
-    current_date = time.strftime('%Y-%m-%d')
-    if user_revive_date != current_date:
-        set_user_data(user_id, revive_count=0, revive_date=current_date)
-        user_revive_count = 0
-    
     target_name = get_user_mention(target)
     user_name = get_user_mention(user)
-    
-    if target_id == user_id and not is_dead(target_death_ts):
-        return await update.message.reply_text("❌ You are not dead.")
-    if target_id != user_id and not is_dead(target_death_ts):
-        return await update.message.reply_text(f"❌ {target_name} is not dead.")
-        
-    if user_revive_count >= REVIVE_LIMIT_DAILY:
-        return await update.message.reply_text("❌ You have reached your daily revive limit!")
 
-    if balance < REVIVE_COST:
+    # Reset job late/miss ho to naye din ka reset yahin (revive_count purane din ka na rahe)
+    if new_day_due():
+        await reset_daily_counters()
+
+    def refusal(user_state, target_state, now):
+        if not target_state.death_ts > now:
+            return "❌ You are not dead." if target_id == user_id else f"❌ {target_name} is not dead."
+        if user_state.revive_count >= REVIVE_LIMIT_DAILY:
+            return "❌ You have reached your daily revive limit!"
+        return None
+
+    user_state = await get_user_data(user_id)
+    target_state = await get_user_data(target_id)
+    message = refusal(user_state, target_state, time.time())
+    if message:
+        return await update.message.reply_text(message)
+
+    if user_state.balance < REVIVE_COST:
         return await update.message.reply_text(f"❌ You need **${REVIVE_COST}** to revive {target_name}.", parse_mode=ParseMode.MARKDOWN)
 
     # Revive Successful
-    update_balance(user_id, -REVIVE_COST)
-    log_balance_change(user_id, 'revive_cost', -REVIVE_COST) 
-    set_user_data(user_id, revive_count=user_revive_count + 1)
-    set_user_data(target_id, death_ts=0.0) 
+    # revive_count har bot-day ke start par reset hota hai (daily_reset_job ya upar wala check); limit aur death
+    # dobara lock ke andar check hote hain (dusre worker process ka revive beech mein aa sakta hai)
+    revived = await apply_ledger(
+        [(user_id, 'revive_cost', -REVIVE_COST, "")],
+        updates={target_id: {'death_ts': 0.0}}, increments={user_id: {'revive_count': 1}},
+        require=lambda states, now: refusal(states[user_id], states[target_id], now) is None
+    )
+    if not revived:
+        message = refusal(await get_user_data(user_id), await get_user_data(target_id), time.time())
+        if message:
+            return await update.message.reply_text(message)
+        return await update.message.reply_text(f"❌ You need **${REVIVE_COST}** to revive {target_name}.", parse_mode=ParseMode.MARKDOWN)
 
     await update.message.reply_text(
         f"💉 **{target_name}** has been revived by **{user_name}**!\n"
@@ -284,43 +299,25 @@ async def revive_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 async def toprich_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    top_users = get_top_users('balance', limit=10)
+    top_users = await get_top_users('balance', limit=10)
     if not top_users: return await update.message.reply_text("No data found in the database.")
     
     top_list = "🏆 **Top 10 Richest Users (Global)** 🏆\n\n"
+    names = await name_resolver.resolve(context.bot, [user_id for user_id, _ in top_users])
     for i, (user_id, balance) in enumerate(top_users):
-        try:
-            user_info = await context.bot.get_chat(user_id)
-            
-            display_name = f"[{user_info.first_name}](tg://user?id={user_id})"
-            
-            if user_info.username:
-                display_name += f" (@{user_info.username})"
-            
-        except Exception:
-            display_name = f"Unknown User (`{user_id}`)"
-            
+        display_name = format_leaderboard_name(user_id, names[user_id])
         top_list += f"{i+1}. **{display_name}**: **${balance}**\n" 
         
     await update.message.reply_text(top_list, parse_mode=ParseMode.MARKDOWN)
 
 async def topkill_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    top_killers = get_top_users('total_kills', limit=10)
+    top_killers = await get_top_users('total_kills', limit=10)
     if not top_killers: return await update.message.reply_text("No kills data found in the database.")
     
     top_list = "🔪 **Top 10 Killers (Global)** 🔪\n\n"
+    names = await name_resolver.resolve(context.bot, [user_id for user_id, _ in top_killers])
     for i, (user_id, kills) in enumerate(top_killers):
-        try:
-            user_info = await context.bot.get_chat(user_id)
-            
-            display_name = f"[{user_info.first_name}](tg://user?id={user_id})"
-            
-            if user_info.username:
-                display_name += f" (@{user_info.username})"
-                
-        except Exception:
-            display_name = f"Unknown User (`{user_id}`)"
-            
+        display_name = format_leaderboard_name(user_id, names[user_id])
         top_list += f"{i+1}. **{display_name}**: **{kills} Kills**\n" 
         
     await update.message.reply_text(top_list, parse_mode=ParseMode.MARKDOWN)
@@ -333,8 +330,7 @@ async def check_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     target_id = target_user.id
     target_name = get_user_mention(target_user)
     
-    user_data = get_user_data(target_id)
-    _, _, protect_ts, _, _, _, _ = user_data 
+    protect_ts = (await get_user_data(target_id)).protect_ts
     
     if is_protected(protect_ts):
         remaining = int(protect_ts - time.time())
@@ -355,39 +351,36 @@ async def detail_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     target_id = target.id
     target_name = get_user_mention(target)
 
-    balance, death_ts, protect_ts, revive_count, revive_date, total_kills, daily_ts = get_user_data(target_id)
+    if new_day_due():
+        await reset_daily_counters()
+    state = await get_user_data(target_id)
     
-    if is_dead(death_ts):
-        remaining_death = int(death_ts - time.time())
+    if is_dead(state.death_ts):
+        remaining_death = int(state.death_ts - time.time())
         h = remaining_death // 3600
         m = (remaining_death % 3600) // 60
         death_status = f"💀 **DEAD!** (Revive in **{h}h {m}m**)"
     else:
         death_status = "✨ **ALIVE**"
 
-    if is_protected(protect_ts):
-        remaining_protect = int(protect_ts - time.time())
+    if is_protected(state.protect_ts):
+        remaining_protect = int(state.protect_ts - time.time())
         h = remaining_protect // 3600
         m = (remaining_protect % 3600) // 60
         protect_status = f"🛡️ **Protected** (Ends in **{h}h {m}m**)"
     else:
         protect_status = "🚫 **Not Protected**"
         
-    current_date = time.strftime('%Y-%m-%d')
-    if revive_date != current_date:
-        revive_count = 0 
-        
-    remaining_revives = REVIVE_LIMIT_DAILY - revive_count
+    remaining_revives = REVIVE_LIMIT_DAILY - state.revive_count
     remaining_revives = max(0, remaining_revives) 
 
-    last_claim_day = time.strftime('%Y-%m-%d', time.localtime(daily_ts))
-    daily_status = "✅ **Claimed Today**" if last_claim_day == current_date else "❌ **Not Claimed Today**"
+    daily_status = "✅ **Claimed Today**" if state.daily_ts >= day_start() else "❌ **Not Claimed Today**"
 
     reply_text = (
         f"👤 **{target_name}'s RPG Profile** 👤\n"
         f"➖➖➖➖➖➖➖➖➖➖\n"
-        f"💰 **Balance:** **${balance}**\n"
-        f"🔪 **Total Kills:** **{total_kills}**\n"
+        f"💰 **Balance:** **${state.balance}**\n"
+        f"🔪 **Total Kills:** **{state.total_kills}**\n"
         f"➖➖➖➖➖➖➖➖➖➖\n"
         f"🩸 **Health Status:** {death_status}\n"
         f"🛡️ **Protection:** {protect_status}\n"
@@ -407,14 +400,10 @@ async def claim_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     chat_id = update.effective_chat.id
     
-    claimed_by_id, claimed_ts = get_group_claim_data(chat_id)
+    claimed_by_id, claimed_ts = await get_group_claim_data(chat_id)
 
     if claimed_by_id:
-        try:
-            claimant_user = await context.bot.get_chat(claimed_by_id)
-            claimant_name = f"[{claimant_user.first_name}](tg://user?id={claimed_by_id})"
-        except Exception:
-            claimant_name = f"User ID: `{claimed_by_id}`"
+        claimant_name = await get_claimant_name(context, claimed_by_id)
 
         claim_date = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(claimed_ts))
         return await update.message.reply_text(
@@ -422,9 +411,9 @@ async def claim_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             parse_mode=ParseMode.MARKDOWN
         )
 
-    set_group_claim_data(chat_id, user_id, time.time())
-    update_balance(user_id, GROUP_CLAIM_REWARD)
-    log_balance_change(user_id, 'group_claim', GROUP_CLAIM_REWARD, details=str(chat_id))
+    claimed = await claim_group(chat_id, user_id, GROUP_CLAIM_REWARD)
+    if not claimed:
+        return await update.message.reply_text("❌ This group has already been claimed.", parse_mode=ParseMode.MARKDOWN)
 
     user_name = get_user_mention(update.effective_user)
 
@@ -440,16 +429,12 @@ async def own_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await update.message.reply_text("❌ This command must be used in a group.", parse_mode=ParseMode.MARKDOWN)
 
     chat_id = update.effective_chat.id
-    claimed_by_id, claimed_ts = get_group_claim_data(chat_id)
+    claimed_by_id, claimed_ts = await get_group_claim_data(chat_id)
 
     if not claimed_by_id:
         return await update.message.reply_text("❌ This group has not been claimed yet. Use `/claim` to claim it!", parse_mode=ParseMode.MARKDOWN)
 
-    try:
-        claimant_user = await context.bot.get_chat(claimed_by_id)
-        claimant_name = f"[{claimant_user.first_name}](tg://user?id={claimed_by_id})"
-    except Exception:
-        claimant_name = f"User ID: `{claimed_by_id}`"
+    claimant_name = await get_claimant_name(context, claimed_by_id)
 
     claim_date = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(claimed_ts))
 
@@ -458,4 +443,11 @@ async def own_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"👑 **Owner:** {claimant_name}\n"
         f"⏰ **Claimed On:** `{claim_date}`",
         parse_mode=ParseMode.MARKDOWN
-    )
\ No newline at end of file
+    )
+
+# --- SCHEDULED JOBS ---
+
+# JobQueue har din DAILY_RESET_HOUR par chalata hai (main.py schedule karta hai)
+async def daily_reset_job(context: ContextTypes.DEFAULT_TYPE):
+    if await reset_daily_counters():
+        print("Daily counters reset for the new day.")
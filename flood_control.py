@@ -0,0 +1,128 @@
+# flood_control.py
+# Commands ke liye in-memory flood control. Har command pehle sender ke bucket
+# se, phir chat ke bucket se tokens leta hai (token bucket: budget dheere
+# dheere refill hota hai, burst tak jama ho sakta hai). Sender ka budget
+# khatam ho to chat ke tokens kharch nahi hote, isliye ek spammer baaki
+# logon ka chat budget nahi kha sakta. Over-limit command chup-chaap drop
+# hota hai; sender ko har spam episode mein sirf ek warning milti hai. Idle
+# buckets LRU order mein rehte hain aur check ke saath hi evict ho jaate hain.
+# Worker mode mein har worker ke apne buckets hain (config.py ka FLOOD CONTROL note).
+
+import time
+from collections import OrderedDict
+
+from telegram import Update
+from telegram.constants import MessageEntityType
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+
+from config import (
+    BOT_OWNER_ID, FLOOD_USER_RATE, FLOOD_USER_BURST, FLOOD_CHAT_RATE, FLOOD_CHAT_BURST,
+    FLOOD_COMMAND_COSTS, FLOOD_IDLE_SECONDS
+)
+from metrics import FLOOD_DROPPED
+
+# Ek check mein max kitne idle buckets evict hote hain (check O(1) rehta hai)
+EVICT_PER_CHECK = 4
+
+class TokenBuckets:
+    """Token buckets keyed by id: rate tokens per second, holding at most burst.
+
+    Buckets are kept in least-recently-used order; ones untouched for
+    idle_seconds are full again anyway, so they are dropped.
+    """
+
+    def __init__(self, rate, burst, idle_seconds):
+        self.rate = rate
+        self.burst = burst
+        self.idle_seconds = idle_seconds
+        self._buckets = OrderedDict()  # key -> [tokens, last_ts, warned]
+
+    def get(self, key, now):
+        """The refilled [tokens, last_ts, warned] bucket of key (created full)."""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now, False]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        self._evict(now)
+        return bucket
+
+    def _evict(self, now):
+        for _ in range(EVICT_PER_CHECK):
+            if not self._buckets:
+                return
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket[1] < self.idle_seconds:
+                return
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+class FloodControl:
+    """Per-user and per-chat command budgets."""
+
+    def __init__(self, user_rate, user_burst, chat_rate, chat_burst, costs, idle_seconds):
+        self.users = TokenBuckets(user_rate, user_burst, idle_seconds)
+        self.chats = TokenBuckets(chat_rate, chat_burst, idle_seconds)
+        self.costs = costs
+        self.enabled = True
+
+    def check(self, user_id, chat_id, command, now=None):
+        """Charges command to both budgets.
+
+        Returns None if it may run, 'user' if the sender's budget is spent
+        (and they should be warned), 'user_warned' if it is spent and they
+        already were, or 'chat' if the chat's budget is spent.
+        """
+        cost = self.costs.get(command, 1)
+        if cost <= 0 or not self.enabled:
+            return None
+        now = time.monotonic() if now is None else now
+        user = self.users.get(user_id, now)
+        if user[2] and user[0] >= self.users.burst:
+            # Budget poora wapas aa gaya: spam episode khatam, agli baar phir warning
+            user[2] = False
+        if user[0] < cost:
+            if user[2]:
+                return 'user_warned'
+            user[2] = True
+            return 'user'
+        chat = self.chats.get(chat_id, now)
+        if chat[0] < cost:
+            return 'chat'
+        user[0] -= cost
+        chat[0] -= cost
+        return None
+
+    def stats(self):
+        return {'users': len(self.users), 'chats': len(self.chats)}
+
+flood_control = FloodControl(
+    FLOOD_USER_RATE, FLOOD_USER_BURST, FLOOD_CHAT_RATE, FLOOD_CHAT_BURST, FLOOD_COMMAND_COSTS, FLOOD_IDLE_SECONDS
+)
+
+def command_name(message):
+    """The command a message starts with ('kill' for "/kill@MyBot 10"), or None."""
+    if not message or not message.entities or not message.text:
+        return None
+    entity = message.entities[0]
+    if entity.type != MessageEntityType.BOT_COMMAND or entity.offset != 0:
+        return None
+    return message.text[1:entity.length].split('@', 1)[0].lower()
+
+async def flood_guard(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Drops commands over budget before any handler sees them (group -2)."""
+    command = command_name(update.effective_message)
+    if command is None or not update.effective_user or update.effective_user.id == BOT_OWNER_ID:
+        return
+    verdict = flood_control.check(update.effective_user.id, update.effective_chat.id, command)
+    if verdict is None:
+        return
+    FLOOD_DROPPED.inc(verdict.split('_')[0])
+    if verdict == 'user':
+        # Poore spam episode ke liye ek hi warning (budget poora refill hone par reset)
+        await update.effective_message.reply_text("⏳ Slow down! Your commands are being ignored for a few seconds.")
+    raise ApplicationHandlerStop
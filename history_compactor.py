@@ -0,0 +1,83 @@
+# history_compactor.py
+# balance_history ke liye background retention job. Retention window se
+# purani rows chhote batches mein per-user, per-type, per-day totals mein
+# roll up hoti hain (balance_history_daily) aur raw rows delete ho jaati hain.
+# Har batch apna chhota transaction hai, taaki write lock der tak na ruke.
+# Isi thread par chhote database chores (housekeep) bhi thodi thodi der mein chalte hain.
+
+import threading
+import time
+
+class HistoryCompactor:
+    """Runs compact_batch(cutoff) repeatedly on a background thread.
+
+    compact_batch must move at most one batch of rows older than cutoff and
+    return how many it moved; reclaim() is called after each pass to give
+    freed pages back. A pass runs every interval seconds. housekeep(), if
+    given, runs on the same thread every housekeep_interval seconds (short
+    database chores that should not wait for the next pass).
+    """
+
+    def __init__(self, compact_batch, reclaim, retention_seconds, interval, pause, housekeep=None, housekeep_interval=None):
+        self.compact_batch = compact_batch
+        self.reclaim = reclaim
+        self.retention_seconds = retention_seconds
+        self.interval = interval
+        self.pause = pause
+        self.housekeep = housekeep
+        self.housekeep_interval = housekeep_interval or interval
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Stats (metrics / debugging ke liye)
+        self.passes = 0
+        self.rows_compacted = 0
+        self.last_pass_seconds = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="history-compactor", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        next_pass = 0.0
+        while not self._stop.is_set():
+            if self.housekeep is not None:
+                try:
+                    self.housekeep()
+                except Exception as e:
+                    print(f"Error in database housekeeping: {e}")
+            if time.monotonic() >= next_pass:
+                try:
+                    self.run_pass()
+                except Exception as e:
+                    print(f"Error compacting balance history: {e}")
+                next_pass = time.monotonic() + self.interval
+            self._stop.wait(min(self.housekeep_interval, max(0.0, next_pass - time.monotonic())))
+
+    def run_pass(self):
+        """Compacts everything older than the retention window, batch by batch."""
+        start = time.perf_counter()
+        cutoff = time.time() - self.retention_seconds
+        while not self._stop.is_set():
+            moved = self.compact_batch(cutoff)
+            self.rows_compacted += moved
+            if not moved:
+                break
+            # Batches ke beech handlers ko write lock lene ka mauka do
+            self._stop.wait(self.pause)
+        self.reclaim()
+        self.passes += 1
+        self.last_pass_seconds = time.perf_counter() - start
+
+    def stats(self):
+        return {
+            'passes': self.passes,
+            'rows_compacted': self.rows_compacted,
+            'last_pass_ms': self.last_pass_seconds * 1000,
+        }
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -1,21 +1,112 @@
 # keep_alive.py
-from flask import Flask
-from threading import Thread
+# Chhota asyncio HTTP/1.1 server jo bot ke event loop par hi chalta hai (alag
+# thread ya Flask ki zaroorat nahi). Health check (/) hamesha yahan hai; webhook
+# mode mein Telegram ke updates bhi isi server par aate hain (main.py route add karta hai).
 
-# Flask application (web server) start kar rahe hain
-app = Flask('')
+import asyncio
+from http import HTTPStatus
+
+# Request body ki max size (Telegram updates isse kaafi chhote hote hain)
+MAX_BODY_BYTES = 1024 * 1024
+# Idle keep-alive connection kitni der khula rahe
+IDLE_TIMEOUT_SECONDS = 75
+# Request line aane ke baad headers + body itni der mein poore aane chahiye (slow clients connection nahi rok sakte)
+REQUEST_TIMEOUT_SECONDS = 10
+# Ek request mein max headers
+MAX_HEADERS = 100
+
+class Request:
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers  # lower-case names
+        self.body = body
+
+# (method, path) -> async handler(request) -> (status, content_type, body)
+ROUTES = {}
+
+def route(method, path):
+    """Registers an async handler for method + path (decorator)."""
+    def register(handler):
+        ROUTES[(method, path)] = handler
+        return handler
+    return register
 
 # Root URL (/) par jaane par yeh function chalta hai
-@app.route('/')
-def home():
-    return "Mahiru Bot is alive and running 24/7!"
-
-# Web server ko background thread mein chalao
-def run():
-  # 0.0.0.0 aur 8080 port Replit ke liye standard hain
-  app.run(host='0.0.0.0', port=8080)
-
-# Main function jo background thread ko start karegi
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
\ No newline at end of file
+@route('GET', '/')
+async def home(request):
+    return 200, 'text/plain; charset=utf-8', "Mahiru Bot is alive and running 24/7!"
+
+async def _read_request(reader):
+    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT_SECONDS)
+    if not request_line:
+        return None
+    # Baaki request ek hi deadline ke andar; timeout par connection band
+    return await asyncio.wait_for(_read_rest(reader, request_line), REQUEST_TIMEOUT_SECONDS)
+
+async def _read_rest(reader, request_line):
+    method, target, version = request_line.decode('latin-1').split()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise ValueError("too many headers")
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if not 0 <= length <= MAX_BODY_BYTES:
+        raise ValueError("bad request body length")
+    body = await reader.readexactly(length) if length else b''
+    keep_open = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+    return Request(method, target.split('?', 1)[0], headers, body), keep_open
+
+async def _handle_connection(reader, writer):
+    try:
+        while True:
+            try:
+                parsed = await _read_request(reader)
+            except (ValueError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+                # Bahut lambi line (readline ise ValueError bana deta hai), galat format ya adhoori body
+                _write_response(writer, 400, 'text/plain', "Bad Request", False)
+                await writer.drain()
+                break
+            if parsed is None:
+                break
+            request, keep_open = parsed
+
+            handler = ROUTES.get((request.method, request.path))
+            if handler is None:
+                status, content_type, body = 404, 'text/plain', "Not Found"
+            else:
+                try:
+                    status, content_type, body = await handler(request)
+                except Exception as e:
+                    print(f"Error handling {request.method} {request.path}: {e}")
+                    status, content_type, body = 500, 'text/plain', "Internal Server Error"
+
+            _write_response(writer, status, content_type, body, keep_open)
+            await writer.drain()
+            if not keep_open:
+                break
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+def _write_response(writer, status, content_type, body, keep_open):
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_open else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode('latin-1') + body)
+
+# Server ko bot ke event loop par start karo (asyncio.Server return hota hai; band karne ke liye .close())
+async def keep_alive(host='0.0.0.0', port=8080):
+    # 0.0.0.0 aur 8080 port Replit ke liye standard hain
+    return await asyncio.start_server(_handle_connection, host, port)
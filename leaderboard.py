@@ -0,0 +1,83 @@
+# leaderboard.py
+# Ek users column (balance / total_kills) ke top users ka in-process view. Sirf
+# sabse upar ke `size` users memory mein rehte hain; database ke index se
+# (ORDER BY ... LIMIT) seed hota hai, phir har write ke saath in-place update
+# hota hai, taaki /toprich aur /topkill ko poori table sort na karni pade.
+# Koi user neeche gir kar board se bahar ho jaye to board chhota ho jaata hai;
+# jab woh maange gaye top se chhota ho, index se dobara bhar liya jaata hai.
+
+import bisect
+import threading
+
+class Leaderboard:
+    """The highest `size` users by one column, highest first.
+
+    _order holds (-value, user_id) keys in ascending order and _values maps
+    each member to its current value. Everyone outside the board is at or
+    below its last entry, so the board is always a correct prefix of the
+    full ranking; top(k) is an O(k) slice once it holds k users.
+    """
+
+    def __init__(self, field, size):
+        self.field = field
+        self.size = size
+        self.seeded = False
+        self._load_top = None
+        self._values = {}
+        self._order = []
+        # True jab board mein saare users hain (table size se chhoti): tab har naya user andar aata hai
+        self._complete = False
+        self._lock = threading.Lock()
+
+    def seed(self, load_top):
+        """Loads the board once from load_top(limit), which returns the (user_id,
+        value) rows of the highest limit users. It runs under the lock, so
+        writes published meanwhile are applied after the seed."""
+        with self._lock:
+            if not self.seeded:
+                self._load_top = load_top
+                self._fill()
+                self.seeded = True
+
+    def _fill(self):
+        rows = self._load_top(self.size)
+        self._order = sorted((-value, user_id) for user_id, value in rows)[:self.size]
+        self._values = {user_id: -neg_value for neg_value, user_id in self._order}
+        self._complete = len(rows) < self.size
+
+    def set(self, user_id, value):
+        with self._lock:
+            if not self.seeded:
+                # Seed abhi hua nahi; seed khud database se latest value padhega
+                return
+            old = self._values.get(user_id)
+            if old == value:
+                return
+            if old is not None:
+                del self._order[bisect.bisect_left(self._order, (-old, user_id))]
+                del self._values[user_id]
+            key = (-value, user_id)
+            if self._complete or (self._order and key < self._order[-1]):
+                bisect.insort(self._order, key)
+                self._values[user_id] = value
+                if len(self._order) > self.size:
+                    _, dropped = self._order.pop()
+                    del self._values[dropped]
+                    self._complete = False
+            # Warna user board ke aakhri entry se neeche hai: bahar hi rehta hai
+
+    def top(self, limit):
+        with self._lock:
+            if len(self._order) < min(limit, self.size) and not self._complete and self._load_top is not None:
+                # Log board se neeche gire; unki jagah kaun hai yeh sirf database jaanta hai
+                self._fill()
+            return [(user_id, -neg_value) for neg_value, user_id in self._order[:limit]]
+
+    def reset(self):
+        """Drops everything; the next read seeds again from the database."""
+        with self._lock:
+            self.seeded = False
+            self._load_top = None
+            self._values = {}
+            self._order = []
+            self._complete = False
@@ -1,217 +1,216 @@
 # main.py
 
 import asyncio
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
-from telegram import Update, BotCommand, BotCommandScopeAllPrivateChats, InlineKeyboardMarkup, InlineKeyboardButton
-from telegram.constants import ChatMemberStatus, ParseMode 
-import telegram
-import time
-from telegram.ext import ContextTypes 
-
-from config import BOT_TOKEN, BOT_OWNER_ID, BOT_OWNER_NAME
-from database import init_db, add_group_to_db, log_name_change, get_user_history
-
-# --- NAYA IMPORT (24/7 Keep-Alive ke liye) ---
-from keep_alive import keep_alive 
-
-# 1. Economy Imports (balhistory removed, detail, claim, own added)
-from economy import (
-    bal_command, daily_command, give_command, protect_command, 
-    rob_command, kill_command, revive_command, toprich_command, topkill_command,
-    check_command, detail_command, claim_command, own_command 
+import datetime
+import json
+import signal
+from telegram.ext import Application, CommandHandler, MessageHandler, ChatMemberHandler, TypeHandler, filters
+from telegram import Update, BotCommand, BotCommandScopeAllPrivateChats
+
+from config import (
+    BOT_TOKEN, RUN_MODE, WEB_HOST, WEB_PORT,
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_MAX_CONNECTIONS, UPDATE_WORKERS, DAILY_RESET_HOUR,
+    DB_BACKEND, WORKER_PROCESSES, WORKER_WEB_PORT, WORKER_OUTBOX_POLL, THROTTLE_GLOBAL_RATE, THROTTLE_GLOBAL_BURST
 )
-# 2. Utility Imports (tr, owner, history added)
-from utility_actions import (
-    tr_command, owner_command, history_command 
-)
-# 3. Fun Actions Imports (dare, truth added)
-from fun_actions import (
-    slap_command, punch_command, kiss_command, hug_command, 
-    bite_command, crush_command, love_command, look_command, brain_command, stupid_meter_command, 
-    truth_command, dare_command, game_placeholder_command
-)
-from mod_actions import (
-    ban_user_command, unban_user_command, mute_user_command, unmute_user_command, pin_message_command,
-    promote_user_command, demote_user_command, warn_user_command
-)
-
-# --- CORE COMMANDS ---
+from database import init_db, history_compactor, disable_process_caches, reset_daily_counters
+from async_db import get_bot_state, set_bot_state, shutdown as shutdown_db
 
-# Placeholder command for unimplemented features
-async def placeholder_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text("🛠️ This feature is under construction! Come back later.", parse_mode=ParseMode.MARKDOWN)
-
-# /id command (FIXED logic)
-async def id_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user = update.effective_user
-    chat_id = update.effective_chat.id
-    reply_text = ""
-    
-    reply_text += f"👤 **Your User ID:** `{user.id}`\n"
-    
-    if update.message.reply_to_message:
-        replied_user = update.message.reply_to_message.from_user
-        reply_text += f"➡️ **Replied User ID:** `{replied_user.id}`\n"
-        
-    if update.effective_chat.type != 'private':
-        reply_text += f"🏠 **Chat ID:** `{chat_id}`"
-
-    await update.message.reply_text(reply_text, parse_mode=ParseMode.MARKDOWN)
-
-# /start command
-async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user = update.effective_user
-    chat = update.effective_chat
-    
-    if user:
-        # Log name and username history
-        log_name_change(user.id, 'name', user.first_name)
-        if user.username:
-            log_name_change(user.id, 'username', user.username)
-            
-    if chat.type == 'private':
-        bot_info = await context.bot.get_me()
-        bot_username = bot_info.username
-        
-        keyboard = [
-            [
-                InlineKeyboardButton("➕ Add Me To Your Group ➕", url=f"https://t.me/{bot_username}?startgroup=true")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        await update.message.reply_text(
-            f"Hello **{user.first_name}**! I am Mahiru Shiina All-Rounder Bot. Use /help to see commands, or add me to your group to manage it!",
-            reply_markup=reply_markup,
-            parse_mode=ParseMode.MARKDOWN
-        )
-        
-    elif update.message.new_chat_members:
-        new_members = ", ".join([m.first_name for m in update.message.new_chat_members])
-        adder_id = update.effective_user.id
-        add_group_to_db(chat.id, adder_id)
-        await context.bot.send_message(
-            chat_id=chat.id, 
-            text=f"Welcome {new_members} to the group! Use /help to see what I can do."
-        )
-
-async def help_command(update: Update, context):
-    help_text = (
-        "🌸 **Mahiru Shiina All-Rounder Bot Commands** 🌸\n\n"
-        "**💰 Economy & RPG Commands:**\n"
-        "*/bal*, */daily*, */give* (Reply + amount), */protect*, */rob* (Reply + amount), */kill* (Reply), */revive* (Reply)\n"
-        "*/toprich*, */topkill*, */check*, */detail*, */claim*, */own*, */history*\n"
-        
-        "\n**🛠️ Utility & Misc Commands:**\n"
-        "*/id* (Reply to someone), */owner*, */tr*, */adminlist* (*Placeholder*), */broadcast* [msg] (Owner only)\n"
-        
-        "\n**🎉 Fun Actions (Reply to someone):**\n"
-        "*/crush*, */love*, */look*, */brain*, */stupid_meter*, */slap*, */punch*, */bite*, */kiss*, */hug*\n"
-        
-        "\n**🎲 Games:**\n"
-        "*/truth*, */dare*, */puzzle* (*Placeholder*)\n"
-        "*/start*, */help* - Bot Info."
-    )
-    await update.message.reply_text(help_text, parse_mode=ParseMode.MARKDOWN)
-
-async def adminlist_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text("Admin list feature is pending.")
-
-async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if update.effective_user.id != BOT_OWNER_ID:
-        return await update.message.reply_text("❌ You are not the bot owner.", parse_mode=ParseMode.MARKDOWN)
-    await update.message.reply_text("Broadcast feature is pending.")
+# --- NAYA IMPORT (24/7 Keep-Alive ke liye) ---
+from keep_alive import keep_alive
+from metrics import instrument_application
+from throttle import ThrottledRequest, throttle
+
+# Command handlers commands.py ki registry se aate hain; unke modules pehle use par import hote hain
+from commands import COMMANDS, LazyCallback, menu_commands
+from broadcast import broadcaster
+from outbox import outbox
+from workers import UpdateRouter, feed, primary_worker, run_ingress, webhook_route
+from profiler import count_update
+from flood_control import flood_guard
 
 # --- COMMAND SETTER FOR MENU BUTTON ---
 async def set_commands(application: Application):
-    """Sets the Telegram bot commands/menu."""
-    commands = [
-        BotCommand("start", "Start the bot & get group invite link"),
-        BotCommand("help", "Show all commands and features"),
-        BotCommand("bal", "Check your or someone else's balance"),
-        BotCommand("daily", "Claim your daily reward"),
-        BotCommand("kill", "Kill a user (Reply)"),
-        BotCommand("protect", "Buy protection for 24 hours"),
-        BotCommand("pin", "Pin a message (Admin, Reply)"),
-        BotCommand("ban", "Ban a user (Admin, Reply)"),
-    ]
-    await application.bot.set_my_commands(commands, scope=BotCommandScopeAllPrivateChats())
-    print("Bot commands set successfully.")
+    """Publishes the registry's menu commands, unless the last run already did."""
+    menu = menu_commands()
+    published = json.dumps(menu)
+    try:
+        # Har restart par same menu dobara bhejna ek faltu API round trip hai
+        if await get_bot_state('menu_commands') == published:
+            return
+        commands = [BotCommand(name, description) for name, description in menu]
+        await application.bot.set_my_commands(commands, scope=BotCommandScopeAllPrivateChats())
+        await set_bot_state('menu_commands', published)
+        print("Bot commands set successfully.")
+    except Exception as e:
+        print(f"Error setting bot commands: {e}")
+
+def local_zone():
+    """The machine's time zone with its DST rules, for JobQueue.run_daily.
+
+    datetime's astimezone() only gives today's fixed UTC offset, which fires
+    the job an hour off after a DST change.
+    """
+    try:
+        # tzlocal APScheduler (JobQueue) ki dependency hai
+        from tzlocal import get_localzone
+        return get_localzone()
+    except Exception as e:
+        print(f"Warning: local time zone not found ({e}); daily reset job uses today's UTC offset.")
+        return datetime.datetime.now().astimezone().tzinfo
+
+async def on_startup(application: Application):
+    """Sets the menu and starts the web server and background workers."""
+    # Worker mode mein (index, count); ek process wale mode mein None
+    worker = application.bot_data.get('worker')
+    # --- 24/7 KEEP-ALIVE START KAREIN (ZAROORI) ---
+    # Health check (aur webhook mode mein updates) isi event loop par serve hote hain
+    print("Starting keep-alive webserver...")
+    port = WEB_PORT if worker is None else WORKER_WEB_PORT + worker[0]
+    application.bot_data['web_server'] = await keep_alive(WEB_HOST, port)
+    # Har din ke boundary ke kuch second baad sabke daily counters ek UPDATE mein reset
+    # (har worker mein: reset ek hi baar hota hai, baaki apna day_start utha lete hain)
+    application.job_queue.run_daily(LazyCallback("economy:daily_reset_job"), time=datetime.time(hour=DAILY_RESET_HOUR, second=5, tzinfo=local_zone()), name="daily-reset")
+    if worker is not None:
+        # Global message limit poore bot ka hai; har worker ko uska hissa
+        throttle.limiter.set_max_rate(THROTTLE_GLOBAL_RATE / worker[1], max(1, THROTTLE_GLOBAL_BURST / worker[1]))
+        if worker[0] != primary_worker(worker[1]):
+            return
+    # Menu background mein: pehle update ka jawab iska wait nahi karta
+    application.create_task(set_commands(application))
+    if worker is not None:
+        # Doosre workers ke notify() yahan wake nahi karte; outbox table jaldi jaldi dekho
+        outbox.idle_poll = min(outbox.idle_poll, WORKER_OUTBOX_POLL)
+    # Purani balance_history rows ko daily totals mein roll up karta rahe
+    history_compactor.start()
+    # Pending DMs (restart se pehle ke bhi) background mein bhejo
+    outbox.start(application.bot)
+    # Restart se pehle beech mein ruka broadcast wahi se aage chalao
+    await broadcaster.resume(application.bot)
+
+async def on_shutdown(application: Application):
+    """Drains the DB executor and closes shared connections when the bot stops."""
+    web_server = application.bot_data.pop('web_server', None)
+    if web_server is not None:
+        web_server.close()
+    await broadcaster.stop()
+    await outbox.stop()
+    shutdown_db()
+
+# --- WEBHOOK MODE ---
+def add_webhook_route(application: Application):
+    """Serves Telegram's update POSTs straight into this process's update queue."""
+    async def enqueue(raw):
+        # Update queue mein daal ke turant 200; processing UPDATE_WORKERS tak concurrent hoti hai
+        await application.update_queue.put(Update.de_json(raw, application.bot))
+
+    webhook_route(enqueue)
+
+async def run_webhook(application: Application):
+    """Runs the bot on webhook updates until SIGINT/SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await application.initialize()
+    await application.post_init(application)
+    await application.bot.set_webhook(
+        url=WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET or None,
+        allowed_updates=Update.ALL_TYPES,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+    )
+    await application.start()
+    print(f"Bot is running (webhook on {WEB_HOST}:{WEB_PORT}{WEBHOOK_PATH})...")
+    try:
+        await stop.wait()
+    finally:
+        await application.stop()
+        await application.shutdown()
+        await application.post_shutdown(application)
+
+# --- MULTI-PROCESS WORKER MODE ---
+async def run_worker(application: Application, updates):
+    """Runs the bot on updates handed over by the ingress process until it sends None."""
+    await application.initialize()
+    await application.post_init(application)
+    await application.start()
+    index, count = application.bot_data['worker']
+    print(f"Worker {index}/{count} is running...")
+    try:
+        await feed(application, updates)
+    finally:
+        await application.stop()
+        await application.shutdown()
+        await application.post_shutdown(application)
+
+def worker_main(index, count, updates):
+    """Entry point of one worker process (see workers.py)."""
+    # Ctrl+C / SIGTERM poore process group ko milta hai; worker sirf ingress ke
+    # None par rukta hai, taaki queue mein pade updates bhi handle ho jaayein
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    # Doosre workers ke commits is process ka cache invalidate nahi kar sakte
+    disable_process_caches()
+    # Schema ingress bana chuka hai; yahan sirf is process ka day_start
+    reset_daily_counters()
+    application = build_application(worker=(index, count))
+    asyncio.run(run_worker(application, updates))
 
 
 # --- MAIN EXECUTION ---
+def add_handlers(application: Application):
+    """Registers every command and update handler on application."""
+    # Har command commands.py mein declared hai; module pehli baar command aane par import hota hai
+    for command in COMMANDS:
+        application.add_handler(CommandHandler(command.name, LazyCallback(command.target)))
+
+    application.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, LazyCallback("core_actions:start_command")))
+    application.add_handler(ChatMemberHandler(LazyCallback("mod_actions:chat_member_update"), ChatMemberHandler.ANY_CHAT_MEMBER))
+    # /profile ke liye updates ginta hai (group -1: baaki handlers se pehle, unhe roke bina)
+    application.add_handler(TypeHandler(Update, count_update), group=-1)
+    # Flood control sabse pehle (group -2): budget se bahar ke commands kisi handler tak nahi pahunchte
+    application.add_handler(TypeHandler(Update, flood_guard), group=-2)
+
+def build_application(worker=None):
+    """Builds the Application with every handler; worker is (index, count) in worker mode."""
+    # Updates concurrently process hote hain; economy commands account_locks se safe hain
+    application = (
+        Application.builder().token(BOT_TOKEN).concurrent_updates(UPDATE_WORKERS)
+        # Builder ke default jitna pool (HTTPXRequest ka apna default 1 connection hai)
+        .request(ThrottledRequest(connection_pool_size=256))
+        .post_init(on_startup).post_shutdown(on_shutdown).build()
+    )
+    application.bot_data['worker'] = worker
+    add_handlers(application)
+    # Per-command latency / counts /metrics par dikhte hain
+    instrument_application(application)
+    return application
+
 def main():
     """Start the bot."""
     
-    # 1. Initialize DB and Keep Alive
+    # 1. Initialize DB (worker mode mein bhi sirf yahin: migrations/rebalance ek hi baar)
     init_db()
-    
-    # --- 24/7 KEEP-ALIVE START KAREIN (ZAROORI) ---
-    print("Starting keep-alive webserver...")
-    keep_alive()
-    # -----------------------------------------------
-    
-    application = Application.builder().token(BOT_TOKEN).post_init(set_commands).build()
-    
-    # 1. Add Handlers (Core/Utility)
-    application.add_handler(CommandHandler("start", start_command))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("id", id_command))
-    application.add_handler(CommandHandler("owner", owner_command))
-    application.add_handler(CommandHandler("history", history_command))
-    application.add_handler(CommandHandler("tr", tr_command))
-    application.add_handler(CommandHandler("adminlist", adminlist_command))
-    application.add_handler(CommandHandler("broadcast", broadcast_command))
-    
-    # 2. Add Handlers (Economy & RPG)
-    application.add_handler(CommandHandler("bal", bal_command))
-    application.add_handler(CommandHandler("daily", daily_command))
-    application.add_handler(CommandHandler("give", give_command))
-    application.add_handler(CommandHandler("protect", protect_command))
-    application.add_handler(CommandHandler("rob", rob_command))
-    application.add_handler(CommandHandler("kill", kill_command))
-    application.add_handler(CommandHandler("revive", revive_command))
-    application.add_handler(CommandHandler("toprich", toprich_command))
-    application.add_handler(CommandHandler("topkill", topkill_command))
-    application.add_handler(CommandHandler("check", check_command))
-    application.add_handler(CommandHandler("claim", claim_command))
-    application.add_handler(CommandHandler("own", own_command))
-    application.add_handler(CommandHandler("detail", detail_command))
-    
-    # 3. Add Handlers (MODERATION FEATURES)
-    application.add_handler(CommandHandler("ban", ban_user_command))
-    application.add_handler(CommandHandler("unban", unban_user_command))
-    application.add_handler(CommandHandler("mute", mute_user_command))
-    application.add_handler(CommandHandler("unmute", unmute_user_command))
-    application.add_handler(CommandHandler("pin", pin_message_command))
-    application.add_handler(CommandHandler("promote", promote_user_command))
-    application.add_handler(CommandHandler("demote", demote_user_command))
-    application.add_handler(CommandHandler("warn", warn_user_command))
-
-    # 4. Add Handlers (Fun Actions/Games)
-    application.add_handler(CommandHandler("slap", slap_command))
-    application.add_handler(CommandHandler("punch", punch_command))
-    application.add_handler(CommandHandler("kiss", kiss_command))
-    application.add_handler(CommandHandler("hug", hug_command))
-    application.add_handler(CommandHandler("bite", bite_command))
-    application.add_handler(CommandHandler("crush", crush_command))
-    application.add_handler(CommandHandler("love", love_command))
-    application.add_handler(CommandHandler("look", look_command))
-    application.add_handler(CommandHandler("brain", brain_command))
-    application.add_handler(CommandHandler("stupid_meter", stupid_meter_command))
-    application.add_handler(CommandHandler("dare", dare_command))
-    application.add_handler(CommandHandler("truth", truth_command))
-
-    # 5. Placeholder Handlers (Only /puzzle remains)
-    placeholder_commands_misc = ["puzzle"] 
-    for cmd in placeholder_commands_misc:
-        application.add_handler(CommandHandler(cmd, game_placeholder_command))
-    
-    application.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, start_command))
+
+    if WORKER_PROCESSES > 0:
+        if DB_BACKEND == "memory":
+            raise SystemExit("WORKER_PROCESSES needs a file or sharded DB_BACKEND (memory databases are per process).")
+        print(f"Bot is starting ({WORKER_PROCESSES} worker processes)...")
+        asyncio.run(run_ingress(UpdateRouter(WORKER_PROCESSES, worker_main), RUN_MODE))
+        shutdown_db()
+        return
+
+    application = build_application()
     
     # Run the bot
     print("Bot is starting...")
-    application.run_polling()
+    if RUN_MODE == "webhook":
+        add_webhook_route(application)
+        asyncio.run(run_webhook(application))
+    else:
+        # chat_member updates Telegram tabhi bhejta hai jab allowed_updates mein maange jaayein
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,178 @@
+# metrics.py
+# Prometheus text format metrics, keep-alive server ke /metrics par. Counters
+# aur histograms thread-safe hain (DB queries executor threads par chalti
+# hain). Commands, database queries, Telegram API calls aur update queue
+# ki depth yahan record hoti hai.
+
+import functools
+import threading
+import time
+
+from telegram.ext import ApplicationHandlerStop
+from telegram.request import HTTPXRequest
+
+from keep_alive import route
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, label_values)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts, sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, seconds, *label_values):
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += seconds
+            entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (bucket_counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_label_text(self.labels, label_values, [('le', bound)])} {cumulative}")
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, label_values, [('le', '+Inf')])} {count}")
+                lines.append(f"{self.name}_sum{_label_text(self.labels, label_values)} {total}")
+                lines.append(f"{self.name}_count{_label_text(self.labels, label_values)} {count}")
+        return lines
+
+class Gauge:
+    """Value read from a callback at scrape time."""
+
+    def __init__(self, name, help, read=None):
+        self.name = name
+        self.help = help
+        self.read = read
+        REGISTRY.append(self)
+
+    def render(self):
+        if self.read is None:
+            return []
+        try:
+            value = self.read()
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+@route('GET', '/metrics')
+async def metrics_endpoint(request):
+    return 200, 'text/plain; version=0.0.4; charset=utf-8', render()
+
+# --- METRICS ---
+
+COMMAND_REQUESTS = Counter('bot_command_requests_total', "Updates handled, by command.", ('command',))
+COMMAND_ERRORS = Counter('bot_command_errors_total', "Handlers that raised, by command.", ('command',))
+COMMAND_SECONDS = Histogram('bot_command_duration_seconds', "Handler latency, by command.", ('command',))
+
+DB_SECONDS = Histogram('bot_db_query_duration_seconds', "Database call latency, by operation.", ('op',))
+DB_ERRORS = Counter('bot_db_errors_total', "Database calls that raised, by operation.", ('op',))
+
+TELEGRAM_SECONDS = Histogram('bot_telegram_api_duration_seconds', "Bot API call latency, by method.", ('method',))
+TELEGRAM_RETRY_AFTER = Counter('bot_telegram_retry_after_total', "Bot API calls rejected with 429 (RetryAfter), by method.", ('method',))
+TELEGRAM_RETRIED = Counter('bot_telegram_retried_total', "Bot API calls retried by the throttler after a 429, by method.", ('method',))
+TELEGRAM_THROTTLE_SECONDS = Histogram('bot_telegram_throttle_wait_seconds', "Time sends waited for chat and global budgets, by lane.", ('lane',))
+
+FLOOD_DROPPED = Counter('bot_flood_dropped_total', "Commands dropped by flood control, by exhausted budget (user/chat).", ('budget',))
+
+UPDATE_QUEUE_DEPTH = Gauge('bot_update_queue_depth', "Updates waiting in the application's update queue.")
+
+# --- INSTRUMENTATION ---
+
+def handler_name(handler):
+    """'/cmd' for command handlers, else the callback's function name (e.g. 'flood_guard')."""
+    commands = getattr(handler, 'commands', None)
+    if commands:
+        return '/' + sorted(commands)[0]
+    # LazyCallback ka naam uske "module:function" se (import trigger kiye bina)
+    target = getattr(handler.callback, 'target', None)
+    if isinstance(target, str):
+        return target.rpartition(':')[2]
+    return getattr(handler.callback, '__name__', type(handler).__name__)
+
+def _timed_callback(name, callback):
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        start = time.perf_counter()
+        COMMAND_REQUESTS.inc(name)
+        try:
+            return await callback(update, context)
+        except ApplicationHandlerStop:
+            # flood_guard jaise handlers isse update rokte hain; yeh error nahi hai
+            raise
+        except BaseException:
+            COMMAND_ERRORS.inc(name)
+            raise
+        finally:
+            COMMAND_SECONDS.observe(time.perf_counter() - start, name)
+    return wrapper
+
+def instrument_application(application):
+    """Times every registered handler and exposes the update queue depth."""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            handler.callback = _timed_callback(handler_name(handler), handler.callback)
+    UPDATE_QUEUE_DEPTH.read = application.update_queue.qsize
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest that records per-method latency and 429 responses."""
+
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        api_method = url.rsplit('/', 1)[-1]
+        start = time.perf_counter()
+        try:
+            status, payload = await super().do_request(url, method, request_data, *args, **kwargs)
+        finally:
+            TELEGRAM_SECONDS.observe(time.perf_counter() - start, api_method)
+        if status == 429:
+            TELEGRAM_RETRY_AFTER.inc(api_method)
+        return status, payload
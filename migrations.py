@@ -0,0 +1,126 @@
+# migrations.py
+# Versioned schema migrations. Har migration ek baar chalti hai aur uska
+# version schema_version table mein record hota hai. init_db() startup par
+# apply_migrations() chalata hai. Nayi migration hamesha list ke end mein add karein.
+
+import time
+
+# (version, description, steps) -- step ya to SQL string hai ya cursor lene wala function
+MIGRATIONS = [
+    (1, "Indexes for history lookups and leaderboards", [
+        "CREATE INDEX IF NOT EXISTS idx_balance_history_user_ts ON balance_history (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_user_history_user_type_ts ON user_history (user_id, type, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_user_history_user_ts ON user_history (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_users_balance ON users (balance)",
+        "CREATE INDEX IF NOT EXISTS idx_users_total_kills ON users (total_kills)",
+    ]),
+    (2, "Broadcast jobs and per-chat delivery progress", [
+        """
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT,                  -- ya to text, ya copy karne wala message
+            from_chat_id INTEGER,
+            message_id INTEGER,
+            status TEXT NOT NULL,       -- 'running', 'done', 'cancelled'
+            started_ts REAL NOT NULL,
+            finished_ts REAL,
+            sent INTEGER DEFAULT 0,
+            failed INTEGER DEFAULT 0,
+            pruned INTEGER DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS broadcast_deliveries (
+            broadcast_id INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            status TEXT NOT NULL,       -- 'sent', 'failed', 'pruned'
+            PRIMARY KEY (broadcast_id, chat_id)
+        ) WITHOUT ROWID
+        """,
+    ]),
+    (3, "Notification outbox for background DMs", [
+        """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,         -- 'rob', 'kill', 'tax', ...
+            text TEXT NOT NULL,
+            created_ts REAL NOT NULL,
+            next_attempt_ts REAL NOT NULL,
+            attempts INTEGER DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_outbox_next_attempt ON outbox (next_attempt_ts)",
+    ]),
+    (4, "Daily roll-up table for compacted balance history", [
+        """
+        CREATE TABLE IF NOT EXISTS balance_history_daily (
+            user_id INTEGER NOT NULL,
+            day_ts REAL NOT NULL,       -- us din ki local midnight (epoch)
+            type TEXT NOT NULL,
+            amount INTEGER NOT NULL,    -- us din ka total change
+            count INTEGER NOT NULL,     -- kitni raw rows mili
+            PRIMARY KEY (user_id, day_ts, type)
+        ) WITHOUT ROWID
+        """,
+    ]),
+    (5, "Bot-wide key/value state (daily reset boundary)", [
+        "CREATE TABLE IF NOT EXISTS bot_state (key TEXT PRIMARY KEY, value)",
+    ]),
+    (6, "Journal for writes that span several shards", [
+        """
+        CREATE TABLE IF NOT EXISTS shard_transfers (
+            id TEXT PRIMARY KEY,
+            writes TEXT NOT NULL,       -- JSON: {shard: [[sql, params], ...]} baaki shards ke statements
+            created_ts REAL NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS shard_transfers_applied (
+            id TEXT PRIMARY KEY,        -- is shard par yeh transfer commit ho chuka hai
+            applied_ts REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+    ]),
+]
+
+def current_version(conn):
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def apply_migrations(conn):
+    """Applies every pending migration, each in its own transaction."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_ts REAL NOT NULL
+        )
+    """)
+    conn.commit()
+
+    for version, description, steps in MIGRATIONS:
+        if version <= current_version(conn):
+            continue
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            # Dusre process ne beech mein yahi migration chala di ho to skip
+            if version <= current_version(conn):
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description, applied_ts) VALUES (?, ?, ?)",
+                (version, description, time.time())
+            )
+            conn.commit()
+            print(f"Applied migration {version}: {description}")
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
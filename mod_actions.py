@@ -6,6 +6,8 @@ from telegram.ext import ContextTypes
 from telegram.constants import ChatMemberStatus, ParseMode 
 import time
 
+from admin_cache import admin_cache, ADMIN_STATUSES
+
 # --- Helper Functions ---
 
 # Check if the user executing the command is an admin
@@ -17,8 +19,7 @@ async def is_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
         return False
         
     try:
-        member = await context.bot.get_chat_member(chat_id, user_id)
-        if member.status in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.CREATOR]:
+        if await admin_cache.is_admin(context.bot, chat_id, user_id):
             return True
         else:
             await update.message.reply_text("❌ You must be an admin to use this command.")
@@ -30,8 +31,7 @@ async def is_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
 # Check if the bot has admin rights (for ban/mute)
 async def bot_has_restrict_rights(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
     chat_id = update.effective_chat.id
-    bot_member = await context.bot.get_chat_member(chat_id, context.bot.id)
-    if not bot_member.can_restrict_members:
+    if not await admin_cache.bot_can(context.bot, chat_id, 'can_restrict_members'):
         await update.message.reply_text("❌ I need **'Ban Users'** permission to perform this action.", parse_mode=ParseMode.MARKDOWN)
         return False
     return True
@@ -137,8 +137,7 @@ async def pin_message_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     if not await is_admin(update, context): return
     if not update.message.reply_to_message: return await update.message.reply_text("❓ Reply to the message you want to pin.")
 
-    bot_member = await context.bot.get_chat_member(update.effective_chat.id, context.bot.id)
-    if not bot_member.can_pin_messages:
+    if not await admin_cache.bot_can(context.bot, update.effective_chat.id, 'can_pin_messages'):
         return await update.message.reply_text("❌ I need **'Pin Messages'** permission to pin messages.", parse_mode=ParseMode.MARKDOWN)
     
     message_to_pin = update.message.reply_to_message
@@ -158,8 +157,7 @@ async def promote_user_command(update: Update, context: ContextTypes.DEFAULT_TYP
     if not await is_admin(update, context): return
     if not update.message.reply_to_message: return await update.message.reply_text("❓ Reply to the user you want to promote.")
 
-    bot_member = await context.bot.get_chat_member(update.effective_chat.id, context.bot.id)
-    if not bot_member.can_promote_members:
+    if not await admin_cache.bot_can(context.bot, update.effective_chat.id, 'can_promote_members'):
         return await update.message.reply_text("❌ I need **'Add New Admins'** permission to promote users.", parse_mode=ParseMode.MARKDOWN)
 
     target = update.message.reply_to_message.from_user
@@ -178,6 +176,7 @@ async def promote_user_command(update: Update, context: ContextTypes.DEFAULT_TYP
             can_change_info=False,
             can_promote_members=False # Safety feature
         )
+        admin_cache.invalidate(update.effective_chat.id)
         await update.message.reply_text(f"👑 User **{target_name}** has been promoted to Admin!", parse_mode=ParseMode.MARKDOWN)
     except Exception as e:
         await update.message.reply_text(f"❌ Could not promote user. Error: {e}", parse_mode=ParseMode.MARKDOWN)
@@ -187,8 +186,7 @@ async def demote_user_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     if not await is_admin(update, context): return
     if not update.message.reply_to_message: return await update.message.reply_text("❓ Reply to the user you want to demote.")
 
-    bot_member = await context.bot.get_chat_member(update.effective_chat.id, context.bot.id)
-    if not bot_member.can_promote_members:
+    if not await admin_cache.bot_can(context.bot, update.effective_chat.id, 'can_promote_members'):
         return await update.message.reply_text("❌ I need **'Add New Admins'** permission to demote users.", parse_mode=ParseMode.MARKDOWN)
 
     target = update.message.reply_to_message.from_user
@@ -208,6 +206,7 @@ async def demote_user_command(update: Update, context: ContextTypes.DEFAULT_TYPE
             can_change_info=False,
             can_promote_members=False
         )
+        admin_cache.invalidate(update.effective_chat.id)
         await update.message.reply_text(f"📉 User **{target_name}** has been demoted.", parse_mode=ParseMode.MARKDOWN)
     except Exception as e:
         await update.message.reply_text(f"❌ Could not demote user. Error: {e}", parse_mode=ParseMode.MARKDOWN)
@@ -229,4 +228,37 @@ async def warn_user_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"User **{target_name}** has been warned by **{update.effective_user.first_name}**.\n"
         f"Reason: *{reason}*", 
         parse_mode=ParseMode.MARKDOWN
-    )
\ No newline at end of file
+    )
+
+# /adminlist command
+async def adminlist_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_chat.type == 'private':
+        return await update.message.reply_text("❌ This command must be used in a group.", parse_mode=ParseMode.MARKDOWN)
+
+    try:
+        admins = await admin_cache.get_admins(context.bot, update.effective_chat.id)
+    except Exception as e:
+        return await update.message.reply_text(f"❌ Could not fetch admin list. Error: {e}")
+
+    # Owner sabse upar, phir baaki admins; anonymous admins aur bots list mein nahi aate
+    members = sorted(
+        (m for m in admins.values() if not m.user.is_bot and not getattr(m, 'is_anonymous', False)),
+        key=lambda m: m.status != ChatMemberStatus.OWNER
+    )
+    reply_text = f"👮 **Admins in {update.effective_chat.title}** 👮\n\n"
+    for member in members:
+        icon = "👑" if member.status == ChatMemberStatus.OWNER else "🔹"
+        line = f"{icon} [{member.user.first_name}](tg://user?id={member.user.id})"
+        if member.custom_title:
+            line += f" — _{member.custom_title}_"
+        reply_text += line + "\n"
+
+    await update.message.reply_text(reply_text, parse_mode=ParseMode.MARKDOWN)
+
+# chat_member / my_chat_member updates: admin status badla to us chat ka cache hatao
+async def chat_member_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    change = update.chat_member or update.my_chat_member
+    if change is None:
+        return
+    if change.old_chat_member.status in ADMIN_STATUSES or change.new_chat_member.status in ADMIN_STATUSES:
+        admin_cache.invalidate(change.chat.id)
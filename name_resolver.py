@@ -0,0 +1,117 @@
+# name_resolver.py
+# Leaderboard / ownership output ke liye user_id -> (first_name, username).
+# Naam pehle memory cache se, phir user_history table se, aur aakhir mein
+# Telegram (get_chat) se aate hain. Telegram fetches parallel chalte hain
+# (concurrency cap ke saath) aur purane naam background mein refresh hote hain.
+
+import asyncio
+import time
+from collections import OrderedDict
+
+from async_db import get_latest_names
+from config import NAME_CACHE_SIZE, NAME_CACHE_TTL, NAME_FETCH_CONCURRENCY
+
+class NameResolver:
+    """Resolves user ids to (first_name, username), or None if unknown.
+
+    load_names is an async callable taking a list of user ids and returning
+    {user_id: (first_name, username, timestamp)} from local storage. Entries
+    older than ttl seconds are still served, but re-fetched in the background.
+    """
+
+    def __init__(self, load_names, maxsize, ttl, concurrency):
+        self.load_names = load_names
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.concurrency = concurrency
+        # user_id -> (name tuple ya None, fetched_ts)
+        self._names = OrderedDict()
+        self._semaphore = None
+        self._refreshing = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+
+    def remember(self, user_id, first_name, username=None, timestamp=None):
+        """Stores a name seen in an update, so it never has to be fetched."""
+        self._store(user_id, (first_name, username), timestamp or time.time())
+
+    def _store(self, user_id, name, timestamp):
+        if self.maxsize <= 0:
+            return
+        self._names[user_id] = (name, timestamp)
+        self._names.move_to_end(user_id)
+        while len(self._names) > self.maxsize:
+            self._names.popitem(last=False)
+
+    async def resolve(self, bot, user_ids):
+        """Returns {user_id: (first_name, username) or None} for every id."""
+        now = time.time()
+        result = {}
+        stale = []
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            entry = self._names.get(user_id)
+            if entry is None:
+                missing.append(user_id)
+                continue
+            self.hits += 1
+            self._names.move_to_end(user_id)
+            result[user_id] = entry[0]
+            if entry[1] + self.ttl < now:
+                stale.append(user_id)
+
+        if missing:
+            self.misses += len(missing)
+            try:
+                loaded = await self.load_names(missing)
+            except Exception as e:
+                print(f"Error loading cached names: {e}")
+                loaded = {}
+            for user_id, (first_name, username, timestamp) in loaded.items():
+                self._store(user_id, (first_name, username), timestamp)
+                result[user_id] = (first_name, username)
+                if timestamp + self.ttl < now:
+                    stale.append(user_id)
+            missing = [user_id for user_id in missing if user_id not in loaded]
+
+        if missing:
+            fetched = await asyncio.gather(*(self._fetch(bot, user_id) for user_id in missing))
+            result.update(zip(missing, fetched))
+
+        for user_id in stale:
+            self._refresh_later(bot, user_id)
+        return result
+
+    async def _fetch(self, bot, user_id):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            self.fetches += 1
+            try:
+                chat = await bot.get_chat(user_id)
+            except Exception:
+                # Refresh fail hua to purana naam rakho; unknown users bhi cache hote
+                # hain, taaki har render par dobara fetch na ho
+                entry = self._names.get(user_id)
+                name = entry[0] if entry is not None else None
+            else:
+                name = (chat.first_name, chat.username)
+        self._store(user_id, name, time.time())
+        return name
+
+    def _refresh_later(self, bot, user_id):
+        if user_id in self._refreshing:
+            return
+        task = asyncio.get_running_loop().create_task(self._fetch(bot, user_id))
+        self._refreshing[user_id] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(user_id, None))
+
+    def stats(self):
+        return {
+            'size': len(self._names), 'hits': self.hits, 'misses': self.misses,
+            'fetches': self.fetches, 'refreshing': len(self._refreshing),
+        }
+
+# Poore bot ka shared resolver (economy aur main isi ko use karte hain)
+name_resolver = NameResolver(get_latest_names, NAME_CACHE_SIZE, NAME_CACHE_TTL, NAME_FETCH_CONCURRENCY)
@@ -0,0 +1,140 @@
+# outbox.py
+# rob/kill/give ke DMs ka persistent outbox. Handlers sirf outbox table mein
+# row daal kar turant reply karte hain; ek background worker due rows ko
+# bhejta hai (retry + exponential backoff ke saath). Ek hi chat ke ek kind ke
+# kai pending notifications ek digest message ban jaate hain.
+
+import asyncio
+import time
+from itertools import groupby
+
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+
+from async_db import (
+    enqueue_notification, get_due_notifications, get_next_notification_ts,
+    delete_notifications, reschedule_notifications
+)
+from broadcast import retry_after_seconds
+from throttle import DM, lane
+from config import (
+    OUTBOX_CONCURRENCY, OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_BASE,
+    OUTBOX_IDLE_POLL, OUTBOX_DIGEST_WINDOWS
+)
+
+# Telegram ki 4096 char limit se thoda kam, header ke liye jagah
+MAX_DIGEST_LENGTH = 3800
+
+class NotificationOutbox:
+    """Queues DMs in the outbox table and delivers them from a background task."""
+
+    def __init__(self, concurrency, batch_size, max_attempts, retry_base, idle_poll, digest_windows):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.idle_poll = idle_poll
+        self.digest_windows = digest_windows
+        self._wake = asyncio.Event()
+        self._task = None
+        self.sent = 0
+        self.dropped = 0
+        self.retried = 0
+
+    async def notify(self, chat_id, kind, text):
+        """Queues a Markdown DM to chat_id; returns once it is stored, not sent."""
+        await enqueue_notification(chat_id, kind, text, self.digest_windows.get(kind, 0.0))
+        self._wake.set()
+
+    def start(self, bot):
+        if self._task is None or self._task.done():
+            # DMs handler replies ke baad, broadcast se pehle
+            with lane(DM):
+                self._task = asyncio.get_running_loop().create_task(self._run(bot))
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self, bot):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(chat_id, rows):
+            async with semaphore:
+                await self._send_digest(bot, chat_id, rows)
+
+        while True:
+            self._wake.clear()
+            try:
+                rows = await get_due_notifications(self.batch_size)
+                if rows:
+                    rows = sorted(rows, key=lambda row: (row[1], row[2], row[0]))
+                    await asyncio.gather(*(
+                        send(chat_id, list(group))
+                        for (chat_id, _), group in groupby(rows, key=lambda row: (row[1], row[2]))
+                    ))
+                    continue
+                next_ts = await get_next_notification_ts()
+            except Exception as e:
+                print(f"Error processing notification outbox: {e}")
+                next_ts = None
+
+            timeout = self.idle_poll if next_ts is None else min(self.idle_poll, max(0.0, next_ts - time.time()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send_digest(self, bot, chat_id, rows):
+        # Digest ko chunks mein todo taaki har message length limit ke andar rahe
+        chunk = []
+        length = 0
+        for row in rows:
+            if chunk and length + len(row[3]) > MAX_DIGEST_LENGTH:
+                await self._send_chunk(bot, chat_id, chunk)
+                chunk, length = [], 0
+            chunk.append(row)
+            length += len(row[3]) + 2
+        if chunk:
+            await self._send_chunk(bot, chat_id, chunk)
+
+    async def _send_chunk(self, bot, chat_id, rows):
+        ids = [row[0] for row in rows]
+        if len(rows) == 1:
+            text = rows[0][3]
+        else:
+            text = f"📬 **{len(rows)} new notifications**\n\n" + "\n\n".join(row[3] for row in rows)
+
+        try:
+            await bot.send_message(chat_id=chat_id, text=text, parse_mode=ParseMode.MARKDOWN)
+        except RetryAfter as e:
+            self.retried += len(ids)
+            await reschedule_notifications(ids, time.time() + retry_after_seconds(e))
+            return
+        except (Forbidden, BadRequest) as e:
+            # User ne bot block kiya / kabhi start nahi kiya: retry ka fayda nahi
+            print(f"Dropping {len(ids)} notification(s) to {chat_id}: {e}")
+            self.dropped += len(ids)
+            await delete_notifications(ids)
+            return
+        except TelegramError as e:
+            attempts = max(row[4] for row in rows) + 1
+            if attempts >= self.max_attempts:
+                print(f"Dropping {len(ids)} notification(s) to {chat_id} after {attempts} attempts: {e}")
+                self.dropped += len(ids)
+                await delete_notifications(ids)
+            else:
+                self.retried += len(ids)
+                await reschedule_notifications(ids, time.time() + self.retry_base * 2 ** attempts)
+            return
+        self.sent += len(ids)
+        await delete_notifications(ids)
+
+    def stats(self):
+        return {'sent': self.sent, 'dropped': self.dropped, 'retried': self.retried}
+
+outbox = NotificationOutbox(
+    OUTBOX_CONCURRENCY, OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_BASE,
+    OUTBOX_IDLE_POLL, OUTBOX_DIGEST_WINDOWS
+)
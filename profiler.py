@@ -0,0 +1,181 @@
+# profiler.py
+# Owner ka /profile: live bot par ek sampling profiler chalata hai. Ek
+# background thread har PROFILE_SAMPLE_INTERVAL par event loop thread ka stack
+# dekhta hai, pata karta hai kaunsa command handler chal raha hai, aur us
+# handler ke hisaab se hot functions ginta hai. Window khatam hone par owner
+# ko report DM hoti hai. Band hone par koi thread ya hook nahi chalta.
+
+import asyncio
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+
+from config import BOT_OWNER_ID, PROFILE_SAMPLE_INTERVAL, PROFILE_MAX_SECONDS, PROFILE_TOP_FUNCTIONS
+from metrics import handler_name
+
+# async_db executor ("db...") aur in background threads ke samples is naam se gine jaate hain
+BACKGROUND_BUCKET = "<db threads>"
+BACKGROUND_THREADS = frozenset({"history-compactor"})
+IDLE_BUCKET = "<event loop, no handler>"
+
+def _function_key(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno} {getattr(code, 'co_qualname', code.co_name)}"
+
+class SamplingProfiler:
+    """Samples thread stacks and aggregates them per command handler."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.active = False
+        self.updates_seen = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._handler_codes = {}
+        self._loop_thread_id = None
+        self._samples = Counter()                  # handler -> samples
+        self._self_samples = defaultdict(Counter)  # handler -> innermost function -> samples
+        self._total_samples = defaultdict(Counter) # handler -> function anywhere on stack -> samples
+
+    def start(self, application):
+        # Har registered handler ke original function ka code object -> uska naam
+        self._handler_codes = {}
+        for handlers in application.handlers.values():
+            for handler in handlers:
+                self._handler_codes[inspect.unwrap(handler.callback).__code__] = handler_name(handler)
+        self._samples.clear()
+        self._self_samples.clear()
+        self._total_samples.clear()
+        self.updates_seen = 0
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self.active = True
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.active:
+            return
+        self.active = False
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.monotonic() - self._started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            background = {
+                thread.ident for thread in threading.enumerate()
+                if thread.name.startswith("db") or thread.name in BACKGROUND_THREADS
+            }
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self._loop_thread_id:
+                    self._sample_loop(frame)
+                elif thread_id in background:
+                    self._record(BACKGROUND_BUCKET, frame)
+
+    def _sample_loop(self, frame):
+        # Stack mein sabse andar wala registered handler hi is sample ka owner hai
+        handler = IDLE_BUCKET
+        walker = frame
+        while walker is not None:
+            name = self._handler_codes.get(walker.f_code)
+            if name is not None:
+                handler = name
+                break
+            walker = walker.f_back
+        self._record(handler, frame)
+
+    def _record(self, handler, frame):
+        self._samples[handler] += 1
+        self._self_samples[handler][_function_key(frame.f_code)] += 1
+        seen = set()
+        while frame is not None:
+            key = _function_key(frame.f_code)
+            if key not in seen:
+                seen.add(key)
+                self._total_samples[handler][key] += 1
+            frame = frame.f_back
+
+    def report(self, top):
+        lines = [
+            f"Profile: {self.elapsed:.1f}s, {self.updates_seen} updates, "
+            f"{sum(self._samples.values())} samples every {self.interval * 1000:.0f}ms", ""
+        ]
+        for handler, samples in self._samples.most_common():
+            lines.append(f"{handler} -- {samples} samples (~{samples * self.interval * 1000:.0f}ms)")
+            lines.append("  self:")
+            for key, count in self._self_samples[handler].most_common(top):
+                lines.append(f"    {count:>5}  {key}")
+            lines.append("  total:")
+            for key, count in self._total_samples[handler].most_common(top):
+                lines.append(f"    {count:>5}  {key}")
+            lines.append("")
+        return lines
+
+profiler = SamplingProfiler(PROFILE_SAMPLE_INTERVAL)
+
+async def count_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Counts updates while profiling (group -1; does nothing when off)."""
+    if profiler.active:
+        profiler.updates_seen += 1
+
+async def _finish_after(bot, seconds, max_updates):
+    deadline = time.monotonic() + seconds
+    while profiler.active and time.monotonic() < deadline:
+        if max_updates and profiler.updates_seen >= max_updates:
+            break
+        await asyncio.sleep(0.5)
+    if not profiler.active:
+        return  # /profile stop ne pehle hi report bhej di
+    profiler.stop()
+    await _send_report(bot)
+
+async def _send_report(bot):
+    # Telegram message limit ke andar chunks mein bhejo
+    chunk = []
+    length = 0
+    chunks = []
+    for line in profiler.report(PROFILE_TOP_FUNCTIONS):
+        if length + len(line) > 3500:
+            chunks.append(chunk)
+            chunk, length = [], 0
+        chunk.append(line)
+        length += len(line) + 1
+    chunks.append(chunk)
+    for lines in chunks:
+        try:
+            await bot.send_message(chat_id=BOT_OWNER_ID, text="```\n" + "\n".join(lines) + "\n```", parse_mode=ParseMode.MARKDOWN)
+        except Exception as e:
+            print(f"Error sending profile report to owner: {e}")
+
+# /profile [seconds] [max_updates] ya /profile stop
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id != BOT_OWNER_ID:
+        return await update.message.reply_text("❌ You are not the bot owner.", parse_mode=ParseMode.MARKDOWN)
+
+    if context.args and context.args[0].lower() == 'stop':
+        if not profiler.active:
+            return await update.message.reply_text("❌ Profiler is not running.")
+        profiler.stop()
+        await update.message.reply_text("🛑 Profiler stopped. Sending report...")
+        return await _send_report(context.bot)
+
+    if profiler.active:
+        return await update.message.reply_text("⏳ Profiler is already running. Use `/profile stop` to end it.", parse_mode=ParseMode.MARKDOWN)
+
+    if any(not arg.isdigit() for arg in context.args):
+        return await update.message.reply_text("❓ Usage: `/profile [seconds] [max_updates]` or `/profile stop`", parse_mode=ParseMode.MARKDOWN)
+    seconds = min(int(context.args[0]), PROFILE_MAX_SECONDS) if context.args else 30
+    max_updates = int(context.args[1]) if len(context.args) > 1 else 0
+
+    profiler.start(context.application)
+    context.application.create_task(_finish_after(context.bot, seconds, max_updates))
+    limit = f" or {max_updates} updates" if max_updates else ""
+    await update.message.reply_text(f"🔬 Profiling for **{seconds}s**{limit}. The report will be sent to you in DM.", parse_mode=ParseMode.MARKDOWN)
@@ -0,0 +1,113 @@
+# storage.py
+# database.py ke neeche ka storage layer. Backend batata hai ki kitne shards
+# hain, kaunsa user kis shard mein rehta hai, aur kisi shard ka naya SQLite
+# connection kaise khulta hai. Shard 0 "main" hai: groups, broadcasts, outbox
+# aur bot_state hamesha wahin rehte hain; users aur unki (name/balance)
+# history user_id ke hisaab se apne shard mein. Har shard ka apna writer lock
+# hota hai, isliye alag shards ke writes ek doosre ka wait nahi karte.
+
+import itertools
+import os
+import sqlite3
+
+from config import DB_NAME, DB_BACKEND, DB_SHARDS, DB_BUSY_TIMEOUT_MS, DB_STATEMENT_CACHE_SIZE, DB_CACHE_SIZE_KB
+
+MAIN_SHARD = 0
+
+def _connect(target, uri=False, wal=True):
+    conn = sqlite3.connect(
+        target,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=DB_STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+        uri=uri,
+    )
+    # Naye database files incremental auto-vacuum ke saath bante hain (compaction ke baad
+    # free pages wapas dene ke liye); purani files par yeh pragma koi asar nahi karta
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    if wal:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT_MS)}")
+    conn.execute(f"PRAGMA cache_size = -{int(DB_CACHE_SIZE_KB)}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+class ShardedBackend:
+    """Users spread over several SQLite files by user_id.
+
+    Shard 0 is path itself; shard N is "<root>.shardN<ext>" next to it.
+    """
+
+    def __init__(self, path, shards):
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.path = path
+        self.shards = shards
+
+    def shard_for(self, user_id):
+        return user_id % self.shards
+
+    def path_for(self, shard):
+        if shard == MAIN_SHARD:
+            return self.path
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.shard{shard}{ext}"
+
+    def connect(self, shard):
+        # shards se bada index bhi chalta hai: shard count ghatne par purani files se users wapas laane ke liye
+        return _connect(self.path_for(shard))
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r}, shards={self.shards})"
+
+class FileBackend(ShardedBackend):
+    """Everything in the single DB_NAME file (the default)."""
+
+    def __init__(self, path):
+        super().__init__(path, 1)
+
+class MemoryBackend:
+    """Databases that live only in this process's memory, for tests and benchmarks.
+
+    Uses SQLite's memdb VFS, so every thread's connection sees the same data
+    (normal locking; no WAL). The data is gone once close() is called.
+    """
+
+    _ids = itertools.count()
+
+    def __init__(self, shards=1):
+        self.shards = shards
+        self._name = f"bot-{os.getpid()}-{next(self._ids)}"
+        # memdb database tab tak zinda rehta hai jab tak uska koi connection khula hai
+        self._keepers = {}
+
+    def shard_for(self, user_id):
+        return user_id % self.shards
+
+    def connect(self, shard):
+        target = f"file:/{self._name}-{shard}?vfs=memdb"
+        if shard not in self._keepers:
+            self._keepers[shard] = _connect(target, uri=True, wal=False)
+        return _connect(target, uri=True, wal=False)
+
+    def close(self):
+        for conn in self._keepers.values():
+            conn.close()
+        self._keepers.clear()
+
+    def __repr__(self):
+        return f"MemoryBackend(shards={self.shards})"
+
+def make_backend(kind=DB_BACKEND, path=DB_NAME, shards=DB_SHARDS):
+    if kind == "file":
+        return FileBackend(path)
+    if kind == "sharded":
+        return ShardedBackend(path, shards)
+    if kind == "memory":
+        return MemoryBackend(shards)
+    raise ValueError(f"Unknown DB_BACKEND: {kind!r}")
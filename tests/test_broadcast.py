@@ -0,0 +1,81 @@
+# tests/test_broadcast.py
+# Broadcaster ki progress: stop ya crash ke baad koi chat dobara message nahi paati.
+
+import asyncio
+import unittest
+
+import database
+import storage
+from broadcast import Broadcaster
+from config import BOT_OWNER_ID
+
+GROUPS = 300
+
+class FakeBot:
+    def __init__(self, explode_at=None):
+        self.delivered = []
+        self.owner_messages = []
+        self.explode_at = explode_at
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if chat_id == BOT_OWNER_ID:
+            self.owner_messages.append(text)
+            return
+        await asyncio.sleep(0.001)
+        if chat_id == self.explode_at:
+            raise RuntimeError("boom")
+        self.delivered.append(chat_id)
+
+class BroadcasterTest(unittest.TestCase):
+    def setUp(self):
+        database.set_backend(storage.MemoryBackend())
+        database.init_db()
+        for chat_id in range(-GROUPS, 0):
+            database.add_group_to_db(chat_id, 1)
+        self.broadcast_id = database.create_broadcast(text="hi")
+
+    def tearDown(self):
+        database.close_connections()
+
+    def broadcaster(self):
+        return Broadcaster(rate=10000, concurrency=20, page_size=100, record_batch=20, max_retries=0)
+
+    def row(self):
+        broadcast_id, _, _, _, status, _, _, sent, failed, pruned = database.get_broadcast(self.broadcast_id)
+        return status, sent, failed, pruned
+
+    def test_stop_mid_page_then_resume_sends_each_chat_once(self):
+        bot = FakeBot()
+
+        async def run():
+            broadcaster = self.broadcaster()
+            broadcaster.start(bot, database.get_broadcast(self.broadcast_id))
+            await asyncio.sleep(0.05)
+            await broadcaster.stop()
+            self.assertEqual(self.row()[1], len(bot.delivered))
+            self.assertLess(len(bot.delivered), GROUPS)
+            broadcaster.start(bot, database.get_broadcast(self.broadcast_id))
+            await broadcaster._task
+
+        asyncio.run(run())
+        self.assertEqual(sorted(bot.delivered), list(range(-GROUPS, 0)))
+        self.assertEqual(self.row(), ('done', GROUPS, 0, 0))
+        self.assertEqual(len(bot.owner_messages), 1)
+
+    def test_unexpected_error_saves_progress_and_tells_the_owner(self):
+        bot = FakeBot(explode_at=-GROUPS + 150)
+
+        async def run():
+            broadcaster = self.broadcaster()
+            broadcaster.start(bot, database.get_broadcast(self.broadcast_id))
+            await broadcaster._task
+
+        asyncio.run(run())
+        status, sent, _, _ = self.row()
+        self.assertEqual(status, 'failed')
+        self.assertEqual(sent, len(bot.delivered))
+        self.assertEqual(len(bot.owner_messages), 1)
+        self.assertIn("failed", bot.owner_messages[0])
+
+if __name__ == '__main__':
+    unittest.main()
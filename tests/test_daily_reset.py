@@ -0,0 +1,44 @@
+# tests/test_daily_reset.py
+# Daily reset job late/miss ho ya DST par ghanta aage-peeche chale, naya din phir bhi sahi waqt par.
+
+import time
+import unittest
+from unittest import mock
+
+import database
+import storage
+
+class DailyResetTest(unittest.TestCase):
+    def setUp(self):
+        database.set_backend(storage.MemoryBackend())
+        database.init_db()
+
+    def tearDown(self):
+        database.close_connections()
+
+    def test_day_rolls_over_without_the_job(self):
+        today = database.day_start()
+        database.set_user_data(1, revive_count=2)
+        self.assertFalse(database.new_day_due())
+
+        later = today + 30 * 3600  # agle bot-day ke andar, job kabhi nahi chala
+        with mock.patch.object(database.time, 'time', return_value=later):
+            tomorrow = database.day_start()
+            self.assertGreater(tomorrow, today)
+            self.assertLessEqual(tomorrow, later)
+            self.assertTrue(database.new_day_due())
+            self.assertTrue(database.reset_daily_counters())
+            self.assertFalse(database.new_day_due())
+            self.assertEqual(database.day_start(), tomorrow)
+        self.assertEqual(database.get_user_data(1).revive_count, 0)
+
+    def test_early_job_does_not_start_the_day(self):
+        today = database.day_start()
+        # DST ki wajah se job boundary se ek ghanta pehle chala
+        with mock.patch.object(database.time, 'time', return_value=database._next_day_start - 3600):
+            self.assertFalse(database.reset_daily_counters())
+            self.assertEqual(database.day_start(), today)
+            self.assertFalse(database.new_day_due())
+
+if __name__ == '__main__':
+    unittest.main()
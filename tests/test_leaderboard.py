@@ -0,0 +1,50 @@
+# tests/test_leaderboard.py
+# Bounded top-K leaderboard: random writes ke baad bhi top() poori ranking ka sahi prefix.
+
+import random
+import unittest
+
+from leaderboard import Leaderboard
+
+class LeaderboardTest(unittest.TestCase):
+    def setUp(self):
+        self.values = {}
+        self.loads = 0
+
+    def expected(self, limit):
+        return sorted(self.values.items(), key=lambda row: (-row[1], row[0]))[:limit]
+
+    def load_top(self, limit):
+        self.loads += 1
+        return self.expected(limit)
+
+    def write(self, board, user_id, value):
+        self.values[user_id] = value
+        board.set(user_id, value)
+
+    def test_random_writes_match_a_full_sort(self):
+        rng = random.Random(7)
+        for user_id in range(200):
+            self.values[user_id] = rng.randrange(1000)
+        board = Leaderboard('balance', size=20)
+        board.seed(self.load_top)
+        for _ in range(5000):
+            user_id = rng.randrange(250)
+            # Zyada writes neeche jaate hain, taaki top ke log board se girein
+            self.write(board, user_id, rng.randrange(600) if rng.random() < 0.7 else rng.randrange(2000))
+            self.assertLessEqual(len(board._values), 20)
+            limit = rng.choice((1, 10, 20))
+            self.assertEqual(board.top(limit), self.expected(limit))
+        self.assertGreater(self.loads, 1)  # seed ke baad refills bhi hue
+
+    def test_small_table_takes_every_new_user(self):
+        self.values = {1: 100, 2: 50}
+        board = Leaderboard('balance', size=5)
+        board.seed(self.load_top)
+        for user_id in range(3, 9):
+            self.write(board, user_id, 10 * user_id)
+        self.assertEqual(board.top(5), self.expected(5))
+        self.assertEqual(self.loads, 1)  # sirf seed, koi refill nahi
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+# tests/test_metrics.py
+# Handler timing: ApplicationHandlerStop error nahi ginta, asli exceptions ginte hain.
+
+import asyncio
+import unittest
+
+from telegram.ext import ApplicationHandlerStop
+
+import metrics
+
+async def flood_guard(update, context):
+    raise ApplicationHandlerStop
+
+async def broken(update, context):
+    raise RuntimeError("boom")
+
+def _count(counter, name):
+    return counter._values.get((name,), 0)
+
+class TimedCallbackTest(unittest.TestCase):
+    def run_wrapped(self, callback):
+        wrapper = metrics._timed_callback(callback.__name__, callback)
+        return asyncio.run(wrapper(None, None))
+
+    def test_handler_stop_is_not_an_error(self):
+        errors = _count(metrics.COMMAND_ERRORS, 'flood_guard')
+        requests = _count(metrics.COMMAND_REQUESTS, 'flood_guard')
+        with self.assertRaises(ApplicationHandlerStop):
+            self.run_wrapped(flood_guard)
+        self.assertEqual(_count(metrics.COMMAND_ERRORS, 'flood_guard'), errors)
+        self.assertEqual(_count(metrics.COMMAND_REQUESTS, 'flood_guard'), requests + 1)
+
+    def test_exceptions_are_counted(self):
+        errors = _count(metrics.COMMAND_ERRORS, 'broken')
+        with self.assertRaises(RuntimeError):
+            self.run_wrapped(broken)
+        self.assertEqual(_count(metrics.COMMAND_ERRORS, 'broken'), errors + 1)
+
+if __name__ == '__main__':
+    unittest.main()
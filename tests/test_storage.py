@@ -0,0 +1,182 @@
+# tests/test_storage.py
+# Sharded storage ke cross-shard writes aur rebalance, memory backend par.
+# Chalane ke liye repo root se: python -m pytest -q (ya python -m unittest discover tests)
+
+import unittest
+from unittest import mock
+
+import database
+import storage
+
+class CommitCrash(Exception):
+    pass
+
+class CrashOnCommit:
+    """Connection proxy whose commit() fails, like a process dying before that shard commits."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def commit(self):
+        raise CommitCrash()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def _use(backend):
+    database.set_backend(backend)
+    database.user_cache.clear()
+    for board in database.leaderboards.values():
+        board.reset()
+    database.init_db()
+
+def _row(user_id, sql):
+    return database.query_one(sql, (user_id,), database._shard(user_id))
+
+def _balance(user_id):
+    return _row(user_id, "SELECT balance FROM users WHERE user_id = ?")[0]
+
+def _history_count(user_id):
+    return _row(user_id, "SELECT COUNT(*) FROM balance_history WHERE user_id = ?")[0]
+
+def _journal():
+    return [
+        row[0] for shard in range(database.backend.shards)
+        for row in database.query_all("SELECT id FROM shard_transfers", shard=shard)
+    ]
+
+class ShardedLedgerTest(unittest.TestCase):
+    # 4 shards: user 1 shard 1 (coordinator), user 2 shard 2
+    SENDER = 1
+    RECEIVER = 2
+
+    def setUp(self):
+        _use(storage.MemoryBackend(shards=4))
+        database.set_user_data(self.SENDER, balance=500)
+        database.set_user_data(self.RECEIVER, balance=100)
+
+    def tearDown(self):
+        database.close_connections()
+
+    def transfer(self, amount, require=None):
+        return database.apply_ledger(
+            [(self.SENDER, 'give', -amount, str(self.RECEIVER)), (self.RECEIVER, 'receive', amount, str(self.SENDER))],
+            require=require
+        )
+
+    def test_crash_between_shard_commits_is_completed_by_recovery(self):
+        real_get_connection = database.get_connection
+
+        def get_connection(shard=database.MAIN_SHARD):
+            conn = real_get_connection(shard)
+            return CrashOnCommit(conn) if shard == database._shard(self.RECEIVER) else conn
+
+        with mock.patch.object(database, 'get_connection', get_connection):
+            with self.assertRaises(CommitCrash):
+                self.transfer(200)
+
+        # Commit point (coordinator) ho chuka, receiver ka shard abhi purana
+        self.assertEqual(_balance(self.SENDER), 300)
+        self.assertEqual(_balance(self.RECEIVER), 100)
+        self.assertEqual(_history_count(self.RECEIVER), 0)
+        self.assertEqual(len(_journal()), 1)
+
+        database.recover_transfers(range(database.backend.shards))
+
+        self.assertEqual(_balance(self.SENDER), 300)
+        self.assertEqual(_balance(self.RECEIVER), 300)
+        self.assertEqual(_history_count(self.SENDER), 1)
+        self.assertEqual(_history_count(self.RECEIVER), 1)
+        self.assertEqual(_journal(), [])
+
+        # Dobara recovery kuch dobara apply nahi karti
+        database.recover_transfers(range(database.backend.shards))
+        self.assertEqual(_balance(self.RECEIVER), 300)
+        self.assertEqual(_history_count(self.RECEIVER), 1)
+
+    def test_housekeeping_recovers_old_journal_rows_and_prunes_markers(self):
+        real_get_connection = database.get_connection
+
+        def get_connection(shard=database.MAIN_SHARD):
+            conn = real_get_connection(shard)
+            return CrashOnCommit(conn) if shard == database._shard(self.RECEIVER) else conn
+
+        with mock.patch.object(database, 'get_connection', get_connection):
+            with self.assertRaises(CommitCrash):
+                self.transfer(200)
+        self.assertTrue(self.transfer(50))
+        markers = "SELECT COUNT(*) FROM shard_transfers_applied"
+        self.assertEqual(database.query_one(markers, shard=database._shard(self.RECEIVER))[0], 1)
+
+        # Abhi naya hai: ho sakta hai uska writer cleanup kar hi raha ho
+        database._housekeep()
+        self.assertEqual(len(_journal()), 1)
+        self.assertEqual(_balance(self.RECEIVER), 150)
+
+        later = database.time.time() + database.TRANSFER_MARKER_TTL + 1
+        with mock.patch.object(database.time, 'time', return_value=later):
+            database._housekeep()
+        self.assertEqual(_journal(), [])
+        self.assertEqual(_balance(self.RECEIVER), 350)
+        # Purana marker prune hua; bacha sirf abhi replay hue transfer ka naya marker
+        self.assertEqual(database.query_one(markers, shard=database._shard(self.RECEIVER))[0], 1)
+
+    def test_rejected_require_leaves_both_shards_unchanged(self):
+        seen = []
+
+        def require(states, now):
+            seen.append(sorted(states))
+            return False
+
+        self.assertFalse(self.transfer(200, require))
+        self.assertEqual(seen, [[self.SENDER, self.RECEIVER]])
+        self.assertEqual(_balance(self.SENDER), 500)
+        self.assertEqual(_balance(self.RECEIVER), 100)
+        self.assertEqual(_history_count(self.SENDER), 0)
+        self.assertEqual(_history_count(self.RECEIVER), 0)
+        self.assertEqual(_journal(), [])
+
+    def test_insufficient_balance_is_rejected(self):
+        self.assertFalse(self.transfer(501))
+        self.assertEqual(_balance(self.SENDER), 500)
+        self.assertEqual(_balance(self.RECEIVER), 100)
+
+class RebalanceTest(unittest.TestCase):
+    USERS = range(1, 13)
+
+    def tearDown(self):
+        database.close_connections()
+
+    def test_rebalance_from_four_to_two_shards_keeps_balances_and_history(self):
+        old = storage.MemoryBackend(shards=4)
+        _use(old)
+        for user_id in self.USERS:
+            database.set_user_data(user_id, balance=1000 + user_id)
+            database.log_name_change(user_id, 'name', f"user {user_id}")
+            self.assertTrue(database.apply_ledger([(user_id, 'daily', user_id, "")]))
+        before = {
+            user_id: (_balance(user_id), database.get_balance_history(user_id), database.get_user_history(user_id))
+            for user_id in self.USERS
+        }
+
+        # Wahi memdb databases, ab 2 shards; naye backend ke keepers purane data ko zinda rakhte hain
+        new = storage.MemoryBackend(shards=2)
+        new._name = old._name
+        for shard in range(old.shards):
+            new.connect(shard).close()
+        _use(new)
+
+        self.assertEqual(database._recorded_shards(), 2)
+        self.assertEqual(_journal(), [])
+        for user_id in self.USERS:
+            self.assertEqual(
+                (_balance(user_id), database.get_balance_history(user_id), database.get_user_history(user_id)),
+                before[user_id]
+            )
+        # Shard 2 aur 3 mein koi user nahi bacha
+        for shard in (2, 3):
+            for table in ('users', 'user_history', 'balance_history'):
+                self.assertEqual(database.query_one(f"SELECT COUNT(*) FROM {table}", shard=shard)[0], 0)
+
+if __name__ == '__main__':
+    unittest.main()
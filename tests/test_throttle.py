@@ -0,0 +1,59 @@
+# tests/test_throttle.py
+# ThrottledRequest ke 429 retries: handler replies chhote waits tak, DMs/broadcast lambe tak.
+
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from telegram.request import HTTPXRequest, RequestData
+from telegram.request._requestparameter import RequestParameter
+
+import throttle
+from config import THROTTLE_MAX_CHAT_WAIT, THROTTLE_MAX_RETRY_WAIT
+
+def _retry_after(seconds):
+    return 429, json.dumps({'ok': False, 'error_code': 429, 'parameters': {'retry_after': seconds}}).encode()
+
+class RetryTest(unittest.TestCase):
+    def send(self, priority, responses, chat_id=12345):
+        """Sends one message in lane priority; returns (status, sleeps, calls)."""
+        calls = []
+        sleeps = []
+
+        async def do_request(request, url, method, request_data=None, *args, **kwargs):
+            calls.append(url)
+            return responses.pop(0) if responses else (200, b'{"ok":true,"result":true}')
+
+        async def sleep(seconds):
+            sleeps.append(seconds)
+
+        async def run():
+            request = throttle.ThrottledRequest()
+            data = RequestData([RequestParameter('chat_id', chat_id, None)])
+            with throttle.lane(priority):
+                return await request.do_request('https://api.telegram.org/botX/sendMessage', 'POST', data)
+
+        with mock.patch.object(HTTPXRequest, 'do_request', do_request), \
+                mock.patch.object(throttle.asyncio, 'sleep', sleep), \
+                mock.patch.object(throttle, 'throttle', throttle.Throttle(1000, 1000, 1000, 1000, 1000, 1000, 0)):
+            status, _ = asyncio.run(run())
+        return status, sleeps, len(calls)
+
+    def test_reply_gives_up_on_a_long_retry_after(self):
+        status, sleeps, calls = self.send(throttle.REPLY, [_retry_after(THROTTLE_MAX_CHAT_WAIT + 1)])
+        self.assertEqual((status, sleeps, calls), (429, [], 1))
+
+    def test_reply_retries_only_within_its_total_wait(self):
+        wait = THROTTLE_MAX_CHAT_WAIT * 0.6
+        status, sleeps, calls = self.send(throttle.REPLY, [_retry_after(wait), _retry_after(wait)])
+        self.assertEqual((status, sleeps, calls), (429, [wait], 2))
+
+    def test_dm_and_broadcast_wait_longer(self):
+        wait = THROTTLE_MAX_RETRY_WAIT - 1
+        for priority in (throttle.DM, throttle.BROADCAST):
+            status, sleeps, calls = self.send(priority, [_retry_after(wait), _retry_after(wait)])
+            self.assertEqual((status, sleeps, calls), (200, [wait, wait], 3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+# tests/test_workers.py
+# Ingress routing: chat ka worker, aur /broadcast hamesha primary worker mein.
+
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import keep_alive
+import workers
+
+def _message(chat_id, text):
+    entities = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}] if text.startswith('/') else []
+    return {'update_id': 1, 'message': {'chat': {'id': chat_id}, 'from': {'id': 7}, 'text': text, 'entities': entities}}
+
+class _Recorder:
+    def __init__(self, index, routed):
+        self.index = index
+        self.routed = routed
+
+    def put(self, raw):
+        self.routed.append(self.index)
+
+class RouteTest(unittest.TestCase):
+    COUNT = 3
+
+    def setUp(self):
+        self.routed = []
+        self.router = workers.UpdateRouter(self.COUNT, target=None)
+        # Worker processes nahi chahiye; sirf dekhna hai ki update kis queue mein gaya
+        self.router.queues = [_Recorder(index, self.routed) for index in range(self.COUNT)]
+
+    def test_updates_go_to_their_chats_worker(self):
+        for chat_id in range(-6, 0):
+            self.router.route(_message(chat_id, "/bal"))
+            self.router.route(_message(chat_id, "hello"))
+        self.assertEqual(self.routed, [workers.worker_for(chat_id, self.COUNT) for chat_id in range(-6, 0) for _ in range(2)])
+
+    def test_broadcast_goes_to_the_primary_worker_from_any_chat(self):
+        primary = workers.primary_worker(self.COUNT)
+        for chat_id in range(-6, 0):
+            self.router.route(_message(chat_id, "/broadcast@MyBot status"))
+        self.assertEqual(self.routed, [primary] * 6)
+
+    def test_command_key(self):
+        self.assertEqual(workers.command_key(_message(-1, "/Broadcast@MyBot hi")), 'broadcast')
+        self.assertIsNone(workers.command_key(_message(-1, "hi /broadcast")))
+        self.assertIsNone(workers.command_key({'update_id': 1, 'my_chat_member': {'chat': {'id': -1}}}))
+
+class WebhookTest(unittest.TestCase):
+    SECRET = "s3cret"
+
+    def setUp(self):
+        self.received = []
+
+        async def on_update(raw):
+            self.received.append(raw['message']['chat']['id'])
+
+        workers.webhook_route(on_update)
+        self.handler = keep_alive.ROUTES[('POST', workers.WEBHOOK_PATH)]
+
+    def post(self, body, token=SECRET):
+        request = keep_alive.Request('POST', workers.WEBHOOK_PATH, {'x-telegram-bot-api-secret-token': token}, body)
+        with mock.patch.object(workers, 'WEBHOOK_SECRET', self.SECRET):
+            return asyncio.run(self.handler(request))[0]
+
+    def test_valid_update_is_handed_on(self):
+        self.assertEqual(self.post(json.dumps(_message(-1, "hi")).encode()), 200)
+        self.assertEqual(self.received, [-1])
+
+    def test_wrong_secret_is_forbidden(self):
+        self.assertEqual(self.post(json.dumps(_message(-1, "hi")).encode(), token="nope"), 403)
+        self.assertEqual(self.received, [])
+
+    def test_bad_body_is_rejected(self):
+        self.assertEqual(self.post(b"not json"), 400)
+        self.assertEqual(self.post(json.dumps({'update_id': 2}).encode()), 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+# throttle.py
+# Bot ke outgoing Bot API calls ka traffic shaper (ThrottledRequest, bot ke
+# request path par). Message bhejne/badalne wale calls pehle apne chat ka
+# budget lete hain (group aur private chats ki alag limits), phir ek global
+# token bucket se slot -- jahan intezaar karne wale lane ke hisaab se aage
+# badhte hain: handler replies pehle, outbox DMs uske baad, broadcast sabse
+# aakhir mein. Telegram 429 (RetryAfter) de to us chat ko (ya sabko) utni der
+# rok kar call khud dobara hoti hai (handler replies sirf chhote waits tak), aur
+# global rate thoda ghat jaata hai; successful sends ke saath woh dheere dheere
+# wapas badhta hai.
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import time
+from contextlib import contextmanager
+
+from config import (
+    THROTTLE_GLOBAL_RATE, THROTTLE_GLOBAL_BURST, THROTTLE_GROUP_RATE, THROTTLE_GROUP_BURST,
+    THROTTLE_PRIVATE_RATE, THROTTLE_PRIVATE_BURST, THROTTLE_MAX_CHAT_WAIT, THROTTLE_MAX_RETRY_WAIT,
+    THROTTLE_MAX_RETRIES
+)
+from flood_control import TokenBuckets
+from metrics import InstrumentedRequest, TELEGRAM_THROTTLE_SECONDS, TELEGRAM_RETRIED
+
+# Lanes (chhota number pehle)
+REPLY = 0
+DM = 1
+BROADCAST = 2
+LANE_NAMES = {REPLY: 'reply', DM: 'dm', BROADCAST: 'broadcast'}
+
+# 429 par global rate is factor se ghatta hai, par max rate ke is hisse se neeche nahi
+BACKOFF_FACTOR = 0.5
+MIN_RATE_FRACTION = 0.1
+# Har successful send par max rate ka itna hissa wapas
+RECOVERY_STEP = 0.02
+# Itni der idle chat ka bucket memory se hat jaata hai
+CHAT_IDLE_SECONDS = 600
+
+_lane = contextvars.ContextVar('telegram_lane', default=REPLY)
+
+@contextmanager
+def lane(priority):
+    """Bot API calls made inside the block (in this task) use the given lane."""
+    token = _lane.set(priority)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+def is_message_method(api_method):
+    # Telegram ki message limits inhi par lagti hain (get_chat, get_chat_member wagairah par nahi)
+    return api_method.startswith(('send', 'copyMessage', 'forwardMessage', 'editMessage'))
+
+class PriorityLimiter:
+    """Global token bucket; waiters are let through lowest lane first, FIFO within a lane.
+
+    pause() holds every call back for a while (RetryAfter). slow_down() and
+    speed_up() move the rate between a tenth of max_rate and max_rate.
+    """
+
+    def __init__(self, rate, burst):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters = []  # heap of (lane, seq, future)
+        self._seq = itertools.count()
+        self._timer = None
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    async def acquire(self, priority):
+        now = time.monotonic()
+        self._refill(now)
+        if not self._waiters and now >= self._paused_until and self._tokens >= 1:
+            self._tokens -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._schedule(now)
+        await future
+
+    def _schedule(self, now):
+        if self._timer is not None or not self._waiters:
+            return
+        ready = max(self._paused_until, now + max(0.0, (1 - self._tokens) / self.rate))
+        self._timer = asyncio.get_running_loop().call_later(ready - now, self._release)
+
+    def _release(self):
+        self._timer = None
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters and now >= self._paused_until and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue  # waiter cancel ho chuka
+            self._tokens -= 1
+            future.set_result(None)
+        self._schedule(now)
+
+    async def wait_unpaused(self):
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def set_max_rate(self, rate, burst):
+        self.max_rate = rate
+        self.rate = min(self.rate, rate)
+        self.burst = burst
+        self._tokens = min(self._tokens, burst)
+
+    def slow_down(self):
+        self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate * BACKOFF_FACTOR)
+
+    def speed_up(self):
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP)
+
+    def stats(self):
+        return {'rate': self.rate, 'waiting': len(self._waiters)}
+
+class Throttle:
+    """Per-chat budgets in front of the global PriorityLimiter."""
+
+    def __init__(self, global_rate, global_burst, group_rate, group_burst, private_rate, private_burst, max_chat_wait):
+        self.limiter = PriorityLimiter(global_rate, global_burst)
+        self.groups = TokenBuckets(group_rate, group_burst, CHAT_IDLE_SECONDS)
+        self.private = TokenBuckets(private_rate, private_burst, CHAT_IDLE_SECONDS)
+        self.max_chat_wait = max_chat_wait
+
+    def _chat_buckets(self, chat_id):
+        # Private chats (users) ke ids positive; groups/channels negative ya "@username"
+        return self.private if isinstance(chat_id, int) and chat_id > 0 else self.groups
+
+    async def before_message(self, chat_id):
+        """Waits for the chat's budget and a global slot in the current lane."""
+        start = time.monotonic()
+        if chat_id is not None:
+            buckets = self._chat_buckets(chat_id)
+            bucket = buckets.get(chat_id, start)
+            # Reservation: tokens negative ho sakte hain, har caller apni baari tak sota hai
+            wait = (1 - bucket[0]) / buckets.rate if bucket[0] < 1 else 0.0
+            if wait <= self.max_chat_wait:
+                bucket[0] -= 1
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            # Isse lamba wait handler slots rok leta; bhej do, Telegram ka 429 hi faisla karega
+        priority = _lane.get()
+        await self.limiter.acquire(priority)
+        TELEGRAM_THROTTLE_SECONDS.observe(time.monotonic() - start, LANE_NAMES.get(priority, 'reply'))
+
+    def rate_limited(self, chat_id, retry_after):
+        """Holds back whatever the 429 applies to and slows the global rate."""
+        if chat_id is None:
+            self.limiter.pause(retry_after)
+        else:
+            # Chat ka agla slot retry_after ke baad
+            buckets = self._chat_buckets(chat_id)
+            bucket = buckets.get(chat_id, time.monotonic())
+            bucket[0] = min(bucket[0], 1 - retry_after * buckets.rate)
+        self.limiter.slow_down()
+
+throttle = Throttle(
+    THROTTLE_GLOBAL_RATE, THROTTLE_GLOBAL_BURST, THROTTLE_GROUP_RATE, THROTTLE_GROUP_BURST,
+    THROTTLE_PRIVATE_RATE, THROTTLE_PRIVATE_BURST, THROTTLE_MAX_CHAT_WAIT
+)
+
+def _retry_after(payload):
+    try:
+        return float(json.loads(payload)['parameters']['retry_after'])
+    except (ValueError, TypeError, KeyError):
+        return None
+
+class ThrottledRequest(InstrumentedRequest):
+    """InstrumentedRequest that shapes sends through throttle and retries short RetryAfters itself.
+
+    Handler replies (REPLY lane) retry only while their total wait stays within
+    THROTTLE_MAX_CHAT_WAIT; DMs and broadcasts wait up to THROTTLE_MAX_RETRY_WAIT
+    per retry.
+    """
+
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        api_method = url.rsplit('/', 1)[-1]
+        message = is_message_method(api_method)
+        chat_id = request_data.parameters.get('chat_id') if request_data is not None else None
+        # Handler reply update slot aur account locks pakde hue hai: uske retries ka kul wait chhota
+        reply = _lane.get() == REPLY
+        waited = 0.0
+        for attempt in range(THROTTLE_MAX_RETRIES + 1):
+            if message:
+                await throttle.before_message(chat_id)
+            else:
+                await throttle.limiter.wait_unpaused()
+            status, payload = await super().do_request(url, method, request_data, *args, **kwargs)
+            if status != 429:
+                if message:
+                    throttle.limiter.speed_up()
+                return status, payload
+            retry_after = _retry_after(payload)
+            if retry_after is None:
+                return status, payload
+            throttle.rate_limited(chat_id if message else None, retry_after)
+            if reply:
+                too_long = waited + retry_after > THROTTLE_MAX_CHAT_WAIT
+            else:
+                too_long = retry_after > THROTTLE_MAX_RETRY_WAIT
+            if too_long or attempt == THROTTLE_MAX_RETRIES:
+                # Caller ko RetryAfter milta hai (broadcast/outbox khud reschedule karte hain, reply chhod diya jaata hai)
+                return status, payload
+            TELEGRAM_RETRIED.inc(api_method)
+            waited += retry_after
+            if message and chat_id is not None:
+                # Sirf is chat par roka gaya hai; baaki chats ke sends chalte rehte hain
+                await asyncio.sleep(retry_after)
+        return status, payload
@@ -0,0 +1,64 @@
+# user_cache.py
+# users table ki rows ka in-memory LRU cache (TTL ke saath). database.py har
+# write ke baad affected users ko invalidate karta hai, isliye cache se
+# purani (stale) row kabhi wapas nahi aati.
+
+import threading
+import time
+from collections import OrderedDict
+
+class UserCache:
+    """Thread-safe LRU cache with a TTL, keyed by user_id."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Har invalidation par badhta hai; isse pehle shuru hua read apni row cache nahi kar sakta
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is not None:
+                row, expires = entry
+                if expires > time.monotonic():
+                    self._data.move_to_end(user_id)
+                    self.hits += 1
+                    return row
+                del self._data[user_id]
+            self.misses += 1
+            return None
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def put(self, user_id, row, generation):
+        """Stores row unless some write invalidated the cache after generation was read."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._data[user_id] = (row, time.monotonic() + self.ttl)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self):
+        return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
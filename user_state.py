@@ -0,0 +1,33 @@
+# user_state.py
+# users table ki ek row ka typed record. Handlers fields naam se padhte hain
+# (state.balance, state.death_ts, ...) -- 7-tuple unpack karke underscores
+# nahi. Objects user cache mein share hote hain, isliye inhe badalna mana hai;
+# koi bhi change database.py ke write functions se hi jaata hai.
+
+# users table ke data columns, table ke order mein (user_id ke baad)
+USER_COLUMNS = ('balance', 'death_ts', 'protect_ts', 'revive_count', 'revive_date', 'total_kills', 'daily_ts')
+
+class UserState:
+    """One users row (without user_id). Shared through the cache; treat as read-only."""
+
+    __slots__ = USER_COLUMNS
+
+    def __init__(self, balance=100, death_ts=0.0, protect_ts=0.0, revive_count=0, revive_date=None, total_kills=0, daily_ts=0.0):
+        self.balance = balance
+        self.death_ts = death_ts
+        self.protect_ts = protect_ts
+        self.revive_count = revive_count
+        self.revive_date = revive_date
+        self.total_kills = total_kills
+        self.daily_ts = daily_ts
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in USER_COLUMNS)
+        return f"UserState({fields})"
+
+    def __eq__(self, other):
+        if not isinstance(other, UserState):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in USER_COLUMNS)
+
+    __hash__ = None
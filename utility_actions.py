@@ -4,7 +4,7 @@ from telegram.ext import ContextTypes
 from telegram import Update
 from telegram.constants import ParseMode 
 import time
-from database import get_user_history
+from async_db import get_user_history
 from config import BOT_OWNER_ID, BOT_OWNER_NAME 
 
 # /tr command 
@@ -44,7 +44,7 @@ async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     target_id = target.id
     target_name = f"@{target.username}" if target.username else target.first_name
     
-    history = get_user_history(target_id) 
+    history = await get_user_history(target_id) 
     
     if not history: 
         return await update.message.reply_text(f"❌ **{target_name}** ki koi name/username history nahi mili.", parse_mode=ParseMode.MARKDOWN)
@@ -0,0 +1,256 @@
+# workers.py
+# Multi-process mode (WORKER_PROCESSES > 0). Ek halka ingress process Telegram
+# se updates leta hai (polling ya webhook), unhe parse nahi karta, sirf raw JSON
+# se chat_id nikaal kar update ko us chat ke worker process ki queue mein daal
+# deta hai. Har worker poora handler set chalata hai (main.worker_main). Ek
+# chat ke saare updates hamesha ek hi worker mein jaate hain, isliye unka order
+# wahi rehta hai jo ek process mein tha. Economy ke saare check-and-write
+# database transactions ke andar hote hain, aur workers mein per-process caches
+# band rehte hain, isliye state sab workers ke beech consistent rehti hai.
+
+import asyncio
+import hmac
+import json
+import multiprocessing
+import queue
+import signal
+from urllib.parse import urlencode
+
+from telegram import Update
+from telegram.error import TelegramError
+from telegram.request import HTTPXRequest
+
+from config import (
+    BOT_TOKEN, BOT_OWNER_ID, WEB_HOST, WEB_PORT, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET,
+    WEBHOOK_MAX_CONNECTIONS, INGRESS_POLL_TIMEOUT
+)
+from keep_alive import keep_alive, route
+
+# Dead worker check / retry ke beech ka waqt (seconds)
+SUPERVISE_INTERVAL = 5
+# Ek executor hop mein queue se max kitne updates
+FEED_BATCH = 100
+
+def chat_key(raw):
+    """The chat an update belongs to, read from its raw JSON (0 if it has none)."""
+    for value in raw.values():
+        if not isinstance(value, dict):
+            continue
+        # message, edited_message, chat_member, ...: chat; callback_query: message.chat
+        chat = value.get('chat') or (value.get('message') or {}).get('chat')
+        if chat:
+            return chat['id']
+        # inline_query, poll_answer, ...: sirf user hota hai
+        sender = value.get('from') or value.get('user')
+        if sender:
+            return sender['id']
+    return 0
+
+def worker_for(key, count):
+    return key % count
+
+def primary_worker(count):
+    """Worker that runs the process-wide background jobs (outbox, compaction, broadcasts).
+
+    It is the one that owns the owner's private chat. UpdateRouter also sends
+    every /broadcast there, whichever chat it came from, so status and cancel
+    always reach the process running the broadcast and only one can run.
+    """
+    return worker_for(BOT_OWNER_ID, count)
+
+# Yeh commands kisi bhi chat se aayein, primary worker hi chalata hai
+PRIMARY_COMMANDS = frozenset({'broadcast'})
+
+def command_key(raw):
+    """The command a raw update's message starts with ('broadcast' for "/broadcast@MyBot status"), or None.
+
+    Same rule as flood_control.command_name, on the raw JSON.
+    """
+    message = raw.get('message')
+    if not isinstance(message, dict) or not message.get('text') or not message.get('entities'):
+        return None
+    entity = message['entities'][0]
+    if entity.get('type') != 'bot_command' or entity.get('offset') != 0:
+        return None
+    return message['text'][1:entity.get('length', 0)].split('@', 1)[0].lower()
+
+class UpdateRouter:
+    """Starts count worker processes and hands each raw update to its chat's worker.
+
+    target(index, count, updates) runs in each worker; updates is its
+    multiprocessing queue of raw update dicts, ending with None.
+    """
+
+    def __init__(self, count, target):
+        self.count = count
+        self.target = target
+        # spawn: har worker saaf interpreter se shuru hota hai (fork threads aur SQLite connections copy kar deta)
+        self._context = multiprocessing.get_context('spawn')
+        self.queues = [self._context.Queue() for _ in range(count)]
+        self.processes = [None] * count
+        self.routed = [0] * count
+
+    def _spawn(self, index):
+        process = self._context.Process(
+            target=self.target, args=(index, self.count, self.queues[index]), name=f"bot-worker-{index}"
+        )
+        process.start()
+        self.processes[index] = process
+
+    def start(self):
+        for index in range(self.count):
+            self._spawn(index)
+
+    def route(self, raw):
+        if command_key(raw) in PRIMARY_COMMANDS:
+            index = primary_worker(self.count)
+        else:
+            index = worker_for(chat_key(raw), self.count)
+        self.queues[index].put(raw)
+        self.routed[index] += 1
+
+    def restart_dead(self):
+        # Crash hua worker usi queue ke saath dobara; beech ke updates queue mein intezaar karte hain
+        for index, process in enumerate(self.processes):
+            if process is not None and not process.is_alive():
+                print(f"Worker {index} exited with code {process.exitcode}; restarting it.")
+                self._spawn(index)
+
+    def stop(self):
+        """Lets every worker drain its queue, then waits for it to exit."""
+        for updates in self.queues:
+            updates.put(None)
+        for process in self.processes:
+            if process is not None:
+                process.join()
+
+# --- WORKER SIDE ---
+
+async def feed(application, updates):
+    """Moves raw updates from the ingress queue into application's update queue until None arrives."""
+    loop = asyncio.get_running_loop()
+    parent = multiprocessing.parent_process()
+
+    def take():
+        # Ek blocking get, phir jo pehle se pada hai woh bhi saath mein (har update par executor hop nahi)
+        batch = [updates.get(timeout=1.0)]
+        while len(batch) < FEED_BATCH and batch[-1] is not None:
+            try:
+                batch.append(updates.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    while True:
+        try:
+            batch = await loop.run_in_executor(None, take)
+        except queue.Empty:
+            # Ingress kill -9 ho gaya to sentinel kabhi nahi aayega
+            if parent is not None and not parent.is_alive():
+                return
+            continue
+        for raw in batch:
+            if raw is None:
+                return
+            await application.update_queue.put(Update.de_json(raw, application.bot))
+
+# --- INGRESS SIDE ---
+
+async def _call(request, method, **params):
+    """Calls a Bot API method with GET and returns its raw result (no Telegram objects built)."""
+    url = f"https://api.telegram.org/bot{BOT_TOKEN}/{method}"
+    if params:
+        url += '?' + urlencode(params)
+    read_timeout = params.get('timeout', 0) + 10
+    status, payload = await request.do_request(url, 'GET', read_timeout=read_timeout)
+    data = json.loads(payload)
+    if not data.get('ok'):
+        raise TelegramError(f"{method} failed (HTTP {status}): {data.get('description')}")
+    return data['result']
+
+async def _poll(request, router):
+    await _call(request, 'deleteWebhook')
+    offset = 0
+    allowed_updates = json.dumps(Update.ALL_TYPES)
+    while True:
+        try:
+            raw_updates = await _call(
+                request, 'getUpdates', offset=offset, timeout=INGRESS_POLL_TIMEOUT, allowed_updates=allowed_updates
+            )
+        except TelegramError as e:
+            print(f"Error polling updates: {e}")
+            await asyncio.sleep(SUPERVISE_INTERVAL)
+            continue
+        for raw in raw_updates:
+            offset = raw['update_id'] + 1
+            router.route(raw)
+
+def webhook_route(on_update):
+    """Serves Telegram's update POSTs on WEBHOOK_PATH of the keep-alive server.
+
+    Checks the secret token, parses the body and awaits on_update(raw) with
+    the update dict; a body that fails to parse or route gets a 400.
+    """
+    @route('POST', WEBHOOK_PATH)
+    async def telegram_webhook(request):
+        if WEBHOOK_SECRET:
+            token = request.headers.get('x-telegram-bot-api-secret-token', '')
+            if not hmac.compare_digest(token.encode(), WEBHOOK_SECRET.encode()):
+                return 403, 'text/plain', "Forbidden"
+        try:
+            await on_update(json.loads(request.body))
+        except (ValueError, TypeError, AttributeError, KeyError):
+            return 400, 'text/plain', "Bad Request"
+        return 200, 'text/plain', "OK"
+
+async def _set_webhook(request):
+    params = {
+        'url': WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH,
+        'allowed_updates': json.dumps(Update.ALL_TYPES),
+        'max_connections': WEBHOOK_MAX_CONNECTIONS,
+    }
+    if WEBHOOK_SECRET:
+        params['secret_token'] = WEBHOOK_SECRET
+    await _call(request, 'setWebhook', **params)
+
+async def run_ingress(router, mode):
+    """Feeds router from Telegram (mode "polling" or "webhook") until SIGINT/SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    request = HTTPXRequest()
+    await request.initialize()
+    router.start()
+    web_server = await keep_alive(WEB_HOST, WEB_PORT)
+    if mode == "webhook":
+        async def route_update(raw):
+            router.route(raw)
+
+        webhook_route(route_update)
+        await _set_webhook(request)
+        receiver = None
+        print(f"Ingress is running (webhook on {WEB_HOST}:{WEB_PORT}{WEBHOOK_PATH}, {router.count} workers)...")
+    else:
+        receiver = loop.create_task(_poll(request, router))
+        print(f"Ingress is running (polling, {router.count} workers)...")
+    try:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), SUPERVISE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            if receiver is not None and receiver.done():
+                # deleteWebhook fail hua ya loop crash: thodi der baad dobara
+                print(f"Update polling stopped: {receiver.exception()!r}; restarting it.")
+                receiver = loop.create_task(_poll(request, router))
+            router.restart_dead()
+    finally:
+        if receiver is not None:
+            receiver.cancel()
+            await asyncio.gather(receiver, return_exceptions=True)
+        web_server.close()
+        # Blocking join event loop se bahar, taaki workers apni queues drain kar lein
+        await loop.run_in_executor(None, router.stop)
+        await request.shutdown()